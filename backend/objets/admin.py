@@ -1,8 +1,15 @@
 from django.contrib import admin
 
-from backend.objets.models import Declaration, Objet, Restitution
+from backend.objets.models import (
+    CorrespondanceCandidate, Declaration, Objet, InstantaneQuotidien, Restitution, StatistiqueMensuelle,
+    Suppression
+)
 
 # Register your models here.
 admin.site.register(Objet)
 admin.site.register(Declaration)
-admin.site.register(Restitution)
\ No newline at end of file
+admin.site.register(Restitution)
+admin.site.register(StatistiqueMensuelle)
+admin.site.register(InstantaneQuotidien)
+admin.site.register(CorrespondanceCandidate)
+admin.site.register(Suppression)
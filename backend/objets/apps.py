@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class ObjetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.objets'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,380 @@
+"""
+Rapprochement automatique des déclarations perdues et trouvées.
+
+Chaque couple (déclaration perdue, déclaration trouvée) reçoit un score :
+
+- texte : similarité cosinus TF-IDF (nom de l'objet compté double,
+  descriptions), calculée avec NumPy sur un index inversé ;
+- lieu : indice de Jaccard des mots du lieu ;
+- date : 1 le même jour, 0 au-delà de ``CORRESPONDANCES_FENETRE_JOURS``
+  (couples plus éloignés écartés).
+
+Le calcul est incrémental : une déclaration créée ou modifiée est marquée
+``a_apparier`` et le worker (commande ``apparier_declarations``) l'ajoute à
+son index en mémoire, puis enregistre ses ``CORRESPONDANCES_K`` meilleurs
+candidats du type opposé dans ``CorrespondanceCandidate``. Les fréquences
+de documents (IDF) suivent le corpus, les normes déjà calculées ne sont pas
+recalculées.
+
+L'index est construit une fois par processus, puis rattrapé avant chaque
+lot : les déclarations appariées par un autre worker (``a_apparier`` remis
+à faux, ``updated_at`` daté du lot) y sont ajoutées, sans reconstruction.
+La lecture repart de ``CORRESPONDANCES_MARGE_SECONDES`` avant la dernière
+date lue, pour ne pas sauter un lot validé en retard.
+
+Les candidats d'une déclaration sont mis à jour sur place (scores
+recalculés en cas de conflit) ; seuls ses couples qui ne sont plus
+candidats sont supprimés, y compris ceux enregistrés par la déclaration
+opposée.
+"""
+import math
+import datetime
+import re
+import unicodedata
+from collections import Counter, namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CorrespondanceCandidate, Declaration, EtatObjet
+
+K = 10
+FENETRE_JOURS = 90
+TAILLE_LOT = 200
+SEUIL_TEXTE = 0.1
+POIDS_TEXTE = 0.6
+POIDS_LIEU = 0.25
+POIDS_DATE = 0.15
+PRESELECTION = 50
+MARGE_SECONDES = 60
+
+MOTS_VIDES = frozenset("""
+    au aux avec ce ces cet cette dans de des du en est et il elle je la le les
+    leur ma mes mon ne ou par pas pour qui que sa se ses son sur un une
+""".split())
+
+OPPOSES = {EtatObjet.PERDU: EtatObjet.TROUVE, EtatObjet.TROUVE: EtatObjet.PERDU}
+CHAMPS = (
+    "id", "etat_initial", "date_declaration", "objet__nom",
+    "objet__description", "description", "lieu", "objet_id",
+)
+
+Document = namedtuple("Document", "id etat jour termes lieu objet_id")
+Candidat = namedtuple("Candidat", "id score texte lieu date")
+
+
+def _reglage(nom, defaut):
+    return getattr(settings, nom, defaut)
+
+
+# =========================
+# ✂️ TEXTE
+# =========================
+def termes(texte):
+    """Mots normalisés (minuscules, sans accents ni pluriel simple, sans mots vides)."""
+    texte = unicodedata.normalize("NFKD", (texte or "").lower())
+    texte = "".join(c for c in texte if not unicodedata.combining(c))
+    mots = []
+    for mot in re.findall(r"[a-z0-9]+", texte):
+        if len(mot) < 2 or mot in MOTS_VIDES:
+            continue
+        if len(mot) > 3 and mot[-1] in "sx":
+            mot = mot[:-1]
+        mots.append(mot)
+    return mots
+
+
+def document(id, etat, date, nom, description_objet, description, lieu, objet_id):
+    return Document(
+        id=id,
+        etat=etat,
+        jour=date.timestamp() / 86400 if date else 0.0,
+        # Le nom de l'objet pèse double
+        termes=Counter(termes(nom) * 2 + termes(description_objet) + termes(description)),
+        lieu=frozenset(termes(lieu)),
+        objet_id=objet_id or 0,
+    )
+
+
+def document_de(declaration):
+    objet = declaration.objet
+    return document(
+        declaration.id, declaration.etat_initial, declaration.date_declaration,
+        objet.nom if objet else "", objet.description if objet else "",
+        declaration.description, declaration.lieu, declaration.objet_id,
+    )
+
+
+# =========================
+# 🗂️ INDEX
+# =========================
+class _Tableau:
+    """Tableau NumPy extensible (capacité doublée au besoin)."""
+
+    def __init__(self, dtype, capacite=8):
+        self._donnees = np.zeros(capacite, dtype=dtype)
+        self.taille = 0
+
+    def ajouter(self, valeur):
+        if self.taille == len(self._donnees):
+            agrandi = np.zeros(2 * len(self._donnees), dtype=self._donnees.dtype)
+            agrandi[:self.taille] = self._donnees
+            self._donnees = agrandi
+        self._donnees[self.taille] = valeur
+        self.taille += 1
+
+    def __setitem__(self, rang, valeur):
+        self._donnees[rang] = valeur
+
+    @property
+    def valeurs(self):
+        return self._donnees[:self.taille]
+
+
+class _Cote:
+    """Déclarations d'un même type (perdues ou trouvées) : colonnes et index inversé."""
+
+    def __init__(self):
+        self.ids = _Tableau(np.int64)
+        self.jours = _Tableau(np.float64)
+        self.normes = _Tableau(np.float64)
+        self.objets = _Tableau(np.int64)
+        self.actifs = _Tableau(np.bool_)
+        self.lieux = []
+        self.postings = {}      # terme -> (rangs, poids tf)
+
+    def __len__(self):
+        return self.ids.taille
+
+
+class MoteurCorrespondances:
+    def __init__(self):
+        self.cotes = {etat: _Cote() for etat in OPPOSES}
+        self.positions = {}     # id -> (etat, rang, termes)
+        self.frequences = Counter()
+        self.synchro = None     # dernier updated_at lu dans la base
+        self.recents = {}       # id -> updated_at déjà indexé, dans la marge
+
+    def __len__(self):
+        return len(self.positions)
+
+    @classmethod
+    def depuis_la_base(cls):
+        """Index des déclarations perdues/trouvées déjà appariées (les autres suivront)."""
+        moteur = cls()
+        lignes = (
+            Declaration.objects
+            .filter(etat_initial__in=list(OPPOSES), a_apparier=False)
+            .values_list(*CHAMPS, "updated_at")
+            .iterator(chunk_size=2000)
+        )
+        for *champs, date in lignes:
+            moteur.ajouter(document(*champs))
+            moteur.noter(champs[0], date)
+        return moteur
+
+    def noter(self, identifiant, date):
+        """Retient que ``identifiant`` est indexé dans sa version du ``date``."""
+        self.recents[identifiant] = date
+        if self.synchro is None or date > self.synchro:
+            self.synchro = date
+
+    def rattraper(self, marge=None):
+        """
+        Ajoute les déclarations appariées ailleurs depuis la dernière lecture ;
+        renvoie leur nombre.
+        """
+        marge = datetime.timedelta(seconds=marge or _reglage("CORRESPONDANCES_MARGE_SECONDES", MARGE_SECONDES))
+        lignes = Declaration.objects.filter(a_apparier=False)
+        if self.synchro is not None:
+            lignes = lignes.filter(updated_at__gt=self.synchro - marge)
+        ajoutees = 0
+        for *champs, date in lignes.values_list(*CHAMPS, "updated_at").iterator(chunk_size=2000):
+            if self.recents.get(champs[0]) != date:
+                # Changée de type : seulement retirée par ajouter()
+                self.ajouter(document(*champs))
+                ajoutees += 1
+            self.noter(champs[0], date)
+        # Hors de la marge, une ligne n'est plus relue
+        if self.synchro is not None:
+            limite = self.synchro - marge
+            self.recents = {i: d for i, d in self.recents.items() if d > limite}
+        return ajoutees
+
+    def idf(self, terme):
+        return math.log((1 + len(self.positions)) / (1 + self.frequences[terme])) + 1
+
+    @staticmethod
+    def _poids(termes):
+        return {terme: 1 + math.log(nombre) for terme, nombre in termes.items()}
+
+    def retirer(self, identifiant):
+        position = self.positions.pop(identifiant, None)
+        if position is None:
+            return
+        etat, rang, anciens = position
+        self.cotes[etat].actifs[rang] = False
+        self.frequences.subtract(anciens)
+
+    def ajouter(self, doc):
+        """Ajoute (ou remplace) un document ; les autres types sont seulement retirés."""
+        self.retirer(doc.id)
+        if doc.etat not in self.cotes:
+            return
+        cote = self.cotes[doc.etat]
+        rang = len(cote)
+        self.frequences.update(doc.termes.keys())
+        poids = self._poids(doc.termes)
+        for terme, valeur in poids.items():
+            if terme not in cote.postings:
+                cote.postings[terme] = (_Tableau(np.int32, 4), _Tableau(np.float64, 4))
+            rangs, valeurs = cote.postings[terme]
+            rangs.ajouter(rang)
+            valeurs.ajouter(valeur)
+        cote.ids.ajouter(doc.id)
+        cote.jours.ajouter(doc.jour)
+        cote.normes.ajouter(math.sqrt(sum((v * self.idf(t)) ** 2 for t, v in poids.items())))
+        cote.objets.ajouter(doc.objet_id)
+        cote.actifs.ajouter(True)
+        cote.lieux.append(doc.lieu)
+        self.positions[doc.id] = (doc.etat, rang, tuple(doc.termes))
+
+    def candidats(self, doc, k=None, fenetre=None):
+        """Meilleurs candidats du type opposé à ``doc``, par score décroissant."""
+        k = k or _reglage("CORRESPONDANCES_K", K)
+        fenetre = fenetre or _reglage("CORRESPONDANCES_FENETRE_JOURS", FENETRE_JOURS)
+        cote = self.cotes.get(OPPOSES.get(doc.etat))
+        if cote is None or not len(cote) or not doc.termes:
+            return []
+
+        # Produit scalaire TF-IDF avec tous les documents en un seul bincount
+        poids = self._poids(doc.termes)
+        rangs, contributions = [], []
+        norme = 0.0
+        for terme, valeur in poids.items():
+            idf = self.idf(terme)
+            norme += (valeur * idf) ** 2
+            if terme in cote.postings:
+                rangs_terme, valeurs_terme = cote.postings[terme]
+                rangs.append(rangs_terme.valeurs)
+                contributions.append(valeurs_terme.valeurs * (valeur * idf * idf))
+        if not rangs:
+            return []
+        produits = np.bincount(np.concatenate(rangs), weights=np.concatenate(contributions), minlength=len(cote))
+
+        normes = cote.normes.valeurs
+        texte = np.divide(produits, normes * math.sqrt(norme), out=np.zeros_like(produits), where=normes > 0)
+        ecart = np.abs(cote.jours.valeurs - doc.jour)
+        retenus = np.flatnonzero(
+            (texte >= SEUIL_TEXTE) & (ecart <= fenetre) & cote.actifs.valeurs
+            & (cote.objets.valeurs != doc.objet_id)
+        )
+        if not len(retenus):
+            return []
+
+        date = 1 - ecart[retenus] / fenetre
+        partiel = POIDS_TEXTE * texte[retenus] + POIDS_DATE * date
+        # Le lieu (≤ POIDS_LIEU) n'est évalué que sur les meilleurs scores partiels
+        nombre = min(len(retenus), max(PRESELECTION, 5 * k))
+        meilleurs = np.argpartition(-partiel, nombre - 1)[:nombre]
+
+        resultats = []
+        for i in meilleurs:
+            rang = retenus[i]
+            lieu = cote.lieux[rang]
+            similarite_lieu = len(lieu & doc.lieu) / len(lieu | doc.lieu) if lieu and doc.lieu else 0.0
+            resultats.append(Candidat(
+                id=int(cote.ids.valeurs[rang]),
+                score=float(partiel[i] + POIDS_LIEU * similarite_lieu),
+                texte=float(texte[rang]),
+                lieu=similarite_lieu,
+                date=float(date[i]),
+            ))
+        resultats.sort(key=lambda c: (-c.score, c.id))
+        return resultats[:k]
+
+
+_moteur = None
+
+
+def moteur_du_processus():
+    global _moteur
+    if _moteur is None:
+        _moteur = MoteurCorrespondances.depuis_la_base()
+    return _moteur
+
+
+# =========================
+# 💾 ENREGISTREMENT
+# =========================
+def enregistrer_candidats(declaration, candidats):
+    """
+    Remplace les candidats enregistrés de ``declaration`` : couples mis à
+    jour ou créés, ceux qui ne sont plus candidats supprimés.
+    """
+    existants = set(
+        Declaration.objects.filter(id__in=[c.id for c in candidats]).values_list("id", flat=True)
+    )
+    perdue = declaration.etat_initial == EtatObjet.PERDU
+    maintenant = timezone.now()
+    lignes = [
+        CorrespondanceCandidate(
+            perdue_id=declaration.id if perdue else c.id,
+            trouvee_id=c.id if perdue else declaration.id,
+            score=c.score, score_texte=c.texte, score_lieu=c.lieu, score_date=c.date,
+            date_calcul=maintenant,
+        )
+        # Déclarations supprimées depuis leur indexation : ignorées
+        for c in candidats if c.id in existants
+    ]
+    cote, autre = ("perdue", "trouvee") if perdue else ("trouvee", "perdue")
+    CorrespondanceCandidate.objects.filter(**{cote: declaration}).exclude(
+        **{f"{autre}_id__in": [c.id for c in candidats if c.id in existants]}
+    ).delete()
+    CorrespondanceCandidate.objects.bulk_create(
+        lignes,
+        update_conflicts=True,
+        unique_fields=["perdue", "trouvee"],
+        update_fields=["score", "score_texte", "score_lieu", "score_date", "date_calcul"],
+    )
+    return len(lignes)
+
+
+def apparier_en_attente(moteur=None, taille=None, k=None):
+    """
+    Traite les déclarations marquées ``a_apparier``, lot par lot ; renvoie
+    le nombre de déclarations traitées. Les lignes sont verrouillées
+    (``SKIP LOCKED``) et l'index rattrapé avant chaque lot.
+    """
+    # Pas « moteur or ... » : un moteur vide est faux (__len__)
+    if moteur is None:
+        moteur = moteur_du_processus()
+    taille = taille or _reglage("CORRESPONDANCES_TAILLE_LOT", TAILLE_LOT)
+    traitees = 0
+    while True:
+        moteur.rattraper()
+        with transaction.atomic():
+            lot = list(
+                Declaration.objects
+                .filter(a_apparier=True)
+                .select_for_update(skip_locked=True, of=("self",))
+                .select_related("objet")
+                .order_by("id")[:taille]
+            )
+            if not lot:
+                return traitees
+            # Tout le lot d'abord : ses déclarations peuvent se correspondre entre elles
+            documents = [document_de(declaration) for declaration in lot]
+            for doc in documents:
+                moteur.ajouter(doc)
+            for declaration, doc in zip(lot, documents):
+                if declaration.etat_initial in OPPOSES:
+                    enregistrer_candidats(declaration, moteur.candidats(doc, k))
+            # updated_at : les autres workers rattrapent ce lot
+            maintenant = timezone.now()
+            Declaration.objects.filter(id__in=[d.id for d in lot]).update(a_apparier=False, updated_at=maintenant)
+            for declaration in lot:
+                moteur.recents[declaration.id] = maintenant
+        traitees += len(lot)
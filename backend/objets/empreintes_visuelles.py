@@ -0,0 +1,252 @@
+"""
+Empreintes visuelles (dHash 64 bits) des photos d'objets et de déclarations.
+
+Deux photos du même objet donnent des empreintes proches au sens de la
+distance de Hamming, même recadrées, réduites ou ré-encodées. L'empreinte
+est stockée en entier signé 64 bits (``empreinte_visuelle``, indexée) et
+calculée après l'enregistrement d'une nouvelle photo.
+
+La recherche des déclarations visuellement proches passe par un index
+multiple (« multi-index hashing ») : l'empreinte est coupée en 4 blocs de
+16 bits, chacun indexé dans un dictionnaire. Si deux empreintes sont à une
+distance ≤ r, l'un des blocs est à une distance ≤ r // 4 (principe des
+tiroirs ; pour r = 10 : 2, 2, 2 et 1) : il suffit d'énumérer ces quelques
+variantes par bloc puis de vérifier la distance exacte des candidats, sans
+parcourir toute la table.
+L'index est construit par processus et reconstruit quand la version
+``empreintes_visuelles:version`` change.
+"""
+import logging
+import threading
+import time
+from functools import lru_cache
+from itertools import chain, combinations
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import Declaration, EtatObjet, Objet
+
+logger = logging.getLogger(__name__)
+
+BITS = 64
+BLOCS = 4
+BITS_PAR_BLOC = BITS // BLOCS
+MASQUE_BLOC = (1 << BITS_PAR_BLOC) - 1
+MASQUE = (1 << BITS) - 1
+RAYON = 10
+CLE_VERSION = "empreintes_visuelles:version"
+
+
+# =========================
+# 🧮 CALCUL
+# =========================
+def vers_signe(empreinte):
+    """Entier non signé 64 bits -> valeur stockable dans un ``BigIntegerField``."""
+    return empreinte - (1 << BITS) if empreinte >= 1 << (BITS - 1) else empreinte
+
+
+def vers_non_signe(valeur):
+    return valeur & MASQUE
+
+
+def distance(a, b):
+    return ((a ^ b) & MASQUE).bit_count()
+
+
+def dhash(image):
+    """dHash : 8 lignes de 9 pixels gris, un bit par paire de voisins horizontaux."""
+    gris = image.convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = gris.tobytes()
+    empreinte = 0
+    for ligne in range(8):
+        for colonne in range(8):
+            gauche = pixels[ligne * 9 + colonne]
+            droite = pixels[ligne * 9 + colonne + 1]
+            empreinte = (empreinte << 1) | (gauche > droite)
+    return empreinte
+
+
+@lru_cache(maxsize=256)
+def empreinte_du_fichier(nom):
+    """Empreinte (non signée) de l'image ``nom`` ; un objet et sa déclaration partagent le fichier."""
+    with default_storage.open(nom, "rb") as fichier, Image.open(fichier) as image:
+        # JPEG : décodage à très petite échelle, seule la forme générale compte
+        image.draft("L", (64, 64))
+        return dhash(ImageOps.exif_transpose(image))
+
+
+def calculer_empreinte(instance):
+    """Calcule et enregistre l'empreinte de la photo de ``instance`` (Objet ou Declaration)."""
+    nom = instance.image.name if instance.image else ""
+    if not nom:
+        return None
+    try:
+        valeur = vers_signe(empreinte_du_fichier(nom))
+    except Exception:
+        logger.exception("Empreinte visuelle impossible pour %s", nom)
+        return None
+    # update() : ni signaux ni écrasement des autres champs ; ignoré si la photo a changé entre-temps
+    type(instance).objects.filter(pk=instance.pk, image=nom).update(empreinte_visuelle=valeur)
+    instance.empreinte_visuelle = valeur
+    if isinstance(instance, Declaration):
+        invalider_index()
+    return valeur
+
+
+# =========================
+# 🗂️ INDEX MULTIPLE
+# =========================
+@lru_cache(maxsize=None)
+def _masques(rayon):
+    """Masques de 16 bits ayant au plus ``rayon`` bits à 1."""
+    masques = []
+    for nombre in range(rayon + 1):
+        for positions in combinations(range(BITS_PAR_BLOC), nombre):
+            masque = 0
+            for position in positions:
+                masque |= 1 << position
+            masques.append(masque)
+    return tuple(masques)
+
+
+class IndexHamming:
+    """
+    Recherche des empreintes à distance de Hamming ≤ r parmi des couples
+    ``(id, empreinte)``. Chaque case d'une table contient des entiers
+    ``empreinte << 32 | rang`` : la distance se vérifie sur place, sans
+    second accès à une autre structure.
+    """
+
+    def __init__(self, elements=()):
+        self.identifiants = []
+        self.tables = [{} for _ in range(BLOCS)]
+        for identifiant, empreinte in elements:
+            self.ajouter(identifiant, empreinte)
+
+    def __len__(self):
+        return len(self.identifiants)
+
+    @staticmethod
+    def _blocs(empreinte):
+        return [(empreinte >> (BITS_PAR_BLOC * i)) & MASQUE_BLOC for i in range(BLOCS)]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _sous_rayons(rayon):
+        # Tiroirs : si chaque bloc i était à plus de s_i, la distance totale
+        # dépasserait Σ(s_i + 1) - 1 ; il suffit donc que Σ(s_i + 1) = rayon + 1.
+        base, reste = divmod(rayon + 1, BLOCS)
+        return tuple(min(base + (i < reste) - 1, BITS_PAR_BLOC) for i in range(BLOCS))
+
+    def ajouter(self, identifiant, empreinte):
+        empreinte = vers_non_signe(empreinte)
+        entree = empreinte << 32 | len(self.identifiants)
+        self.identifiants.append(identifiant)
+        for table, bloc in zip(self.tables, self._blocs(empreinte)):
+            table.setdefault(bloc, []).append(entree)
+
+    def rechercher(self, empreinte, rayon=RAYON, limite=None):
+        """``[(distance, id), …]`` triés, à distance ≤ ``rayon`` de ``empreinte``."""
+        empreinte = vers_non_signe(empreinte)
+        distances = {}
+        for table, bloc, sous_rayon in zip(self.tables, self._blocs(empreinte), self._sous_rayons(rayon)):
+            if sous_rayon < 0:
+                continue
+            cases = filter(None, map(table.get, [bloc ^ masque for masque in _masques(sous_rayon)]))
+            for entree in chain.from_iterable(cases):
+                d = ((entree >> 32) ^ empreinte).bit_count()
+                if d <= rayon:
+                    distances[entree & 0xFFFFFFFF] = d
+        resultats = sorted((d, self.identifiants[rang]) for rang, d in distances.items())
+        return resultats[:limite] if limite else resultats
+
+
+def invalider_index():
+    try:
+        cache.incr(CLE_VERSION)
+    except ValueError:
+        cache.set(CLE_VERSION, time.time_ns(), timeout=None)
+
+
+def _version():
+    version = cache.get(CLE_VERSION)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(CLE_VERSION, version, timeout=None):
+            version = cache.get(CLE_VERSION, version)
+    return version
+
+
+_index = {}
+_verrou = threading.Lock()
+
+
+def index_declarations(etat_initial):
+    """Index (par processus) des déclarations ``etat_initial`` ayant une empreinte."""
+    version = _version()
+    with _verrou:
+        courant = _index.get(etat_initial)
+        if courant is None or courant[0] != version:
+            elements = (
+                Declaration.objects
+                .filter(etat_initial=etat_initial, empreinte_visuelle__isnull=False)
+                .values_list("id", "empreinte_visuelle")
+                .iterator(chunk_size=5000)
+            )
+            courant = _index[etat_initial] = (version, IndexHamming(elements))
+        return courant[1]
+
+
+# =========================
+# 🔍 CANDIDATS
+# =========================
+def _rayon():
+    return getattr(settings, "EMPREINTES_RAYON", RAYON)
+
+
+def candidats_visuels(declarations, limite=5, rayon=None):
+    """
+    Pour chaque déclaration (perdue ou trouvée) ayant une empreinte, les
+    déclarations du type opposé dont la photo est proche, en une requête :
+    ``{declaration.id: [(distance, Declaration), …]}``. Les objets déjà
+    restitués et l'objet lui-même sont écartés.
+    """
+    rayon = _rayon() if rayon is None else rayon
+    opposes = {EtatObjet.PERDU: EtatObjet.TROUVE, EtatObjet.TROUVE: EtatObjet.PERDU}
+    trouves = {}
+    for declaration in declarations:
+        oppose = opposes.get(declaration.etat_initial)
+        if oppose is None or declaration.empreinte_visuelle is None:
+            continue
+        # Marge : certains candidats seront écartés après lecture en base
+        trouves[declaration] = index_declarations(oppose).rechercher(
+            declaration.empreinte_visuelle, rayon, limite * 2
+        )
+
+    ids = {identifiant for resultats in trouves.values() for _, identifiant in resultats}
+    lignes = (
+        Declaration.objects.filter(id__in=ids)
+        .exclude(objet__etat=EtatObjet.RESTITUE)
+        .select_related("objet", "citoyen")
+        .in_bulk()
+    ) if ids else {}
+
+    candidats = {}
+    for declaration, resultats in trouves.items():
+        candidats[declaration.id] = [
+            (d, lignes[identifiant]) for d, identifiant in resultats
+            if identifiant in lignes and lignes[identifiant].objet_id != declaration.objet_id
+        ][:limite]
+    return candidats
+
+
+def a_calculer(force=False):
+    """Objets et déclarations avec photo dont l'empreinte manque (toutes si ``force``)."""
+    for modele in (Objet, Declaration):
+        lignes = modele.objects.exclude(image="").exclude(image__isnull=True)
+        if not force:
+            lignes = lignes.filter(empreinte_visuelle__isnull=True)
+        yield from lignes.only("id", "image", "empreinte_visuelle").iterator(chunk_size=500)
@@ -0,0 +1,171 @@
+"""
+Export groupé des preuves de restitution (audit d'un commissariat).
+
+Les preuves déjà produites par le worker sont relues telles quelles ; les
+manquantes sont rendues en parallèle dans un pool de processus (puis
+enregistrées, elles ne seront plus jamais rendues). Le ZIP est produit au
+fil de l'eau, morceau par morceau : ni l'archive ni l'ensemble des PDF ne
+sont tenus en mémoire, quelle que soit la période demandée.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .models import Restitution, StatutRestitution
+from .preuves import generer_preuve_manquante, preuve_disponible, rendre_pdf
+
+logger = logging.getLogger(__name__)
+
+TAILLE_MORCEAU = 64 * 1024
+PROCESSUS_MAX = 4
+
+
+def restitutions_a_exporter(commissariat=None, debut=None, fin=None):
+    """Restitutions effectuées du ``commissariat`` entre ``debut`` et ``fin`` (inclus)."""
+    restitutions = Restitution.objects.filter(statut=StatutRestitution.EFFECTUEE)
+    if commissariat is not None:
+        restitutions = restitutions.filter(commissariat=commissariat)
+    if debut:
+        restitutions = restitutions.filter(date_restitution__gte=debut)
+    if fin:
+        restitutions = restitutions.filter(date_restitution__lte=fin)
+    return (
+        restitutions
+        .select_related("objet", "citoyen", "policier", "restitue_par", "commissariat")
+        .order_by("date_restitution", "heure_restitution", "id")
+    )
+
+
+# =========================
+# ⚙️ RENDU PARALLÈLE
+# =========================
+def _generer(restitution_id, rendu=rendre_pdf):
+    """Rend et enregistre la preuve (au besoin dans un processus du pool) ; renvoie son nom."""
+    # Attend la fin d'un rendu en cours (worker, téléchargement) plutôt que de le refaire
+    return generer_preuve_manquante(restitution_id, rendu, attendre=True).preuve_pdf.name
+
+
+def nombre_de_processus():
+    defaut = min(os.cpu_count() or 1, PROCESSUS_MAX)
+    return getattr(settings, "PREUVES_EXPORT_PROCESSUS", defaut)
+
+
+def preuves_dans_l_ordre(restitutions, processus=None, rendu=rendre_pdf):
+    """
+    Génère ``(restitution, nom du fichier ou None)`` dans l'ordre du queryset.
+
+    Les preuves manquantes sont rendues par ``processus`` processus (0 : dans
+    le processus courant), avec au plus ``2 × processus`` rendus en cours :
+    la consommation mémoire ne dépend pas du nombre de restitutions.
+    """
+    processus = nombre_de_processus() if processus is None else processus
+    fenetre_max = max(2 * processus, 1)
+    pool = None
+    fenetre = deque()
+
+    def resoudre(restitution, tache):
+        if tache is None:
+            return restitution, restitution.preuve_pdf.name
+        try:
+            return restitution, tache.result()
+        except Exception:
+            logger.exception("Erreur génération PDF pour restitution %s", restitution.id)
+            return restitution, None
+
+    try:
+        for restitution in restitutions.iterator(chunk_size=200):
+            if preuve_disponible(restitution):
+                fenetre.append((restitution, None))
+            elif processus:
+                if pool is None:
+                    # Pool créé seulement si une preuve manque vraiment
+                    pool = ProcessPoolExecutor(
+                        max_workers=processus,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        # Importer ce module dans l'enfant exige des apps prêtes :
+                        # l'initialiseur doit donc être django.setup lui-même.
+                        initializer=django.setup,
+                    )
+                fenetre.append((restitution, pool.submit(_generer, restitution.id)))
+            else:
+                try:
+                    restitution.preuve_pdf.name = _generer(restitution.id, rendu)
+                except Exception:
+                    logger.exception("Erreur génération PDF pour restitution %s", restitution.id)
+                    restitution.preuve_pdf.name = None
+                fenetre.append((restitution, None))
+
+            # Les preuves prêtes en tête de file partent tout de suite ;
+            # on n'attend un rendu que si la fenêtre est pleine.
+            while fenetre and (fenetre[0][1] is None or fenetre[0][1].done() or len(fenetre) > fenetre_max):
+                yield resoudre(*fenetre.popleft())
+        while fenetre:
+            yield resoudre(*fenetre.popleft())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+# =========================
+# 🗜️ ZIP EN FLUX
+# =========================
+class _Tampon(io.RawIOBase):
+    """Flux en écriture seule que l'on vide au fur et à mesure."""
+
+    def __init__(self):
+        self.morceaux = []
+
+    def writable(self):
+        return True
+
+    def write(self, donnees):
+        self.morceaux.append(bytes(donnees))
+        return len(donnees)
+
+    def vider(self):
+        donnees = b"".join(self.morceaux)
+        self.morceaux.clear()
+        return donnees
+
+
+def nom_dans_l_archive(restitution):
+    return f"{restitution.date_restitution:%Y-%m-%d}_restitution_{restitution.id}.pdf"
+
+
+def zip_preuves(restitutions, processus=None, rendu=rendre_pdf, stockage=None):
+    """
+    Archive ZIP des preuves de ``restitutions``, produite morceau par morceau.
+    Les restitutions dont la preuve n'a pas pu être rendue sont listées dans
+    ``erreurs.txt``.
+    """
+    for morceau in _morceaux_zip(restitutions, processus, rendu, stockage or default_storage):
+        if morceau:
+            yield morceau
+
+
+def _morceaux_zip(restitutions, processus, rendu, stockage):
+    tampon = _Tampon()
+    erreurs = []
+    # Les PDF sont déjà compressés : stockés tels quels
+    with zipfile.ZipFile(tampon, "w", compression=zipfile.ZIP_STORED) as archive:
+        for restitution, nom in preuves_dans_l_ordre(restitutions, processus, rendu):
+            if not nom:
+                erreurs.append(f"Restitution {restitution.id} : preuve indisponible")
+                continue
+            with stockage.open(nom, "rb") as source, \
+                    archive.open(nom_dans_l_archive(restitution), "w", force_zip64=True) as cible:
+                while morceau := source.read(TAILLE_MORCEAU):
+                    cible.write(morceau)
+                    yield tampon.vider()
+            yield tampon.vider()
+        if erreurs:
+            archive.writestr("erreurs.txt", "\n".join(erreurs) + "\n")
+    yield tampon.vider()
@@ -0,0 +1,172 @@
+"""
+Flux des modifications pour les applications mobiles et partenaires.
+
+Plutôt que de relire les listes HTML, un client garde un curseur et ne
+récupère que ce qui a changé depuis :
+
+- objets, déclarations et restitutions créés ou modifiés, lus par
+  ``changed_since`` (index sur ``updated_at``) et projetés sur quelques
+  champs (``values_list`` : aucun modèle instancié, colonnes nommées une
+  seule fois dans ``champs``) ;
+- suppressions, tracées par signals.py dans ``Suppression`` (numéro de
+  séquence croissant).
+
+Chaque source avance de son côté, d'au plus ``limite`` lignes par appel :
+tant que ``encore`` est vrai, le client rappelle avec le nouveau curseur.
+Sans curseur, le flux reprend tout depuis le début (synchronisation
+initiale).
+
+Seuls les agents (policiers, administrateurs) reçoivent le flux complet :
+un citoyen ne voit ni les restitutions (qui récupère quoi, où et quand) ni
+la position exacte des déclarations (``SOURCES_CITOYEN``). Le curseur est opaque (JSON en base64) : position
+``(updated_at, id)`` par source, dernière suppression lue, date d'émission.
+
+Les lignes modifiées depuis moins de ``FLUX_MARGE_SECONDES`` attendent
+l'appel suivant : une transaction validée un peu plus tard avec une date
+antérieure ne doit pas être sautée. Les suppressions sont purgées après
+``FLUX_RETENTION_JOURS`` : un curseur plus ancien est refusé
+(``CurseurExpire``) et le client repart de zéro.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import Declaration, Objet, Restitution, Suppression
+
+LIMITE = 500
+LIMITE_MAX = 2000
+MARGE_SECONDES = 5
+RETENTION_JOURS = 30
+
+
+def _url(nom):
+    return default_storage.url(nom) if nom else None
+
+
+# Source -> (modèle, champs projetés) ; « id » en premier, « updated_at » en dernier
+SOURCES = {
+    "objets": (Objet, (
+        "id", "nom", "description", "etat", "code_unique", "image", "updated_at",
+    )),
+    "declarations": (Declaration, (
+        "id", "objet", "etat_initial", "type_declaration", "date_declaration", "lieu",
+        "description", "image", "latitude", "longitude", "nb_reclamants", "nb_trouveurs", "updated_at",
+    )),
+    "restitutions": (Restitution, (
+        "id", "objet", "commissariat", "statut", "date_restitution", "heure_restitution", "updated_at",
+    )),
+}
+# Projection des citoyens : sans restitutions ni coordonnées
+SOURCES_CITOYEN = {
+    "objets": SOURCES["objets"],
+    "declarations": (Declaration, tuple(
+        champ for champ in SOURCES["declarations"][1] if champ not in ("latitude", "longitude")
+    )),
+}
+CONVERSIONS = {"image": _url}
+
+
+class CurseurInvalide(ValueError):
+    pass
+
+
+class CurseurExpire(CurseurInvalide):
+    """Curseur antérieur à la purge des suppressions : resynchronisation complète."""
+
+
+def _marge():
+    return datetime.timedelta(seconds=getattr(settings, "FLUX_MARGE_SECONDES", MARGE_SECONDES))
+
+
+def _retention():
+    return datetime.timedelta(days=getattr(settings, "FLUX_RETENTION_JOURS", RETENTION_JOURS))
+
+
+def encoder_curseur(etat):
+    # isoformat() : les microsecondes de updated_at doivent être conservées
+    donnees = json.dumps(etat, default=lambda o: o.isoformat())
+    return base64.urlsafe_b64encode(donnees.encode()).decode().rstrip("=")
+
+
+def _date(texte):
+    date = datetime.datetime.fromisoformat(texte)
+    # Le curseur vient du client : une date sans fuseau (ou avec, si USE_TZ
+    # est désactivé) ne peut pas avoir été émise par encoder_curseur
+    if timezone.is_aware(date) != settings.USE_TZ:
+        raise ValueError(texte)
+    return date
+
+
+def decoder_curseur(curseur):
+    try:
+        etat = json.loads(base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4)))
+        positions = {
+            source: (_date(date), int(pk))
+            for source, (date, pk) in etat["p"].items() if source in SOURCES
+        }
+        suppression = int(etat["s"])
+        emis = _date(etat["e"])
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise CurseurInvalide(curseur)
+    if emis < timezone.now() - _retention():
+        raise CurseurExpire(curseur)
+    return {"p": positions, "s": suppression}
+
+
+def _projeter(ligne, champs):
+    return [CONVERSIONS[champ](valeur) if champ in CONVERSIONS else valeur for champ, valeur in zip(champs, ligne)]
+
+
+def modifications(curseur=None, limite=LIMITE, complet=False):
+    """
+    Modifications depuis ``curseur`` (tout si None) ; ``complet`` pour les
+    agents, sinon ``SOURCES_CITOYEN``. Renvoie un dict sérialisable en JSON
+    (``DjangoJSONEncoder``) ; lève ``CurseurInvalide``.
+    """
+    sources = SOURCES if complet else SOURCES_CITOYEN
+    etat = decoder_curseur(curseur) if curseur else {"p": {}, "s": 0}
+    maintenant = timezone.now()
+    jusqu_a = maintenant - _marge()
+    encore = False
+    resultat = {"champs": {}}
+
+    for source, (modele, champs) in sources.items():
+        position = etat["p"].get(source) or (None, None)
+        lignes = list(
+            modele.objects.changed_since(*position)
+            .filter(updated_at__lte=jusqu_a)
+            .values_list(*champs)[:limite + 1]
+        )
+        if len(lignes) > limite:
+            encore, lignes = True, lignes[:limite]
+        if lignes:
+            etat["p"][source] = (lignes[-1][-1], lignes[-1][0])
+        resultat["champs"][source] = list(champs)
+        resultat[source] = [_projeter(ligne, champs) for ligne in lignes]
+
+    suppressions = list(
+        Suppression.objects.filter(pk__gt=etat["s"], date__lte=jusqu_a, modele__in=list(sources))
+        .order_by("pk").values_list("pk", "modele", "identifiant")[:limite + 1]
+    )
+    if len(suppressions) > limite:
+        encore, suppressions = True, suppressions[:limite]
+    if suppressions:
+        etat["s"] = suppressions[-1][0]
+    resultat["suppressions"] = {source: [] for source in sources}
+    for _, source, identifiant in suppressions:
+        resultat["suppressions"][source].append(identifiant)
+
+    resultat["encore"] = encore
+    resultat["curseur"] = encoder_curseur({"p": etat["p"], "s": etat["s"], "e": maintenant})
+    return resultat
+
+
+def purger_suppressions():
+    """Supprime les traces plus anciennes que la rétention ; renvoie leur nombre."""
+    nombre, _ = Suppression.objects.filter(date__lt=timezone.now() - _retention()).delete()
+    return nombre
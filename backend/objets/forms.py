@@ -2,6 +2,7 @@ from django import forms
 from django.utils import timezone
 from .models import Declaration, Objet, EtatObjet
 from backend.objets.models import Commissariat, Restitution
+from .photos import ChampPhoto, PhotoNormalisee, enregistrer_photo
 
 class DeclarationForm(forms.ModelForm):
     nom_objet = forms.CharField(
@@ -15,7 +16,8 @@ class DeclarationForm(forms.ModelForm):
         widget=forms.Textarea(attrs={'class': 'form-control', 'rows':3, 'placeholder': 'Description (facultative)'}),
         label="Description"
     )
-    image = forms.ImageField(required=False, label="Photo (facultative)")
+    # Photo redressée, réduite et dépouillée de ses métadonnées (voir photos.py)
+    image = ChampPhoto(required=False, label="Photo (facultative)")
 
     etat_initial = forms.ChoiceField(
         choices=[(EtatObjet.PERDU, "Objet perdu"), (EtatObjet.TROUVE, "Objet trouvé")],
@@ -26,12 +28,15 @@ class DeclarationForm(forms.ModelForm):
 
     class Meta:
         model = Declaration
-        fields = ['nom_objet', 'lieu', 'etat_initial', 'description', 'image']
+        fields = ['nom_objet', 'lieu', 'latitude', 'longitude', 'etat_initial', 'description', 'image']
         widgets = {
             'lieu': forms.TextInput(attrs={
                 'class': 'form-control',
                 'placeholder': 'Lieu où l’objet a été perdu ou trouvé'
             }),
+            # Renseignées par la carte (position du marqueur)
+            'latitude': forms.HiddenInput(),
+            'longitude': forms.HiddenInput(),
         }
 
     def save(self, citoyen=None, commit=True):
@@ -47,6 +52,12 @@ class DeclarationForm(forms.ModelForm):
         etat_initial = self.cleaned_data.get('etat_initial')
         lieu = self.cleaned_data.get('lieu')  # ✅ récupéré ici
 
+        # Nouvelle photo : un seul fichier (nommé par empreinte) pour l'objet et la déclaration
+        if isinstance(image, PhotoNormalisee):
+            image = enregistrer_photo(image)
+            declaration.image = image
+            declaration.empreinte_visuelle = None
+
         # Création ou mise à jour de l'objet
         if declaration.objet:
             objet = declaration.objet
@@ -54,6 +65,8 @@ class DeclarationForm(forms.ModelForm):
             objet.description = description
             objet.etat = etat_initial
             if image:
+                if image != objet.image:
+                    objet.empreinte_visuelle = None
                 objet.image = image
             objet.save()
         else:
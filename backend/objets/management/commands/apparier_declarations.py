@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.objets.correspondances import apparier_en_attente, moteur_du_processus
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcule les correspondances candidates (perdu ↔ trouvé) des déclarations "
+        "nouvelles ou modifiées. Sans --boucle, traite la file puis s'arrête (cron) ; "
+        "avec --boucle, garde l'index en mémoire et tourne en continu (worker) ; "
+        "l'index rattrape les déclarations appariées par les autres workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--boucle", action="store_true", help="Tourne en continu.")
+        parser.add_argument("--pause", type=float, default=5.0,
+                            help="Secondes d'attente quand la file est vide (avec --boucle).")
+
+    def handle(self, *args, **options):
+        debut = time.perf_counter()
+        moteur = moteur_du_processus()
+        self.stdout.write(f"Index chargé : {len(moteur)} déclaration(s) en {time.perf_counter() - debut:.1f} s.")
+        while True:
+            traitees = apparier_en_attente(moteur)
+            if traitees or not options["boucle"]:
+                self.stdout.write(f"{traitees} déclaration(s) appariée(s).")
+            if not options["boucle"]:
+                return
+            time.sleep(options["pause"])
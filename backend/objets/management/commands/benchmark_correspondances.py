@@ -0,0 +1,79 @@
+import datetime
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.objets.correspondances import MoteurCorrespondances, document
+from backend.objets.models import EtatObjet
+from backend.objets.vocabulaire import COULEURS, DETAILS, LIEUX, MARQUES, OBJETS, PRECISIONS
+
+
+def description(hasard):
+    return " ".join(hasard.sample(DETAILS, 2) + [hasard.choice(COULEURS)])
+
+
+def corpus(nombre, hasard):
+    """Déclarations synthétiques ; une sur dix a son pendant (même objet, décrit autrement)."""
+    depart = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    documents, couples = [], []
+    while len(documents) < nombre:
+        identifiant = len(documents) + 1
+        nom = f"{hasard.choice(OBJETS)} {hasard.choice(MARQUES)}"
+        lieu = f"{hasard.choice(LIEUX)} {hasard.choice(PRECISIONS)}"
+        date = depart + datetime.timedelta(days=hasard.uniform(0, 730))
+        details = description(hasard)
+        etat = hasard.choice([EtatObjet.PERDU, EtatObjet.TROUVE])
+        documents.append(document(identifiant, etat, date, nom, details, "", lieu, identifiant))
+        if hasard.random() < 0.1:
+            oppose = EtatObjet.TROUVE if etat == EtatObjet.PERDU else EtatObjet.PERDU
+            documents.append(document(
+                identifiant + 1, oppose, date + datetime.timedelta(days=hasard.uniform(-5, 15)),
+                nom, details.split()[-1], hasard.choice(DETAILS), lieu.split()[0], identifiant + 1,
+            ))
+            couples.append((identifiant, identifiant + 1) if etat == EtatObjet.PERDU else (identifiant + 1, identifiant))
+    return documents[:nombre], [(p, t) for p, t in couples if t <= nombre]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le moteur de rapprochement perdu/trouvé sur un corpus synthétique : "
+        "construction de l'index, latence d'un appariement incrémental et rappel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--declarations", type=int, default=200_000)
+        parser.add_argument("--requetes", type=int, default=500)
+        parser.add_argument("--k", type=int, default=10)
+
+    def handle(self, *args, **options):
+        hasard = random.Random(options["declarations"])
+        documents, couples = corpus(options["declarations"], hasard)
+        par_id = {doc.id: doc for doc in documents}
+
+        moteur = MoteurCorrespondances()
+        debut = time.perf_counter()
+        for doc in documents:
+            moteur.ajouter(doc)
+        construction = time.perf_counter() - debut
+
+        echantillon = hasard.sample(couples, min(options["requetes"], len(couples)))
+        durees, trouves = [], 0
+        for perdue, trouvee in echantillon:
+            debut = time.perf_counter()
+            # Appariement incrémental : la déclaration est (ré)indexée puis comparée
+            moteur.ajouter(par_id[perdue])
+            candidats = moteur.candidats(par_id[perdue], options["k"])
+            durees.append(time.perf_counter() - debut)
+            trouves += any(c.id == trouvee for c in candidats)
+
+        durees.sort()
+        self.stdout.write(f"{len(moteur)} déclarations indexées en {construction:.1f} s")
+        self.stdout.write(
+            f"appariement : moyenne {statistics.mean(durees) * 1e3:.1f} ms, "
+            f"p95 {durees[int(len(durees) * 0.95)] * 1e3:.1f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"rappel top-{options['k']} : {trouves}/{len(echantillon)} pendants retrouvés"
+        ))
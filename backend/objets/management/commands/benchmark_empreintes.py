@@ -0,0 +1,63 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.objets.empreintes_visuelles import BITS, RAYON, IndexHamming, distance
+
+
+def perturber(empreinte, bits, hasard):
+    for position in hasard.sample(range(BITS), bits):
+        empreinte ^= 1 << position
+    return empreinte
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la recherche par distance de Hamming (index multiple) sur des "
+        "empreintes synthétiques, comparée à un parcours complet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=100_000)
+        parser.add_argument("--requetes", type=int, default=1_000)
+        parser.add_argument("--rayon", type=int, default=RAYON)
+
+    def handle(self, *args, **options):
+        hasard = random.Random(options["images"])
+        rayon = options["rayon"]
+        empreintes = [hasard.getrandbits(BITS) for _ in range(options["images"])]
+
+        debut = time.perf_counter()
+        index = IndexHamming(enumerate(empreintes))
+        construction = time.perf_counter() - debut
+
+        # Requêtes : photos déjà indexées, légèrement altérées (ré-encodage, recadrage)
+        requetes = [
+            (i, perturber(empreintes[i], hasard.randint(0, rayon), hasard))
+            for i in hasard.sample(range(len(empreintes)), options["requetes"])
+        ]
+
+        durees = []
+        trouvees = 0
+        for attendu, empreinte in requetes:
+            debut = time.perf_counter()
+            resultats = index.rechercher(empreinte, rayon)
+            durees.append(time.perf_counter() - debut)
+            trouvees += any(identifiant == attendu for _, identifiant in resultats)
+
+        lineaire = []
+        for _, empreinte in requetes[:20]:
+            debut = time.perf_counter()
+            [i for i, e in enumerate(empreintes) if distance(e, empreinte) <= rayon]
+            lineaire.append(time.perf_counter() - debut)
+
+        durees.sort()
+        self.stdout.write(f"{len(index)} empreintes, rayon {rayon}, index construit en {construction:.2f} s")
+        self.stdout.write(
+            f"index multiple : moyenne {statistics.mean(durees) * 1e6:.0f} µs, "
+            f"p95 {durees[int(len(durees) * 0.95)] * 1e6:.0f} µs"
+        )
+        self.stdout.write(f"parcours complet : moyenne {statistics.mean(lineaire) * 1e3:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"rappel : {trouvees}/{len(requetes)}"))
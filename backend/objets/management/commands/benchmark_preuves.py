@@ -0,0 +1,76 @@
+import multiprocessing
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.objets.models import Restitution
+
+MODES = {
+    "avant": "QR, feuille de style et polices reconstruits à chaque PDF",
+    "apres": "QR en cache, feuille de style et polices partagées",
+}
+
+
+def mesurer(mode, ids, repetitions):
+    """Rend ``repetitions`` fois chaque preuve dans un processus neuf."""
+    from backend.objets.preuves import rendre_pdf
+
+    restitutions = list(
+        Restitution.objects
+        .select_related("objet", "citoyen", "policier", "restitue_par", "commissariat")
+        .filter(pk__in=ids)
+    )
+    rss_depart = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latences = []
+    for _ in range(repetitions):
+        for restitution in restitutions:
+            debut = time.perf_counter()
+            rendre_pdf(restitution, partage=mode == "apres")
+            latences.append(time.perf_counter() - debut)
+    return {
+        "latences": latences,
+        "rss_depart": rss_depart,
+        "rss_max": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la latence par PDF et le pic de mémoire (RSS) du rendu des preuves, "
+        "avec et sans réutilisation (QR, feuille de style, polices). Chaque mode "
+        "tourne dans un processus séparé pour que les pics soient comparables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--restitutions", type=int, default=10, help="Nombre de restitutions rendues.")
+        parser.add_argument("--repetitions", type=int, default=3, help="Passages sur chaque restitution.")
+
+    def handle(self, *args, **options):
+        ids = list(Restitution.objects.order_by("-id").values_list("id", flat=True)[:options["restitutions"]])
+        if not ids:
+            raise CommandError("Aucune restitution en base : rien à rendre.")
+
+        self.stdout.write(
+            f"{len(ids)} restitution(s) × {options['repetitions']} passage(s)\n"
+            f"{'mode':>6} {'1er PDF (ms)':>13} {'moyenne (ms)':>13} {'médiane (ms)':>13} "
+            f"{'p95 (ms)':>9} {'pic RSS (Mo)':>13} {'hausse RSS (Mo)':>16}"
+        )
+        contexte = multiprocessing.get_context("spawn")
+        for mode, description in MODES.items():
+            # Ce module importe les modèles : l'enfant doit d'abord initialiser Django
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexte, initializer=django.setup) as pool:
+                resultat = pool.submit(mesurer, mode, ids, options["repetitions"]).result()
+            latences = [l * 1000 for l in resultat["latences"]]
+            p95 = sorted(latences)[max(int(len(latences) * 0.95) - 1, 0)]
+            # ru_maxrss est en kilo-octets sous Linux
+            self.stdout.write(
+                f"{mode:>6} {latences[0]:>13.1f} {statistics.mean(latences):>13.1f} "
+                f"{statistics.median(latences):>13.1f} {p95:>9.1f} "
+                f"{resultat['rss_max'] / 1024:>13.1f} "
+                f"{(resultat['rss_max'] - resultat['rss_depart']) / 1024:>16.1f}   ({description})"
+            )
@@ -0,0 +1,69 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.objets.models import EtatObjet
+from backend.objets.statistiques import IndexMensuel, derniers_mois
+
+ETATS = [EtatObjet.PERDU, EtatObjet.TROUVE, EtatObjet.EN_ATTENTE]
+
+
+def lignes_synthetiques(nombre, mois):
+    hasard = random.Random(nombre)
+    return [
+        {
+            "mois": datetime.datetime.combine(hasard.choice(mois), datetime.time.min),
+            "etat_initial": hasard.choice(ETATS),
+            "total": hasard.randint(1, 50),
+        }
+        for _ in range(nombre)
+    ]
+
+
+def regroupement_ancien(lignes, mois):
+    # Ancienne boucle de dashboard_admin : un parcours complet par mois et par série
+    labels = [m.strftime("%b %Y") for m in mois]
+    return {
+        etat: [
+            sum(l["total"] for l in lignes
+                if l["etat_initial"] == etat and l["mois"].strftime("%b %Y") == label)
+            for label in labels
+        ]
+        for etat in ETATS
+    }
+
+
+def regroupement_index(lignes, mois):
+    index = IndexMensuel(lignes, champ_etat="etat_initial")
+    return {etat: index.serie(mois, etat) for etat in ETATS}
+
+
+class Command(BaseCommand):
+    help = "Compare le regroupement mensuel par index avec l'ancienne boucle imbriquée."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lignes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+        parser.add_argument("--mois", type=int, default=6, help="Nombre de mois (séries plus longues).")
+
+    def handle(self, *args, **options):
+        mois = derniers_mois(options["mois"])
+        self.stdout.write(f"{'lignes':>10} {'ancien (ms)':>12} {'index (ms)':>11} {'index ns/ligne':>15}")
+        for nombre in options["lignes"]:
+            lignes = lignes_synthetiques(nombre, mois)
+
+            debut = time.perf_counter()
+            attendu = regroupement_ancien(lignes, mois)
+            ancien = time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            obtenu = regroupement_index(lignes, mois)
+            index = time.perf_counter() - debut
+
+            if obtenu != attendu:
+                self.stderr.write(self.style.ERROR(f"Résultats différents pour {nombre} lignes"))
+            self.stdout.write(
+                f"{nombre:>10} {ancien * 1000:>12.1f} {index * 1000:>11.1f} "
+                f"{index * 1e9 / nombre:>15.0f}"
+            )
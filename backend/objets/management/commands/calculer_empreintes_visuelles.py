@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from backend.objets.empreintes_visuelles import a_calculer, calculer_empreinte
+
+
+class Command(BaseCommand):
+    help = "Calcule l'empreinte visuelle (dHash) des photos d'objets et de déclarations qui n'en ont pas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Recalcule aussi les empreintes existantes.")
+
+    def handle(self, *args, **options):
+        calculees = erreurs = 0
+        for instance in a_calculer(force=options["force"]):
+            if calculer_empreinte(instance) is None:
+                erreurs += 1
+            else:
+                calculees += 1
+        self.stdout.write(self.style.SUCCESS(f"{calculees} empreinte(s) calculée(s), {erreurs} en erreur."))
@@ -0,0 +1,29 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.objets.statistiques import capturer_instantane
+
+
+class Command(BaseCommand):
+    help = (
+        "Enregistre l'instantané quotidien des compteurs (objets, restitutions, "
+        "citoyens, admins, policiers). À lancer une fois par jour, par exemple :\n"
+        "  5 0 * * * python manage.py capturer_statistiques"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jour", help="Date de l'instantané (AAAA-MM-JJ), aujourd'hui par défaut.")
+
+    def handle(self, *args, **options):
+        jour = None
+        if options["jour"]:
+            try:
+                jour = datetime.date.fromisoformat(options["jour"])
+            except ValueError:
+                raise CommandError("Date invalide, format attendu : AAAA-MM-JJ.")
+        instantane = capturer_instantane(jour)
+        self.stdout.write(self.style.SUCCESS(
+            f"{instantane} : {instantane.nb_objets} objet(s), "
+            f"{instantane.nb_restitutions} restitution(s), {instantane.nb_citoyens} citoyen(s)."
+        ))
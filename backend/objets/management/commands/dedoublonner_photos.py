@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from backend.objets.photos import dedoublonner_photos
+
+
+class Command(BaseCommand):
+    help = (
+        "Fait pointer les photos identiques (même contenu) des objets et des "
+        "déclarations vers un seul fichier."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--supprimer", action="store_true",
+                            help="Efface aussi les copies devenues inutiles et leurs miniatures.")
+
+    def handle(self, *args, **options):
+        copies, liberes = dedoublonner_photos(supprimer=options["supprimer"])
+        message = f"{copies} copie(s) remplacée(s)"
+        if options["supprimer"]:
+            message += f", {liberes / (1024 * 1024):.1f} Mo libéré(s)"
+        self.stdout.write(self.style.SUCCESS(message + "."))
@@ -0,0 +1,50 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.objets.export_preuves import restitutions_a_exporter, zip_preuves
+from backend.users.models import Commissariat
+
+
+def date_option(valeur):
+    try:
+        return datetime.date.fromisoformat(valeur) if valeur else None
+    except ValueError:
+        raise CommandError(f"Date invalide : {valeur} (format attendu : AAAA-MM-JJ).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporte dans une archive ZIP les preuves PDF des restitutions effectuées "
+        "d'un commissariat sur une période. Les preuves manquantes sont rendues "
+        "en parallèle ; l'archive est écrite au fil de l'eau."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("sortie", help="Fichier ZIP à créer.")
+        parser.add_argument("--commissariat", type=int, help="Identifiant du commissariat (tous par défaut).")
+        parser.add_argument("--debut", help="Première date de restitution (AAAA-MM-JJ).")
+        parser.add_argument("--fin", help="Dernière date de restitution (AAAA-MM-JJ).")
+        parser.add_argument("--processus", type=int, default=None,
+                            help="Processus de rendu (PREUVES_EXPORT_PROCESSUS par défaut, 0 : aucun).")
+
+    def handle(self, *args, **options):
+        commissariat = None
+        if options["commissariat"] is not None:
+            try:
+                commissariat = Commissariat.objects.get(pk=options["commissariat"])
+            except Commissariat.DoesNotExist:
+                raise CommandError(f"Commissariat {options['commissariat']} introuvable.")
+
+        restitutions = restitutions_a_exporter(
+            commissariat, date_option(options["debut"]), date_option(options["fin"])
+        )
+        nombre = restitutions.count()
+        taille = 0
+        with open(options["sortie"], "wb") as sortie:
+            for morceau in zip_preuves(restitutions, processus=options["processus"]):
+                sortie.write(morceau)
+                taille += len(morceau)
+        self.stdout.write(self.style.SUCCESS(
+            f"{nombre} preuve(s) exportée(s) dans {options['sortie']} ({taille / 1024:.0f} Ko)."
+        ))
@@ -0,0 +1,52 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+from backend.objets.miniatures import assurer_miniatures
+from backend.objets.models import Declaration, Objet
+
+
+def images_existantes():
+    """Noms distincts des photos d'objets et de déclarations."""
+    noms = set()
+    for modele in (Objet, Declaration):
+        noms.update(
+            modele.objects.exclude(image="").exclude(image__isnull=True)
+            .values_list("image", flat=True).distinct()
+        )
+    return sorted(noms)
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère les miniatures manquantes des photos existantes (objets et "
+        "déclarations), en parallèle sur plusieurs processus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processus", type=int, default=os.cpu_count() or 1,
+                            help="Nombre de processus (0 : dans le processus courant).")
+        parser.add_argument("--force", action="store_true", help="Régénère aussi les miniatures existantes.")
+
+    def handle(self, *args, **options):
+        noms = images_existantes()
+        forces = [options["force"]] * len(noms)
+        if options["processus"]:
+            with ProcessPoolExecutor(
+                max_workers=options["processus"],
+                mp_context=multiprocessing.get_context("spawn"),
+                # Ce module importe les modèles : l'enfant doit d'abord initialiser Django
+                initializer=django.setup,
+            ) as pool:
+                resultats = list(pool.map(assurer_miniatures, noms, forces, chunksize=8))
+        else:
+            resultats = [assurer_miniatures(nom, force) for nom, force in zip(noms, forces)]
+
+        erreurs = resultats.count(None)
+        fichiers = sum(r for r in resultats if r)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(noms)} image(s) traitée(s) : {fichiers} miniature(s) écrite(s), {erreurs} en erreur."
+        ))
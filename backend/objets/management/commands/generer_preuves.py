@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.objets.preuves import generer_preuves_en_attente
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère les preuves PDF des restitutions effectuées qui n'en ont pas encore "
+        "et envoie les mails de restitution en attente. Sans --boucle, traite la "
+        "file puis s'arrête (cron) ; avec --boucle, tourne en continu (worker)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limite", type=int, default=None, help="Nombre maximal de preuves par passage.")
+        parser.add_argument("--boucle", action="store_true", help="Tourne en continu.")
+        parser.add_argument("--pause", type=float, default=5.0,
+                            help="Secondes d'attente quand la file est vide (avec --boucle).")
+
+    def handle(self, *args, **options):
+        while True:
+            generees, erreurs = generer_preuves_en_attente(options["limite"])
+            if generees or erreurs or not options["boucle"]:
+                self.stdout.write(f"{generees} preuve(s) générée(s), {erreurs} en erreur.")
+            if not options["boucle"]:
+                return
+            time.sleep(options["pause"])
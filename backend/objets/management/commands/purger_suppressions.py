@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from backend.objets.flux import purger_suppressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime les traces de suppression plus anciennes que FLUX_RETENTION_JOURS "
+        "(flux des modifications). À lancer une fois par jour, par exemple :\n"
+        "  15 0 * * * python manage.py purger_suppressions"
+    )
+
+    def handle(self, *args, **options):
+        nombre = purger_suppressions()
+        self.stdout.write(self.style.SUCCESS(f"{nombre} trace(s) de suppression purgée(s)."))
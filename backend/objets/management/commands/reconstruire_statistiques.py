@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from backend.objets.statistiques import reconstruire_statistiques
+
+
+class Command(BaseCommand):
+    help = "Reconstruit entièrement la table des statistiques mensuelles."
+
+    def handle(self, *args, **options):
+        nb_lignes = reconstruire_statistiques()
+        self.stdout.write(self.style.SUCCESS(f"{nb_lignes} ligne(s) d'agrégats recalculée(s)."))
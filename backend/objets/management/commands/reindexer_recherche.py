@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from backend.objets.models import Declaration, Objet
+from backend.objets.recherche import get_backend
+
+
+class Command(BaseCommand):
+    help = "Recalcule les vecteurs de recherche des objets et déclarations."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        for modele in (Objet, Declaration):
+            total = 0
+            for instance in modele.objects.only("pk").iterator(chunk_size=2000):
+                backend.indexer(instance)
+                total += 1
+            self.stdout.write(f"{modele.__name__} : {total} ligne(s) indexée(s) ({backend.nom})")
+        self.stdout.write(self.style.SUCCESS("Index de recherche à jour."))
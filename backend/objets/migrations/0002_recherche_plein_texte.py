@@ -0,0 +1,60 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:06
+
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Index GIN réservés à PostgreSQL (ignorés sous SQLite)
+INDEX_POSTGRES = [
+    ("objets_objet_search_vector_gin", "objets_objet USING gin (search_vector)"),
+    ("objets_declaration_search_vector_gin", "objets_declaration USING gin (search_vector)"),
+    ("objets_objet_nom_trgm", "objets_objet USING gin (nom gin_trgm_ops)"),
+]
+
+
+def creer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for nom, definition in INDEX_POSTGRES:
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {nom} ON {definition}")
+
+    # Remplissage initial des vecteurs
+    schema_editor.execute(
+        "UPDATE objets_objet SET search_vector = "
+        "setweight(to_tsvector('french', coalesce(nom, '')), 'A') || "
+        "setweight(to_tsvector('french', coalesce(description, '')), 'B')"
+    )
+    schema_editor.execute(
+        "UPDATE objets_declaration SET search_vector = "
+        "setweight(to_tsvector('french', coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('french', coalesce(lieu, '')), 'C')"
+    )
+
+
+def supprimer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for nom, _ in INDEX_POSTGRES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {nom}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0001_initial'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddField(
+            model_name='declaration',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='objet',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0002_recherche_plein_texte'),
+        ('users', '0013_index_pagination'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['-date_declaration', '-id'], name='decl_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['etat_initial', '-date_declaration', '-id'], name='decl_etat_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='restitution',
+            index=models.Index(fields=['-date_restitution', '-heure_restitution', '-id'], name='restit_date_heure_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0003_index_pagination'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['objet', 'date_declaration', 'id'], name='decl_objet_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import TruncMonth
+
+
+def remplir_statistiques(apps, schema_editor):
+    Declaration = apps.get_model('objets', 'Declaration')
+    Restitution = apps.get_model('objets', 'Restitution')
+    StatistiqueMensuelle = apps.get_model('objets', 'StatistiqueMensuelle')
+
+    commissariat = (
+        Restitution.objects.filter(objet=OuterRef('objet'))
+        .order_by('-date_restitution', '-heure_restitution', '-id')
+        .values('commissariat')[:1]
+    )
+    lignes = (
+        Declaration.objects
+        .annotate(mois=TruncMonth('date_declaration'), commissariat_id=Subquery(commissariat))
+        .values('mois', 'commissariat_id', 'etat_initial', 'objet__etat')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    StatistiqueMensuelle.objects.bulk_create([
+        StatistiqueMensuelle(
+            mois=ligne['mois'].date(),
+            commissariat_id=ligne['commissariat_id'],
+            etat_initial=ligne['etat_initial'],
+            etat_objet=ligne['objet__etat'],
+            total=ligne['total'],
+        )
+        for ligne in lignes
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0004_index_declaration_initiale'),
+        ('users', '0013_index_pagination'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueMensuelle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois', models.DateField()),
+                ('etat_initial', models.CharField(choices=[('perdu', 'Perdu'), ('trouve', 'Trouvé'), ('reclame', 'Réclamé'), ('en_attente', 'En attente'), ('restitue', 'Restitué')], max_length=20)),
+                ('etat_objet', models.CharField(blank=True, choices=[('perdu', 'Perdu'), ('trouve', 'Trouvé'), ('reclame', 'Réclamé'), ('en_attente', 'En attente'), ('restitue', 'Restitué')], max_length=20, null=True)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('commissariat', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='users.commissariat')),
+            ],
+            options={
+                'verbose_name': 'Statistique mensuelle',
+                'verbose_name_plural': 'Statistiques mensuelles',
+                'ordering': ['mois'],
+                'indexes': [models.Index(fields=['mois', 'commissariat'], name='stat_mois_commissariat_idx')],
+            },
+        ),
+        migrations.RunPython(remplir_statistiques, migrations.RunPython.noop),
+    ]
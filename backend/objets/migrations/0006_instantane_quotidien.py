@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0005_statistique_mensuelle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstantaneQuotidien',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(unique=True)),
+                ('nb_objets', models.PositiveIntegerField(default=0)),
+                ('nb_restitutions', models.PositiveIntegerField(default=0)),
+                ('nb_citoyens', models.PositiveIntegerField(default=0)),
+                ('nb_admins', models.PositiveIntegerField(default=0)),
+                ('nb_policiers', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Instantané quotidien',
+                'verbose_name_plural': 'Instantanés quotidiens',
+                'ordering': ['jour'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0006_instantane_quotidien'),
+        ('users', '0014_courriel'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restitution',
+            name='preuve_a_notifier',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='restitution',
+            name='preuve_empreinte',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='restitution',
+            name='preuve_pdf',
+            field=models.FileField(blank=True, editable=False, upload_to='preuves/'),
+        ),
+        migrations.AddIndex(
+            model_name='restitution',
+            index=models.Index(condition=models.Q(('preuve_empreinte', ''), ('statut', 'effectuee')), fields=['id'], name='restit_preuve_a_generer_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0007_preuve_pdf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='declaration',
+            name='empreinte_visuelle',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='objet',
+            name='empreinte_visuelle',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0008_empreinte_visuelle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorrespondanceCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('score_texte', models.FloatField(default=0)),
+                ('score_lieu', models.FloatField(default=0)),
+                ('score_date', models.FloatField(default=0)),
+                ('date_calcul', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Correspondance candidate',
+                'verbose_name_plural': 'Correspondances candidates',
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.AddField(
+            model_name='declaration',
+            name='a_apparier',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(condition=models.Q(('a_apparier', True)), fields=['id'], name='decl_a_apparier_idx'),
+        ),
+        migrations.AddField(
+            model_name='correspondancecandidate',
+            name='perdue',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidats_trouves', to='objets.declaration'),
+        ),
+        migrations.AddField(
+            model_name='correspondancecandidate',
+            name='trouvee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='candidats_perdus', to='objets.declaration'),
+        ),
+        migrations.AddIndex(
+            model_name='correspondancecandidate',
+            index=models.Index(fields=['perdue', '-score'], name='corresp_perdue_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='correspondancecandidate',
+            index=models.Index(fields=['trouvee', '-score'], name='corresp_trouvee_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='correspondancecandidate',
+            constraint=models.UniqueConstraint(fields=('perdue', 'trouvee'), name='correspondance_unique'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:42
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def remplir_compteurs(apps, schema_editor):
+    Declaration = apps.get_model('objets', 'Declaration')
+
+    def nombre(champ):
+        through = Declaration._meta.get_field(champ).remote_field.through
+        lignes = (
+            through.objects.filter(declaration=OuterRef('pk'))
+            .values('declaration').annotate(total=Count('id')).values('total')
+        )
+        return Coalesce(Subquery(lignes), Value(0))
+
+    Declaration.objects.update(nb_reclamants=nombre('reclame_par'), nb_trouveurs=nombre('trouve_par'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0010_localisation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='declaration',
+            name='nb_reclamants',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='declaration',
+            name='nb_trouveurs',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(condition=models.Q(('nb_reclamants__gt', 0)), fields=['etat_initial', '-date_declaration', '-id'], name='decl_reclamee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(condition=models.Q(('nb_trouveurs__gt', 0)), fields=['etat_initial', '-date_declaration', '-id'], name='decl_trouvee_par_idx'),
+        ),
+        migrations.RunPython(remplir_compteurs, migrations.RunPython.noop),
+    ]
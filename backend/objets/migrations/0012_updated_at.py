@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0011_compteurs_declaration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='declaration',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='objet',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
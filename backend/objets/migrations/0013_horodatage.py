@@ -0,0 +1,90 @@
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+TAILLE_LOT = 1000
+
+
+def remplir_dates(apps, schema_editor):
+    Objet = apps.get_model('objets', 'Objet')
+    Declaration = apps.get_model('objets', 'Declaration')
+    Restitution = apps.get_model('objets', 'Restitution')
+
+    Declaration.objects.update(created_at=F('date_declaration'), updated_at=F('date_declaration'))
+
+    # Objet : créé à sa première déclaration ; son état a pu changer depuis la
+    # dernière, updated_at garde donc la date de la migration
+    premieres = (
+        Declaration.objects.filter(objet=OuterRef('pk'))
+        .values('objet').annotate(date=Min('date_declaration')).values('date')
+    )
+    Objet.objects.update(created_at=Coalesce(Subquery(premieres), F('created_at')))
+
+    # Restitution : date et heure sont deux colonnes, combinées ici en Python ;
+    # une restitution planifiée (date future) est bornée à maintenant
+    fuseau = timezone.get_default_timezone()
+    maintenant = timezone.now()
+    lot = []
+    for restitution in Restitution.objects.only('date_restitution', 'heure_restitution').iterator(chunk_size=TAILLE_LOT):
+        moment = datetime.datetime.combine(restitution.date_restitution, restitution.heure_restitution)
+        if settings.USE_TZ:
+            moment = timezone.make_aware(moment, fuseau)
+        restitution.created_at = restitution.updated_at = min(moment, maintenant)
+        lot.append(restitution)
+        if len(lot) >= TAILLE_LOT:
+            Restitution.objects.bulk_update(lot, ['created_at', 'updated_at'])
+            lot = []
+    Restitution.objects.bulk_update(lot, ['created_at', 'updated_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0012_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='objet',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='objet',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='declaration',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='declaration',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='restitution',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, default=timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='restitution',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='declaration',
+            index=models.Index(fields=['etat_initial', 'updated_at'], name='decl_etat_maj_idx'),
+        ),
+        migrations.RunPython(remplir_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:20
+
+import importlib
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+def reconstruire(apps, schema_editor):
+    # Des rafraîchissements concurrents ont pu dupliquer des cases : tout est recalculé
+    StatistiqueMensuelle = apps.get_model('objets', 'StatistiqueMensuelle')
+    StatistiqueMensuelle.objects.all().delete()
+    importlib.import_module('backend.objets.migrations.0005_statistique_mensuelle').remplir_statistiques(
+        apps, schema_editor
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0014_suppressions'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconstruire, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='statistiquemensuelle',
+            constraint=models.UniqueConstraint(models.F('mois'), django.db.models.functions.comparison.Coalesce('commissariat', models.Value(0), output_field=models.BigIntegerField()), models.F('etat_initial'), django.db.models.functions.comparison.Coalesce('etat_objet', models.Value('')), name='stat_case_unique'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+from django.db.models.functions import Now
+
+
+def borner_dates(apps, schema_editor):
+    """Corrige les bases déjà passées par l'ancienne 0013."""
+    Objet = apps.get_model('objets', 'Objet')
+    Restitution = apps.get_model('objets', 'Restitution')
+
+    # Restitutions planifiées : dates remplies dans le futur
+    Restitution.objects.filter(created_at__gt=Now()).update(created_at=Now())
+    Restitution.objects.filter(updated_at__gt=Now()).update(updated_at=Now())
+
+    # Objets : la dernière déclaration ne dit rien des changements d'état
+    Objet.objects.update(updated_at=Now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('objets', '0015_statistiques_case_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(borner_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,153 @@
+"""
+Miniatures des photos d'objets et de déclarations.
+
+Chaque photo envoyée est déclinée en quelques tailles fixes (côté le plus
+long, sans agrandissement), en WebP et en JPEG, enregistrées à côté de
+l'original sous un nom déterministe :
+
+    declarations/12pro.png  ->  declarations/miniatures/12pro.png.480.webp
+                                declarations/miniatures/12pro.png.480.jpg
+
+Les gabarits les lisent via la propriété ``miniatures`` des modèles
+(``objet.miniatures.moyenne.webp``) ; tant qu'une miniature n'existe pas,
+l'URL de l'original est renvoyée.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.functional import cached_property
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# nom -> côté le plus long (px)
+TAILLES = {
+    "petite": 160,
+    "moyenne": 480,
+    "grande": 1200,
+}
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def chemin_miniature(nom, taille, extension):
+    """Nom de stockage de la miniature ``taille`` (px) de l'image ``nom``."""
+    dossier, fichier = posixpath.split(nom)
+    return posixpath.join(dossier, "miniatures", f"{fichier}.{taille}.{extension}")
+
+
+class Miniature:
+    """Une taille de miniature : ``.webp``, ``.jpeg`` (URL) et ``str()`` (JPEG)."""
+
+    def __init__(self, image, taille, stockage=None):
+        self.image = image
+        self.taille = taille
+        self.stockage = stockage or default_storage
+
+    def _url(self, extension):
+        if not self.image:
+            return ""
+        if not self.disponible:
+            return self.image.url
+        return self.stockage.url(chemin_miniature(self.image.name, self.taille, extension))
+
+    @cached_property
+    def disponible(self):
+        return bool(self.image) and self.stockage.exists(
+            chemin_miniature(self.image.name, self.taille, "jpg")
+        )
+
+    @property
+    def webp(self):
+        return self._url("webp")
+
+    @property
+    def jpeg(self):
+        return self._url("jpg")
+
+    def __str__(self):
+        return self.jpeg
+
+    def __bool__(self):
+        return bool(self.image)
+
+
+class Miniatures:
+    """Accès aux miniatures d'un ``ImageField`` par nom de taille."""
+
+    def __init__(self, image, stockage=None):
+        self.image = image
+        self.stockage = stockage
+        self._cache = {}
+
+    def __getattr__(self, nom):
+        if nom not in TAILLES:
+            raise AttributeError(nom)
+        if nom not in self._cache:
+            self._cache[nom] = Miniature(self.image, TAILLES[nom], self.stockage)
+        return self._cache[nom]
+
+    def __getitem__(self, nom):
+        try:
+            return getattr(self, nom)
+        except AttributeError:
+            raise KeyError(nom)
+
+
+def _en_rgb(image, format_pil):
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        if format_pil == "JPEG":
+            # Pas de transparence en JPEG : fond blanc
+            fond = Image.new("RGB", image.size, "white")
+            fond.paste(image, mask=image.getchannel("A"))
+            return fond
+        return image
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def generer_miniatures(nom, stockage=None, force=False):
+    """
+    Crée les miniatures manquantes de l'image ``nom`` ; renvoie le nombre de
+    fichiers écrits. L'original n'est décodé qu'une fois (à échelle réduite
+    pour un JPEG) puis réduit en cascade, de la plus grande taille à la plus
+    petite.
+    """
+    stockage = stockage or default_storage
+    a_faire = [
+        taille for taille in sorted(TAILLES.values(), reverse=True)
+        if force or not all(stockage.exists(chemin_miniature(nom, taille, ext)) for ext in FORMATS)
+    ]
+    if not a_faire:
+        return 0
+
+    ecrits = 0
+    with stockage.open(nom, "rb") as fichier, Image.open(fichier) as original:
+        # JPEG : décodage directement à une échelle proche de la plus grande taille
+        original.draft("RGB", (a_faire[0], a_faire[0]))
+        image = ImageOps.exif_transpose(original)
+        for taille in a_faire:
+            image.thumbnail((taille, taille), Image.LANCZOS)
+            for extension, (format_pil, options) in FORMATS.items():
+                tampon = BytesIO()
+                _en_rgb(image, format_pil).save(tampon, format_pil, **options)
+                chemin = chemin_miniature(nom, taille, extension)
+                if stockage.exists(chemin):
+                    stockage.delete(chemin)
+                stockage.save(chemin, ContentFile(tampon.getvalue()))
+                ecrits += 1
+    return ecrits
+
+
+def assurer_miniatures(nom, force=False):
+    """``generer_miniatures`` sans lever d'exception (image corrompue, absente…)."""
+    try:
+        return generer_miniatures(nom, force=force)
+    except Exception:
+        logger.exception("Miniatures impossibles pour %s", nom)
+        return None
@@ -1,8 +1,12 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 import uuid
-from backend.users.models import Commissariat
+from backend.users.models import Commissariat, Localisable
+from .miniatures import Miniatures
 
 # =========================#
 # ⚙ ENUMS
@@ -20,10 +24,47 @@ class StatutRestitution(models.TextChoices):
     EFFECTUEE = "effectuee", "Effectuée"
 
 
+# =========================#
+# 🕓 HORODATAGE
+# =========================
+class HorodateQuerySet(models.QuerySet):
+    def changed_since(self, ts, pk=None):
+        """
+        Lignes créées ou modifiées après ``ts`` (toutes si None), des plus
+        anciennes aux plus récentes. Avec ``pk``, curseur (ts, pk) : les lignes
+        modifiées à ``ts`` même et de clé supérieure suivent aussi.
+        """
+        queryset = self
+        if ts is not None:
+            apres = models.Q(updated_at__gt=ts)
+            if pk is not None:
+                apres |= models.Q(updated_at=ts, pk__gt=pk)
+            queryset = queryset.filter(apres)
+        return queryset.order_by('updated_at', 'pk')
+
+
+class Horodate(models.Model):
+    """Dates de création et de dernière modification, indexées (synchronisation, caches, exports)."""
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = HorodateQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # auto_now n'écrit updated_at que s'il fait partie des champs enregistrés
+        update_fields = kwargs.get("update_fields")
+        if update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"updated_at"}
+        super().save(*args, **kwargs)
+
+
 # =========================#
 # 🎒 OBJET
 # =========================
-class Objet(models.Model):
+class Objet(Horodate):
     nom = models.CharField(max_length=100, verbose_name="Nom de l'objet")
     description = models.TextField(blank=True, null=True)
     etat = models.CharField(
@@ -34,12 +75,22 @@ class Objet(models.Model):
     image = models.ImageField(upload_to='objets/', blank=True, null=True)
     code_unique = models.CharField(max_length=50, unique=True, blank=True, null=True)
 
+    # Index plein texte (nom + description), maintenu par signals.py
+    search_vector = SearchVectorField(null=True, editable=False)
+    # dHash 64 bits de la photo, calculé par signals.py (voir empreintes_visuelles.py)
+    empreinte_visuelle = models.BigIntegerField(null=True, blank=True, editable=False, db_index=True)
+
     def save(self, *args, **kwargs):
         if not self.code_unique:
             # Génère un identifiant unique court
             self.code_unique = str(uuid.uuid4())[:8].upper()
         super().save(*args, **kwargs)
 
+    @property
+    def miniatures(self):
+        """Miniatures de la photo : ``objet.miniatures.moyenne.webp`` (voir miniatures.py)."""
+        return Miniatures(self.image)
+
     def __str__(self):
         return f"{self.nom} ({self.get_etat_display()})"
 
@@ -47,7 +98,7 @@ class Objet(models.Model):
 # =========================
 # 📄 DECLARATION
 # =========================
-class Declaration(models.Model):
+class Declaration(Horodate, Localisable):
     TYPE_CHOICES = [
         ('perdu', 'Objet perdu'),
         ('trouve', 'Objet trouvé'),
@@ -89,14 +140,95 @@ class Declaration(models.Model):
     etat_initial = models.CharField(max_length=20, choices=EtatObjet.choices)
     type_declaration = models.CharField(max_length=10, choices=TYPE_CHOICES)
 
+    # Index plein texte (description + lieu), maintenu par signals.py
+    search_vector = SearchVectorField(null=True, editable=False)
+    # dHash 64 bits de la photo, calculé par signals.py (voir empreintes_visuelles.py)
+    empreinte_visuelle = models.BigIntegerField(null=True, blank=True, editable=False, db_index=True)
+    # Candidats perdus/trouvés à (re)calculer par le worker (voir correspondances.py)
+    a_apparier = models.BooleanField(default=True, editable=False)
+    # Tailles de reclame_par / trouve_par, maintenues par signals.py
+    nb_reclamants = models.PositiveIntegerField(default=0, editable=False)
+    nb_trouveurs = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # File d'attente du rapprochement perdu/trouvé
+            models.Index(fields=['id'], name='decl_a_apparier_idx', condition=models.Q(a_apparier=True)),
+            # Pagination par clé (date_declaration, id)
+            models.Index(fields=['-date_declaration', '-id'], name='decl_date_id_idx'),
+            models.Index(fields=['etat_initial', '-date_declaration', '-id'], name='decl_etat_date_id_idx'),
+            # Déclaration initiale d'un objet (requetes.declarations_initiales)
+            models.Index(fields=['objet', 'date_declaration', 'id'], name='decl_objet_date_id_idx'),
+            # Déclarations réclamées / trouvées par d'autres citoyens
+            models.Index(
+                fields=['etat_initial', '-date_declaration', '-id'], name='decl_reclamee_idx',
+                condition=models.Q(nb_reclamants__gt=0),
+            ),
+            models.Index(
+                fields=['etat_initial', '-date_declaration', '-id'], name='decl_trouvee_par_idx',
+                condition=models.Q(nb_trouveurs__gt=0),
+            ),
+            # Dernière modification d'une liste (frontend/conditionnel.py)
+            models.Index(fields=['etat_initial', 'updated_at'], name='decl_etat_maj_idx'),
+        ]
+
+    @property
+    def miniatures(self):
+        """Miniatures de la photo : ``declaration.miniatures.moyenne.webp`` (voir miniatures.py)."""
+        return Miniatures(self.image)
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        # Les compteurs ne sont modifiés que par signals.py (F() atomiques) :
+        # un enregistrement ne doit pas réécrire une valeur lue plus tôt.
+        compteurs = self.nb_reclamants, self.nb_trouveurs
+        self.nb_reclamants, self.nb_trouveurs = F('nb_reclamants'), F('nb_trouveurs')
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self.nb_reclamants, self.nb_trouveurs = compteurs
+
     def __str__(self):
         return f"{self.objet.nom if self.objet else 'Objet inconnu'} ({self.get_type_declaration_display()})"
 
 
+# =========================
+# 🔗 CORRESPONDANCE CANDIDATE
+# =========================
+class CorrespondanceCandidate(models.Model):
+    """
+    Couple (déclaration perdue, déclaration trouvée) proposé par le moteur de
+    rapprochement (voir correspondances.py), avec le détail de son score.
+    """
+    perdue = models.ForeignKey(Declaration, on_delete=models.CASCADE, related_name="candidats_trouves")
+    trouvee = models.ForeignKey(Declaration, on_delete=models.CASCADE, related_name="candidats_perdus")
+    score = models.FloatField()
+    score_texte = models.FloatField(default=0)
+    score_lieu = models.FloatField(default=0)
+    score_date = models.FloatField(default=0)
+    date_calcul = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Correspondance candidate"
+        verbose_name_plural = "Correspondances candidates"
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(fields=['perdue', 'trouvee'], name='correspondance_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['perdue', '-score'], name='corresp_perdue_score_idx'),
+            models.Index(fields=['trouvee', '-score'], name='corresp_trouvee_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.perdue} ↔ {self.trouvee} ({self.score:.2f})"
+
+
 # =========================
 # 🔁 RESTITUTION
 # =========================
-class Restitution(models.Model):
+class Restitution(Horodate):
     objet = models.ForeignKey(
         Objet,
         on_delete=models.CASCADE,
@@ -138,10 +270,28 @@ class Restitution(models.Model):
         default=StatutRestitution.PLANIFIEE
     )
 
+    # Preuve PDF, générée une fois en arrière-plan (voir objets/preuves.py)
+    preuve_pdf = models.FileField(upload_to="preuves/", blank=True, editable=False)
+    preuve_empreinte = models.CharField(max_length=64, blank=True, editable=False)
+    preuve_a_notifier = models.BooleanField(default=False, editable=False)
+
     class Meta:
         verbose_name = "Restitution"
         verbose_name_plural = "Restitutions"
         ordering = ['-date_restitution', '-heure_restitution']
+        indexes = [
+            # Pagination par clé (date_restitution, heure_restitution, id)
+            models.Index(
+                fields=['-date_restitution', '-heure_restitution', '-id'],
+                name='restit_date_heure_id_idx'
+            ),
+            # File d'attente des preuves à générer
+            models.Index(
+                fields=['id'],
+                name='restit_preuve_a_generer_idx',
+                condition=models.Q(statut='effectuee', preuve_empreinte=''),
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
@@ -152,3 +302,93 @@ class Restitution(models.Model):
 
     def __str__(self):
         return f"Restitution de {self.objet.nom if self.objet else 'Objet'}"
+
+
+
+# =========================
+# 🪦 SUPPRESSION
+# =========================
+class Suppression(models.Model):
+    """
+    Trace de la suppression d'un objet, d'une déclaration ou d'une
+    restitution, pour le flux des modifications (voir flux.py). Enregistrée
+    par signals.py, purgée par ``manage.py purger_suppressions``.
+    """
+    modele = models.CharField(max_length=20)
+    identifiant = models.BigIntegerField()
+    date = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "Suppression"
+        verbose_name_plural = "Suppressions"
+
+    def __str__(self):
+        return f"{self.modele} {self.identifiant} supprimé le {self.date:%d/%m/%Y}"
+
+
+# =========================
+# 📊 STATISTIQUE MENSUELLE
+# =========================
+class StatistiqueMensuelle(models.Model):
+    """
+    Agrégat des déclarations par mois × commissariat × état initial × état
+    actuel de l'objet. Tenu à jour par signals.py (incréments F() par case)
+    et reconstruit par ``manage.py reconstruire_statistiques``.
+    """
+    mois = models.DateField()
+    commissariat = models.ForeignKey(
+        Commissariat,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True
+    )
+    etat_initial = models.CharField(max_length=20, choices=EtatObjet.choices)
+    etat_objet = models.CharField(max_length=20, choices=EtatObjet.choices, null=True, blank=True)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Statistique mensuelle"
+        verbose_name_plural = "Statistiques mensuelles"
+        ordering = ['mois']
+        constraints = [
+            # Une ligne par case : les incréments concurrents portent sur la même
+            # (NULL ramené à une valeur pour que deux cases « sans commissariat » se confondent)
+            models.UniqueConstraint(
+                'mois',
+                Coalesce('commissariat', Value(0), output_field=models.BigIntegerField()),
+                'etat_initial',
+                Coalesce('etat_objet', Value('')),
+                name='stat_case_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['mois', 'commissariat'], name='stat_mois_commissariat_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.mois:%m/%Y} – {self.etat_initial}/{self.etat_objet} : {self.total}"
+
+
+
+# =========================
+# 📸 INSTANTANÉ QUOTIDIEN
+# =========================
+class InstantaneQuotidien(models.Model):
+    """
+    Compteurs globaux relevés une fois par jour
+    (``manage.py capturer_statistiques``, lancé par cron).
+    """
+    jour = models.DateField(unique=True)
+    nb_objets = models.PositiveIntegerField(default=0)
+    nb_restitutions = models.PositiveIntegerField(default=0)
+    nb_citoyens = models.PositiveIntegerField(default=0)
+    nb_admins = models.PositiveIntegerField(default=0)
+    nb_policiers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Instantané quotidien"
+        verbose_name_plural = "Instantanés quotidiens"
+        ordering = ['jour']
+
+    def __str__(self):
+        return f"Instantané du {self.jour:%d/%m/%Y}"
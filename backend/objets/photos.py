@@ -0,0 +1,192 @@
+"""
+Normalisation des photos téléversées.
+
+Une photo envoyée par ``DeclarationForm`` n'est plus enregistrée telle
+quelle : elle est décodée une seule fois (à échelle réduite pour un JPEG),
+redressée selon son orientation EXIF, ramenée à ``PHOTOS_DIMENSION_MAX``
+pixels sur son plus grand côté, convertie en sRGB puis ré-encodée sans
+aucune métadonnée (EXIF, GPS, profil ICC, commentaires).
+
+Le fichier obtenu est nommé d'après l'empreinte SHA-256 de son contenu
+(``declarations/<empreinte>.jpg``) : un même cliché envoyé plusieurs fois,
+ou partagé par l'objet et sa déclaration, n'occupe qu'un seul fichier.
+Les copies déjà présentes (``14_9qriWcH.jpg``…) sont fusionnées par la
+commande ``dedoublonner_photos``.
+"""
+import hashlib
+import io
+import logging
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import Now
+from PIL import Image, ImageOps
+
+from .miniatures import FORMATS, TAILLES, chemin_miniature
+
+logger = logging.getLogger(__name__)
+
+DOSSIER = "declarations"
+DIMENSION_MAX = 2048
+PIXELS_MAX = 50_000_000             # ~ 7000 × 7000 : au-delà, refus avant décodage
+TAILLE_MAX = 15 * 1024 * 1024       # octets
+QUALITE_JPEG = 85
+
+
+def _reglage(nom, defaut):
+    return getattr(settings, nom, defaut)
+
+
+class PhotoNormalisee(ContentFile):
+    """Photo ré-encodée, prête à être enregistrée ; ``empreinte`` = SHA-256 du contenu."""
+
+    def __init__(self, contenu, extension):
+        self.empreinte = hashlib.sha256(contenu).hexdigest()
+        super().__init__(contenu, name=f"{self.empreinte[:32]}.{extension}")
+
+
+def _en_srgb(image):
+    profil = image.info.get("icc_profile")
+    if not profil:
+        return image
+    try:
+        from PIL import ImageCms
+
+        source = ImageCms.ImageCmsProfile(io.BytesIO(profil))
+        mode = "RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB"
+        return ImageCms.profileToProfile(image, source, ImageCms.createProfile("sRGB"), outputMode=mode)
+    except Exception:
+        # Profil illisible ou LittleCMS absent : couleurs laissées telles quelles
+        return image
+
+
+def normaliser(fichier, dimension_max=None):
+    """
+    Redresse, réduit et ré-encode ``fichier`` (lu en flux, décodé une fois).
+    Renvoie une ``PhotoNormalisee`` ; lève ``ValueError`` si l'image est
+    trop grande ou illisible.
+    """
+    dimension = dimension_max or _reglage("PHOTOS_DIMENSION_MAX", DIMENSION_MAX)
+    fichier.seek(0)
+    with Image.open(fichier) as original:
+        # Seul l'en-tête est lu à ce stade : on refuse les « bombes » avant décodage
+        largeur, hauteur = original.size
+        if largeur * hauteur > _reglage("PHOTOS_PIXELS_MAX", PIXELS_MAX):
+            raise ValueError(f"Image trop grande ({largeur} × {hauteur} px)")
+        # JPEG : décodage directement à une échelle proche de la taille finale
+        original.draft("RGB", (dimension, dimension))
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail((dimension, dimension), Image.LANCZOS)
+        image = _en_srgb(image)
+
+    tampon = io.BytesIO()
+    transparente = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if transparente:
+        image.convert("RGBA").save(tampon, "PNG", optimize=True)
+        extension = "png"
+    else:
+        image.convert("RGB").save(
+            tampon, "JPEG", quality=_reglage("PHOTOS_QUALITE_JPEG", QUALITE_JPEG),
+            optimize=True, progressive=True,
+        )
+        extension = "jpg"
+    # Aucun exif= / icc_profile= / pnginfo= transmis : le fichier ne garde aucune métadonnée
+    return PhotoNormalisee(tampon.getvalue(), extension)
+
+
+def enregistrer_photo(photo, dossier=DOSSIER, stockage=None):
+    """
+    Enregistre ``photo`` sous son nom d'empreinte et renvoie ce nom ; si un
+    fichier identique existe déjà, il est réutilisé.
+    """
+    stockage = stockage or default_storage
+    nom = f"{dossier}/{photo.name}"
+    if stockage.exists(nom):
+        return nom
+    enregistre = stockage.save(nom, photo)
+    if enregistre != nom:
+        # Envoi simultané du même cliché : l'autre copie fait foi
+        stockage.delete(enregistre)
+    return nom
+
+
+class ChampPhoto(forms.ImageField):
+    """``ImageField`` dont la valeur nettoyée est la photo déjà normalisée."""
+
+    default_error_messages = {
+        "trop_lourde": "La photo ne doit pas dépasser %(max)s Mo.",
+    }
+
+    def to_python(self, data):
+        # FileField.to_python seulement : la vérification d'ImageField ouvrirait
+        # l'image une seconde fois, la normalisation tient lieu de validation.
+        fichier = forms.FileField.to_python(self, data)
+        if fichier is None:
+            return None
+        taille_max = _reglage("PHOTOS_TAILLE_MAX", TAILLE_MAX)
+        if fichier.size and fichier.size > taille_max:
+            raise ValidationError(
+                self.error_messages["trop_lourde"], code="trop_lourde",
+                params={"max": taille_max // (1024 * 1024)},
+            )
+        try:
+            return normaliser(fichier)
+        except Exception as e:
+            logger.info("Photo refusée (%s) : %s", getattr(fichier, "name", ""), e)
+            raise ValidationError(self.error_messages["invalid_image"], code="invalid_image") from e
+
+
+# =========================
+# 🧹 DOUBLONS EXISTANTS
+# =========================
+def _empreinte_fichier(nom, stockage):
+    empreinte = hashlib.sha256()
+    with stockage.open(nom, "rb") as fichier:
+        for morceau in fichier.chunks():
+            empreinte.update(morceau)
+    return empreinte.hexdigest()
+
+
+def dedoublonner_photos(supprimer=False, stockage=None):
+    """
+    Regroupe les photos déjà enregistrées par contenu et fait pointer objets
+    et déclarations vers une seule copie (le nom le plus court). Avec
+    ``supprimer``, les copies devenues inutiles et leurs miniatures sont
+    effacées. Renvoie ``(copies remplacées, octets libérés)``.
+    """
+    from .models import Declaration, Objet
+
+    stockage = stockage or default_storage
+    noms = set()
+    for modele in (Objet, Declaration):
+        noms.update(modele.objects.exclude(image="").exclude(image__isnull=True).values_list("image", flat=True))
+
+    groupes = {}
+    for nom in sorted(noms):
+        if stockage.exists(nom):
+            groupes.setdefault(_empreinte_fichier(nom, stockage), []).append(nom)
+
+    remplacements = {}
+    for copies in groupes.values():
+        canonique = min(copies, key=lambda nom: (len(nom), nom))
+        remplacements.update({nom: canonique for nom in copies if nom != canonique})
+
+    # update() : aucun signal, les miniatures de la copie gardée existent déjà
+    with transaction.atomic():
+        for ancien, nouveau in remplacements.items():
+            for modele in (Objet, Declaration):
+                modele.objects.filter(image=ancien).update(image=nouveau, updated_at=Now())
+
+    liberes = 0
+    if supprimer:
+        for ancien in remplacements:
+            liberes += stockage.size(ancien)
+            stockage.delete(ancien)
+            for taille in TAILLES.values():
+                for extension in FORMATS:
+                    stockage.delete(chemin_miniature(ancien, taille, extension))
+    return len(remplacements), liberes
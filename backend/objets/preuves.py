@@ -0,0 +1,292 @@
+"""
+Preuves de restitution (PDF).
+
+Le PDF d'une restitution effectuée est rendu une seule fois, en arrière-plan
+(commande ``generer_preuves``), puis enregistré dans ``MEDIA_ROOT/preuves/``
+sous un nom contenant l'empreinte SHA-256 de son contenu. Les
+téléchargements suivants servent ce fichier sans nouveau rendu.
+
+Les images du gabarit (``/static/``, ``/media/``) sont lues directement sur
+le disque au lieu d'être récupérées en HTTP auprès du site lui-même. La
+feuille de style et la configuration des polices sont analysées une fois
+par thread et réutilisées, de même que les images déjà décodées et les QR
+codes (``lru_cache`` par restitution).
+"""
+import base64
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import qrcode
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.functions import Now
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from backend.users.courriels import envoyer_plus_tard
+from .models import EtatObjet, Restitution, StatutRestitution
+
+logger = logging.getLogger(__name__)
+
+GABARIT = "frontend/policier/preuve_restitution_pdf.html"
+FEUILLE_DE_STYLE = "frontend/css/preuve_restitution.css"
+DOSSIER = "preuves"
+URL_BASE = "http://localhost/"
+QR_CACHE_TAILLE = 1024
+IMAGES_CACHE_TAILLE = 64
+
+
+# =========================
+# 🧾 RENDU
+# =========================
+@lru_cache(maxsize=QR_CACHE_TAILLE)
+def qr_code(restitution_id):
+    """QR code (PNG en base64) pointant vers la vérification de la restitution."""
+    qr_data = f"http://ton-site.com/verifier-restitution/{restitution_id}/"
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=5, border=2)
+    qr.add_data(qr_data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode()
+
+
+def contexte_preuve(restitution, qr=qr_code):
+    # 🔹 Déclaration de l'objet trouvé (pour le trouveur)
+    declaration_trouve = restitution.objet.declarations.filter(
+        etat_initial=EtatObjet.TROUVE
+    ).first()
+    trouveur_principal = declaration_trouve.trouve_par.first() if declaration_trouve else None
+
+    # 🔹 Déclaration de l'objet perdu (pour le réclamant)
+    declaration_perdu = restitution.objet.declarations.filter(
+        etat_initial=EtatObjet.PERDU
+    ).first()
+    reclamant_principal = declaration_perdu.reclame_par.first() if declaration_perdu else None
+
+    return {
+        'restitution': restitution,
+        'reclamant_principal': reclamant_principal,
+        'trouveur_principal': trouveur_principal,
+        # 🔹 Policier ayant planifié
+        'policier_planificateur': restitution.restitue_par or restitution.policier,
+        'now': timezone.now(),
+        'qr_code': qr(restitution.id),
+    }
+
+
+def chemin_local(url):
+    """Fichier local correspondant à une URL ``/static/…`` ou ``/media/…`` (ou None)."""
+    chemin = unquote(urlsplit(url).path)
+    if chemin.startswith(settings.STATIC_URL):
+        return finders.find(chemin[len(settings.STATIC_URL):])
+    if settings.MEDIA_URL and chemin.startswith(settings.MEDIA_URL):
+        nom = chemin[len(settings.MEDIA_URL):]
+        if default_storage.exists(nom):
+            return default_storage.path(nom)
+    return None
+
+
+def _url_locale(url):
+    chemin = chemin_local(url)
+    return Path(chemin).resolve().as_uri() if chemin else url
+
+
+def recuperateur_local():
+    """``url_fetcher`` WeasyPrint : fichiers statiques et médias lus sur le disque."""
+    import weasyprint
+
+    if hasattr(weasyprint, "URLFetcher"):
+        # WeasyPrint >= 68 : le récupérateur est une classe
+        class RecuperateurLocal(weasyprint.URLFetcher):
+            def fetch(self, url, headers=None):
+                return super().fetch(_url_locale(url), headers)
+
+        return RecuperateurLocal()
+
+    def recuperer(url):
+        return weasyprint.default_url_fetcher(_url_locale(url))
+    return recuperer
+
+
+class _ConfigurationPDF(threading.local):
+    """Polices, feuille de style analysée et images décodées, par thread."""
+    polices = None
+    feuille = None
+    images = None
+
+
+_configuration = _ConfigurationPDF()
+
+
+def configuration_pdf(partagee=True):
+    """
+    ``(font_config, feuille de style, cache d'images)`` pour un rendu.
+    Avec ``partagee=False``, tout est reconstruit (mesure de référence).
+    """
+    from weasyprint import CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    config = _configuration if partagee else _ConfigurationPDF()
+    if config.feuille is None:
+        config.polices = FontConfiguration()
+        config.feuille = CSS(
+            filename=finders.find(FEUILLE_DE_STYLE),
+            font_config=config.polices,
+            url_fetcher=recuperateur_local(),
+        )
+        config.images = {}
+    elif len(config.images) > IMAGES_CACHE_TAILLE:
+        # Photos d'objets toutes différentes : on borne le cache
+        config.images.clear()
+    return config.polices, config.feuille, config.images
+
+
+def rendre_pdf(restitution, partage=True):
+    """
+    Rend le PDF de preuve (octets). Coûteux : à réserver au worker.
+    ``partage=False`` désactive toutes les réutilisations (benchmark).
+    """
+    # WeasyPrint est long à charger : importé seulement au premier rendu
+    from weasyprint import HTML
+
+    polices, feuille, images = configuration_pdf(partage)
+    contexte = contexte_preuve(restitution, qr=qr_code if partage else qr_code.__wrapped__)
+    return HTML(
+        string=render_to_string(GABARIT, contexte),
+        base_url=getattr(settings, "PREUVES_URL_BASE", URL_BASE),
+        url_fetcher=recuperateur_local(),
+    ).write_pdf(font_config=polices, stylesheets=[feuille], cache=images)
+
+
+# =========================
+# 💾 STOCKAGE
+# =========================
+def nom_fichier(restitution_id, empreinte):
+    return f"{DOSSIER}/restitution_{restitution_id}_{empreinte[:16]}.pdf"
+
+
+def preuve_disponible(restitution):
+    return bool(restitution.preuve_empreinte and restitution.preuve_pdf
+                and default_storage.exists(restitution.preuve_pdf.name))
+
+
+def enregistrer_preuve(restitution, contenu):
+    """Enregistre ``contenu`` comme preuve de ``restitution`` (nom = empreinte)."""
+    empreinte = hashlib.sha256(contenu).hexdigest()
+    nom = nom_fichier(restitution.id, empreinte)
+    if not default_storage.exists(nom):
+        nom = default_storage.save(nom, ContentFile(contenu))
+
+    ancien = restitution.preuve_pdf.name if restitution.preuve_pdf else ""
+    # update() : pas de save(), donc ni signaux ni mise à jour de l'objet
+    Restitution.objects.filter(pk=restitution.pk).update(preuve_pdf=nom, preuve_empreinte=empreinte, updated_at=Now())
+    restitution.preuve_pdf.name = nom
+    restitution.preuve_empreinte = empreinte
+    if ancien and ancien != nom:
+        transaction.on_commit(lambda: default_storage.delete(ancien))
+    return nom
+
+
+# =========================
+# 📧 NOTIFICATION
+# =========================
+def destinataires_preuve(restitution):
+    destinataires = set()
+    if restitution.citoyen and restitution.citoyen.email:
+        destinataires.add(restitution.citoyen.email)
+    for declaration in restitution.objet.declarations.all():
+        for user in declaration.trouve_par.all():
+            if user.email:
+                destinataires.add(user.email)
+    return destinataires
+
+
+def notifier_preuve(restitution, contenu):
+    """Met en file le mail de restitution effectuée, preuve en pièce jointe."""
+    envoyer_plus_tard(
+        sujet=f"Restitution de l'objet '{restitution.objet.nom}' effectuée ✅",
+        message=f"Bonjour,\n\nLa restitution de l'objet '{restitution.objet.nom}' a été effectuée avec succès.\nVeuillez trouver la preuve en pièce jointe.",
+        destinataires=destinataires_preuve(restitution),
+        piece_jointe=contenu,
+        nom_piece_jointe=f"preuve_{restitution.objet.nom}.pdf",
+        type_piece_jointe="application/pdf",
+    )
+    Restitution.objects.filter(pk=restitution.pk).update(preuve_a_notifier=False)
+    restitution.preuve_a_notifier = False
+
+
+# =========================
+# ⚙️ GÉNÉRATION
+# =========================
+def a_generer():
+    """Restitutions effectuées dont la preuve n'a pas encore été générée."""
+    return Restitution.objects.filter(statut=StatutRestitution.EFFECTUEE, preuve_empreinte="")
+
+
+def generer_preuve(restitution, rendu=rendre_pdf):
+    """Rend, enregistre et (si demandé) envoie la preuve d'une restitution."""
+    contenu = rendu(restitution)
+    with transaction.atomic():
+        enregistrer_preuve(restitution, contenu)
+        if restitution.preuve_a_notifier:
+            notifier_preuve(restitution, contenu)
+    return contenu
+
+
+def generer_preuve_manquante(restitution_id, rendu=rendre_pdf, attendre=False):
+    """
+    Génère la preuve de ``restitution_id`` si elle manque, sous le verrou de
+    ligne du worker : une preuve n'est jamais rendue ni notifiée deux fois.
+    Renvoie la restitution (preuve disponible), ou None si un autre
+    processus la génère en ce moment (sauf avec ``attendre``).
+    """
+    with transaction.atomic():
+        restitution = (
+            Restitution.objects.filter(pk=restitution_id)
+            .select_for_update(skip_locked=not attendre, of=("self",))
+            .select_related("objet", "citoyen", "policier", "restitue_par", "commissariat")
+            .first()
+        )
+        if restitution is not None and not preuve_disponible(restitution):
+            generer_preuve(restitution, rendu)
+    return restitution
+
+
+def generer_preuves_en_attente(limite=None, rendu=rendre_pdf):
+    """
+    Génère les preuves en attente, une restitution par transaction.
+    Les lignes sont verrouillées (``SKIP LOCKED``) pour permettre plusieurs
+    workers. Renvoie ``(générées, en_erreur)``.
+    """
+    generees, echecs = 0, set()
+    while limite is None or generees + len(echecs) < limite:
+        with transaction.atomic():
+            restitution = (
+                a_generer()
+                .exclude(pk__in=echecs)
+                .select_for_update(skip_locked=True, of=("self",))
+                .select_related("objet", "citoyen", "policier", "restitue_par", "commissariat")
+                .order_by("id")
+                .first()
+            )
+            if restitution is None:
+                break
+            try:
+                with transaction.atomic():
+                    generer_preuve(restitution, rendu)
+            except Exception:
+                logger.exception("Erreur génération PDF pour restitution %s", restitution.id)
+                echecs.add(restitution.id)
+            else:
+                generees += 1
+    return generees, len(echecs)
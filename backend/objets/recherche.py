@@ -0,0 +1,146 @@
+"""
+Service de recherche partagé par les listes de déclarations.
+
+Deux backends :
+- ``postgres`` : index plein texte (SearchVectorField + index GIN, configuration
+  « french »), résultats classés par SearchRank, avec repli trigramme sur le
+  nom de l'objet pour tolérer les fautes de frappe ;
+- ``local`` : recherche terme à terme (icontains) classée par un score pondéré,
+  utilisée sous SQLite et dans les tests.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+)
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Coalesce
+
+CONFIG_RECHERCHE = "french"
+SEUIL_TRIGRAMME = 0.3
+
+# Champs indexés et leur poids (A > B > C)
+CHAMPS_OBJET = (("nom", "A"), ("description", "B"))
+CHAMPS_DECLARATION = (("description", "B"), ("lieu", "C"))
+
+# Poids par défaut de ts_rank, réutilisés par le backend local
+POIDS = {"A": 1.0, "B": 0.4, "C": 0.2, "D": 0.1}
+
+
+def construire_vecteur(champs):
+    vecteur = None
+    for champ, poids in champs:
+        partie = SearchVector(champ, weight=poids, config=CONFIG_RECHERCHE)
+        vecteur = partie if vecteur is None else vecteur + partie
+    return vecteur
+
+
+# =========================
+# 🗂 BACKEND LOCAL
+# =========================
+class BackendLocal:
+    """Recherche sans index, portable (SQLite, tests)."""
+
+    nom = "local"
+
+    def indexer(self, instance):
+        # Rien à maintenir : la recherche lit directement les colonnes
+        pass
+
+    def rechercher_declarations(self, declarations, requete, avec_citoyen=False):
+        termes = requete.split()
+        if not termes:
+            return declarations
+
+        champs = [("objet__" + champ, poids) for champ, poids in CHAMPS_OBJET]
+        champs += list(CHAMPS_DECLARATION)
+
+        rang = Value(0.0, output_field=FloatField())
+        for terme in termes:
+            # Chaque terme doit apparaître dans au moins un champ
+            filtre = Q()
+            for champ, poids in champs:
+                condition = Q(**{f"{champ}__icontains": terme})
+                filtre |= condition
+                rang = rang + Case(
+                    When(condition, then=Value(POIDS[poids])),
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                )
+            if avec_citoyen:
+                filtre |= Q(citoyen__username__icontains=terme)
+            declarations = declarations.filter(filtre)
+
+        return declarations.annotate(rang=rang).order_by("-rang", "-date_declaration", "-id")
+
+
+# =========================
+# 🐘 BACKEND POSTGRES
+# =========================
+class BackendPostgres(BackendLocal):
+    """Recherche plein texte sur les colonnes ``search_vector`` (index GIN)."""
+
+    nom = "postgres"
+
+    def indexer(self, instance):
+        from .models import Declaration, Objet
+
+        if isinstance(instance, Objet):
+            champs = CHAMPS_OBJET
+        elif isinstance(instance, Declaration):
+            champs = CHAMPS_DECLARATION
+        else:
+            return
+        type(instance).objects.filter(pk=instance.pk).update(
+            search_vector=construire_vecteur(champs)
+        )
+
+    def rechercher_declarations(self, declarations, requete, avec_citoyen=False):
+        requete = requete.strip()
+        if not requete:
+            return declarations
+
+        query = SearchQuery(requete, config=CONFIG_RECHERCHE, search_type="websearch")
+        filtre = Q(search_vector=query) | Q(objet__search_vector=query)
+        if avec_citoyen:
+            filtre |= Q(citoyen__username__icontains=requete)
+
+        resultats = declarations.annotate(
+            rang=Coalesce(SearchRank(F("search_vector"), query), 0.0)
+            + Coalesce(SearchRank(F("objet__search_vector"), query), 0.0)
+        ).filter(filtre)
+
+        # 🔹 Repli trigramme (fautes de frappe) si aucun résultat plein texte
+        if not resultats.exists():
+            resultats = declarations.filter(
+                objet__nom__trigram_word_similar=requete
+            ).annotate(
+                rang=TrigramWordSimilarity(requete, "objet__nom")
+            ).filter(rang__gte=SEUIL_TRIGRAMME)
+
+        return resultats.order_by("-rang", "-date_declaration", "-id")
+
+
+BACKENDS = {
+    BackendLocal.nom: BackendLocal,
+    BackendPostgres.nom: BackendPostgres,
+}
+
+
+def get_backend():
+    """Backend configuré par ``RECHERCHE_BACKEND``, sinon selon la base."""
+    nom = getattr(settings, "RECHERCHE_BACKEND", "")
+    if not nom:
+        nom = "postgres" if connection.vendor == "postgresql" else "local"
+    return BACKENDS[nom]()
+
+
+def rechercher_declarations(declarations, requete, avec_citoyen=False):
+    """
+    Filtre et classe ``declarations`` selon ``requete``.
+    Sans requête, le queryset est renvoyé tel quel.
+    """
+    requete = (requete or "").strip()
+    if not requete:
+        return declarations
+    return get_backend().rechercher_declarations(declarations, requete, avec_citoyen)
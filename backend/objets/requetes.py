@@ -0,0 +1,105 @@
+"""
+Requêtes groupées pour les listes : résolvent en un nombre constant de
+requêtes ce que les vues faisaient auparavant ligne par ligne.
+"""
+from django.db.models import OuterRef, Prefetch, Subquery
+
+from .models import Declaration, EtatObjet, Restitution
+
+
+def declarations_initiales():
+    """Déclarations les plus anciennes de chaque objet (une par objet)."""
+    premiere = (
+        Declaration.objects
+        .filter(objet=OuterRef('objet'))
+        .order_by('date_declaration', 'id')
+        .values('pk')[:1]
+    )
+    return Declaration.objects.filter(pk=Subquery(premiere))
+
+
+def avec_declaration_initiale(restitutions):
+    """
+    Précharge, pour chaque restitution, la déclaration initiale de l'objet
+    (``objet.declarations_initiales``) avec son déclarant et ses trouveurs.
+    """
+    return restitutions.prefetch_related(
+        Prefetch(
+            'objet__declarations',
+            queryset=declarations_initiales()
+            .select_related('citoyen')
+            .prefetch_related('trouve_par'),
+            to_attr='declarations_initiales',
+        )
+    )
+
+
+def resoudre_trouveurs(restitution):
+    """
+    Renseigne ``etat_initial`` et ``trouveurs`` à partir des données
+    préchargées par ``avec_declaration_initiale`` (aucune requête).
+    """
+    initiales = getattr(restitution.objet, 'declarations_initiales', []) if restitution.objet else []
+    if not initiales:
+        restitution.etat_initial = 'N/A'
+        restitution.trouveurs = []
+        return restitution
+
+    declaration = initiales[0]
+    restitution.etat_initial = declaration.etat_initial
+    if declaration.etat_initial == EtatObjet.TROUVE:
+        # Objet trouvé initialement : le déclarant est le trouveur
+        trouveurs = [declaration.citoyen] if declaration.citoyen else []
+    else:
+        # Sinon, tous ceux listés dans trouve_par
+        trouveurs = list(declaration.trouve_par.all())
+    restitution.trouveurs = list(dict.fromkeys(trouveurs))
+    return restitution
+
+
+def _premier(utilisateurs):
+    # Équivaut à .first() (tri par id), sur la liste préchargée
+    return min(utilisateurs, key=lambda u: u.pk, default=None)
+
+
+def resoudre_reclamations(declarations):
+    """
+    Renseigne ``reclamant_principal``, ``trouveur_principal``, ``proprietaire``
+    et ``restitution_planifiee`` sur des déclarations dont ``reclame_par`` et
+    ``trouve_par`` sont préchargés : une seule requête pour toute la liste.
+    """
+    for declaration in declarations:
+        declaration.reclamant_principal = _premier(declaration.reclame_par.all())
+        declaration.trouveur_principal = _premier(declaration.trouve_par.all())
+        # Objet perdu : le déclarant le récupère ; objet trouvé : le premier réclamant
+        if declaration.etat_initial == EtatObjet.PERDU:
+            declaration.proprietaire = declaration.citoyen
+        else:
+            declaration.proprietaire = declaration.reclamant_principal
+        declaration.restitution_planifiee = None
+
+    couples = {
+        (d.objet_id, d.proprietaire.pk) for d in declarations
+        if d.objet_id and d.proprietaire is not None
+    }
+    if not couples:
+        return declarations
+
+    restitutions = (
+        Restitution.objects
+        .filter(
+            restitue_par__isnull=True,
+            objet_id__in={objet for objet, _ in couples},
+            citoyen_id__in={citoyen for _, citoyen in couples},
+        )
+        .select_related('commissariat')
+        .order_by('id')
+    )
+    # La plus récente l'emporte ; les couples croisés non demandés sont ignorés
+    planifiees = {(r.objet_id, r.citoyen_id): r for r in restitutions}
+    for declaration in declarations:
+        if declaration.proprietaire is not None:
+            declaration.restitution_planifiee = planifiees.get(
+                (declaration.objet_id, declaration.proprietaire.pk)
+            )
+    return declarations
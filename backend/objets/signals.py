@@ -0,0 +1,216 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .empreintes_visuelles import calculer_empreinte
+from .miniatures import assurer_miniatures
+from .models import Declaration, Objet, Restitution, Suppression
+from .recherche import CHAMPS_DECLARATION, CHAMPS_OBJET, get_backend
+from .statistiques import ajouter, cases, deplacer, suppressions_en_cours
+
+
+# =========================
+# 🔎 INDEX DE RECHERCHE
+# =========================
+@receiver(post_save, sender=Objet)
+@receiver(post_save, sender=Declaration)
+def indexer_recherche(sender, instance, update_fields=None, **kwargs):
+    """Met à jour le vecteur de recherche après chaque enregistrement."""
+    champs = CHAMPS_OBJET if sender is Objet else CHAMPS_DECLARATION
+    if update_fields is not None and not {c for c, _ in champs} & set(update_fields):
+        return
+    get_backend().indexer(instance)
+
+
+# =========================
+# 📊 STATISTIQUES MENSUELLES
+# =========================
+def _declarations_des_objets(*objet_ids):
+    return Declaration.objects.filter(objet_id__in={i for i in objet_ids if i is not None})
+
+
+@receiver(pre_save, sender=Declaration)
+def memoriser_case_declaration(sender, instance, **kwargs):
+    instance._cases_avant = cases(Declaration.objects.filter(pk=instance.pk)) if instance.pk else {}
+
+
+@receiver(post_save, sender=Declaration)
+def statistiques_declaration_enregistree(sender, instance, created, **kwargs):
+    apres = cases(Declaration.objects.filter(pk=instance.pk))
+    avant = getattr(instance, "_cases_avant", {})
+    if created or not avant:
+        for case in apres.values():
+            ajouter(case, 1)
+    else:
+        deplacer(avant, apres)
+
+
+@receiver(pre_delete, sender=Declaration)
+def memoriser_case_supprimee(sender, instance, **kwargs):
+    # Lue avant toute suppression de la cascade (restitutions comprises)
+    instance._case = cases(Declaration.objects.filter(pk=instance.pk)).get(instance.pk)
+    suppressions_en_cours().add(instance.pk)
+
+
+@receiver(post_delete, sender=Declaration)
+def statistiques_declaration_supprimee(sender, instance, **kwargs):
+    suppressions_en_cours().discard(instance.pk)
+    if getattr(instance, "_case", None):
+        ajouter(instance._case, -1)
+
+
+@receiver(pre_save, sender=Objet)
+def memoriser_cases_objet(sender, instance, **kwargs):
+    instance._cases_avant = cases(_declarations_des_objets(instance.pk)) if instance.pk else {}
+
+
+@receiver(post_save, sender=Objet)
+def statistiques_objet_enregistre(sender, instance, created, update_fields=None, **kwargs):
+    # Un objet neuf n'a pas encore de déclaration ; seul son état compte.
+    # (La suppression d'un objet supprime ses déclarations en cascade :
+    # leur post_delete suffit.)
+    if created or (update_fields is not None and "etat" not in update_fields):
+        return
+    deplacer(getattr(instance, "_cases_avant", {}), cases(_declarations_des_objets(instance.pk)))
+
+
+@receiver(pre_save, sender=Restitution)
+@receiver(pre_delete, sender=Restitution)
+def memoriser_cases_restitution(sender, instance, **kwargs):
+    # Le commissariat des déclarations dépend de la restitution de l'objet
+    ancien_objet = (
+        Restitution.objects.filter(pk=instance.pk).values_list("objet_id", flat=True).first()
+        if instance.pk else None
+    )
+    instance._objets = {ancien_objet, instance.objet_id}
+    instance._cases_avant = cases(_declarations_des_objets(*instance._objets))
+
+
+@receiver(post_save, sender=Restitution)
+@receiver(post_delete, sender=Restitution)
+def statistiques_restitution(sender, instance, **kwargs):
+    deplacer(instance._cases_avant, cases(_declarations_des_objets(*instance._objets)))
+
+
+# =========================
+# 🖼️ MINIATURES
+# =========================
+@receiver(post_save, sender=Objet)
+@receiver(post_save, sender=Declaration)
+def miniatures_image(sender, instance, update_fields=None, **kwargs):
+    if not instance.image or (update_fields is not None and "image" not in update_fields):
+        return
+    nom = instance.image.name
+    # Après le commit : le fichier original est alors définitivement en place
+    transaction.on_commit(lambda: assurer_miniatures(nom))
+
+
+@receiver(post_save, sender=Objet)
+@receiver(post_save, sender=Declaration)
+def empreinte_visuelle_image(sender, instance, update_fields=None, **kwargs):
+    # Calculée une fois par photo : le formulaire la remet à None à chaque nouvel envoi
+    if not instance.image:
+        return
+    if instance.empreinte_visuelle is not None and (update_fields is None or "image" not in update_fields):
+        return
+    transaction.on_commit(lambda: calculer_empreinte(instance))
+
+
+# =========================
+# 🔗 RAPPROCHEMENT PERDU / TROUVÉ
+# =========================
+CHAMPS_APPARIEMENT_DECLARATION = {"description", "lieu", "date_declaration", "etat_initial", "objet"}
+CHAMPS_APPARIEMENT_OBJET = {"nom", "description"}
+
+
+@receiver(post_save, sender=Declaration)
+def apparier_declaration(sender, instance, created, update_fields=None, **kwargs):
+    # Une nouvelle déclaration est déjà marquée (a_apparier=True par défaut)
+    if created or (update_fields is not None and not CHAMPS_APPARIEMENT_DECLARATION & set(update_fields)):
+        return
+    Declaration.objects.filter(pk=instance.pk, a_apparier=False).update(a_apparier=True)
+
+
+@receiver(post_save, sender=Objet)
+def apparier_objet(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not CHAMPS_APPARIEMENT_OBJET & set(update_fields)):
+        return
+    Declaration.objects.filter(objet=instance, a_apparier=False).update(a_apparier=True)
+
+
+# =========================
+# 🔢 COMPTEURS RÉCLAMANTS / TROUVEURS
+# =========================
+COMPTEURS = {
+    Declaration.reclame_par.through: "nb_reclamants",
+    Declaration.trouve_par.through: "nb_trouveurs",
+}
+
+
+def _ajuster(champ, ids, delta):
+    """Ajoute ``delta`` au compteur ``champ`` des déclarations ``ids`` (une requête, sans signaux)."""
+    if ids:
+        # update() ignore auto_now : la liste affichée change, updated_at aussi
+        Declaration.objects.filter(pk__in=ids).update(**{champ: F(champ) + delta, "updated_at": Now()})
+
+
+@receiver(m2m_changed, sender=Declaration.reclame_par.through)
+@receiver(m2m_changed, sender=Declaration.trouve_par.through)
+def compter_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    champ = COMPTEURS[sender]
+    if action in ("pre_remove", "pre_clear"):
+        # remove() accepte des ids non liés : seuls les liens existants comptent
+        liens = sender.objects.filter(**{"utilisateur" if reverse else "declaration": instance})
+        if pk_set is not None:
+            liens = liens.filter(**{"declaration_id__in" if reverse else "utilisateur_id__in": pk_set})
+        instance._liens_retires = list(liens.values_list("declaration_id", flat=True))
+    elif action in ("post_remove", "post_clear"):
+        retires = getattr(instance, "_liens_retires", [])
+        if reverse:
+            _ajuster(champ, retires, -1)
+        elif retires:
+            _ajuster(champ, [instance.pk], -len(retires))
+            setattr(instance, champ, getattr(instance, champ) - len(retires))
+    elif action == "post_add" and pk_set:
+        # pk_set ne contient que les liens réellement créés
+        if reverse:
+            _ajuster(champ, pk_set, 1)
+        else:
+            _ajuster(champ, [instance.pk], len(pk_set))
+            setattr(instance, champ, getattr(instance, champ) + len(pk_set))
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def decompter_utilisateur_supprime(sender, instance, **kwargs):
+    # Les liens d'un utilisateur supprimé partent en cascade, sans m2m_changed
+    for through, champ in COMPTEURS.items():
+        ids = list(through.objects.filter(utilisateur=instance).values_list("declaration_id", flat=True))
+        _ajuster(champ, ids, -1)
+
+
+# =========================
+# 🪦 FLUX DES MODIFICATIONS
+# =========================
+MODELES_SUIVIS = {Objet: "objets", Declaration: "declarations", Restitution: "restitutions"}
+
+
+@receiver(post_delete, sender=Objet)
+@receiver(post_delete, sender=Declaration)
+@receiver(post_delete, sender=Restitution)
+def tracer_suppression(sender, instance, **kwargs):
+    # Dans la transaction de la suppression : annulée avec elle
+    Suppression.objects.create(modele=MODELES_SUIVIS[sender], identifiant=instance.pk)
+
+
+# =========================
+# 🧾 PREUVES PDF
+# =========================
+@receiver(post_delete, sender=Restitution)
+def supprimer_preuve(sender, instance, **kwargs):
+    nom = instance.preuve_pdf.name if instance.preuve_pdf else ""
+    if nom:
+        transaction.on_commit(lambda: default_storage.delete(nom))
@@ -0,0 +1,335 @@
+"""
+Statistiques des tableaux de bord (policier, administrateur).
+
+Les séries mensuelles et les compteurs des déclarations sont lus dans la
+table d'agrégats ``StatistiqueMensuelle`` (quelques dizaines de lignes) en
+une seule requête groupée, au lieu de parcourir tout l'historique.
+
+La table est maintenue par incréments : chaque déclaration compte pour 1
+dans sa case (mois, commissariat, état initial, état de l'objet). Une
+modification d'une déclaration, d'un objet ou d'une restitution relit la
+case des seules déclarations concernées avant et après, et déplace leur
+unité (``F("total") ± 1``, une ligne par case grâce à la contrainte
+d'unicité). ``reconstruire_statistiques`` recalcule tout.
+"""
+import datetime
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from dateutil.relativedelta import relativedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from backend.users.models import Utilisateur
+from .models import (
+    Declaration, EtatObjet, InstantaneQuotidien, Objet, Restitution, StatistiqueMensuelle
+)
+
+# Séries disponibles : nom -> condition sur les agrégats
+SERIES_DECLARATIONS = {
+    "perdus": Q(etat_initial=EtatObjet.PERDU),
+    "trouves": Q(etat_initial=EtatObjet.TROUVE),
+    "perdus_retrouves": Q(etat_initial=EtatObjet.PERDU, etat_objet=EtatObjet.RECLAME),
+    "trouves_reclames": Q(etat_initial=EtatObjet.TROUVE, etat_objet=EtatObjet.RECLAME),
+    "en_attente": Q(etat_objet=EtatObjet.EN_ATTENTE),
+    "restitues": Q(etat_objet=EtatObjet.RESTITUE),
+}
+
+
+def derniers_mois(nb_mois, reference=None):
+    """Premiers jours des ``nb_mois`` derniers mois, du plus ancien au courant."""
+    debut = (reference or timezone.localdate()).replace(day=1)
+    return [debut - relativedelta(months=i) for i in range(nb_mois - 1, -1, -1)]
+
+
+@dataclass(frozen=True)
+class StatistiquesDeclarations:
+    mois: list          # dates (1er du mois), ordre chronologique
+    series: dict        # nom -> [compte par mois], aligné sur ``mois``
+    totaux: dict        # nom -> compte sur tout l'historique
+
+    def labels(self, format="%b"):
+        return [m.strftime(format) for m in self.mois]
+
+    def serie(self, nom):
+        return self.series[nom]
+
+    def total(self, nom):
+        return self.totaux[nom]
+
+
+@dataclass(frozen=True)
+class StatistiquesGlobales:
+    nb_objets: int
+    nb_restitutions: int
+    nb_citoyens: int
+    nb_admins: int
+    nb_policiers: int
+
+
+@dataclass(frozen=True)
+class Evolution:
+    pas: str            # "jour", "semaine" ou "mois"
+    jours: list         # date de chaque point
+    objets: list
+    restitutions: list
+    citoyens: list
+    admins: list
+    policiers: list
+
+    def en_dict(self):
+        return {
+            "pas": self.pas,
+            "jours": [j.isoformat() for j in self.jours],
+            "objets": self.objets,
+            "restitutions": self.restitutions,
+            "citoyens": self.citoyens,
+            "admins": self.admins,
+            "policiers": self.policiers,
+        }
+
+
+class IndexMensuel:
+    """
+    Index ``{(mois, état): total}`` construit en un seul passage sur des
+    lignes agrégées (dicts ``values()``). Chaque série se lit ensuite par
+    accès direct : O(lignes + mois) au lieu de O(mois × lignes).
+    """
+
+    def __init__(self, lignes, champ_etat=None, champ_mois="mois", champ_total="total"):
+        self.totaux = defaultdict(int)
+        for ligne in lignes:
+            mois = ligne[champ_mois]
+            if mois is None:
+                continue
+            if isinstance(mois, datetime.datetime):
+                mois = timezone.localtime(mois) if timezone.is_aware(mois) else mois
+                mois = mois.date()
+            etat = ligne[champ_etat] if champ_etat else None
+            self.totaux[(mois.replace(day=1), etat)] += ligne[champ_total]
+
+    def serie(self, mois, etat=None):
+        return [self.totaux.get((m, etat), 0) for m in mois]
+
+
+def statistiques_declarations(nb_mois=6, commissariat=None, reference=None):
+    """
+    Séries mensuelles (``nb_mois`` derniers mois) et totaux de chaque série
+    de ``SERIES_DECLARATIONS``, en une requête sur ``StatistiqueMensuelle``.
+    """
+    agregats = StatistiqueMensuelle.objects.all()
+    if commissariat is not None:
+        agregats = agregats.filter(commissariat=commissariat)
+    lignes = (
+        agregats
+        .values("mois")
+        .annotate(**{
+            nom: Sum("total", filter=condition, default=0)
+            for nom, condition in SERIES_DECLARATIONS.items()
+        })
+        .order_by()
+    )
+
+    mois = derniers_mois(nb_mois, reference)
+    index_mois = {m: i for i, m in enumerate(mois)}
+    series = {nom: [0] * nb_mois for nom in SERIES_DECLARATIONS}
+    totaux = dict.fromkeys(SERIES_DECLARATIONS, 0)
+
+    for ligne in lignes:
+        i = index_mois.get(ligne["mois"])
+        for nom in SERIES_DECLARATIONS:
+            totaux[nom] += ligne[nom]
+            if i is not None:
+                series[nom][i] += ligne[nom]
+
+    return StatistiquesDeclarations(mois=mois, series=series, totaux=totaux)
+
+
+# =========================
+# 🔄 MAINTENANCE DES AGRÉGATS
+# =========================
+def _commissariat_de_l_objet():
+    # Commissariat de la dernière restitution planifiée pour l'objet
+    return Subquery(
+        Restitution.objects
+        .filter(objet=OuterRef("objet"))
+        .order_by("-date_restitution", "-heure_restitution", "-id")
+        .values("commissariat")[:1]
+    )
+
+
+def calculer_agregats(declarations):
+    """Lignes ``StatistiqueMensuelle`` (non enregistrées) pour ``declarations``."""
+    lignes = (
+        declarations
+        .annotate(
+            mois=TruncMonth("date_declaration"),
+            commissariat_id=_commissariat_de_l_objet(),
+        )
+        .values("mois", "commissariat_id", "etat_initial", "objet__etat")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    return [
+        StatistiqueMensuelle(
+            mois=ligne["mois"].date(),
+            commissariat_id=ligne["commissariat_id"],
+            etat_initial=ligne["etat_initial"],
+            etat_objet=ligne["objet__etat"],
+            total=ligne["total"],
+        )
+        for ligne in lignes
+    ]
+
+
+def cases(declarations):
+    """``{id: (mois, commissariat_id, etat_initial, etat_objet)}`` des ``declarations``."""
+    lignes = (
+        declarations
+        .annotate(mois=TruncMonth("date_declaration"), commissariat_id=_commissariat_de_l_objet())
+        .values_list("id", "mois", "commissariat_id", "etat_initial", "objet__etat")
+        .order_by()
+    )
+    return {pk: (mois.date(), commissariat, etat_initial, etat_objet)
+            for pk, mois, commissariat, etat_initial, etat_objet in lignes}
+
+
+def ajouter(case, delta):
+    """Ajoute ``delta`` au total de ``case`` (ligne créée, ou supprimée à zéro)."""
+    mois, commissariat_id, etat_initial, etat_objet = case
+    lignes = StatistiqueMensuelle.objects.filter(
+        mois=mois, commissariat_id=commissariat_id, etat_initial=etat_initial, etat_objet=etat_objet,
+    )
+    if lignes.update(total=F("total") + delta):
+        if delta < 0:
+            lignes.filter(total__lte=0).delete()
+        return
+    if delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            StatistiqueMensuelle.objects.create(
+                mois=mois, commissariat_id=commissariat_id, etat_initial=etat_initial,
+                etat_objet=etat_objet, total=delta,
+            )
+    except IntegrityError:
+        # Créée entre-temps par une autre transaction
+        lignes.update(total=F("total") + delta)
+
+
+# Déclarations en cours de suppression (pre_delete reçu, post_delete attendu) :
+# leur unité est retirée par leur propre post_delete, un déplacement
+# concomitant (restitution supprimée dans la même cascade) doit les ignorer.
+_suppressions = threading.local()
+
+
+def suppressions_en_cours():
+    if not hasattr(_suppressions, "ids"):
+        _suppressions.ids = set()
+    return _suppressions.ids
+
+
+def deplacer(avant, apres):
+    """Déplace l'unité des déclarations dont la case a changé entre ``avant`` et ``apres``."""
+    deltas = Counter()
+    en_suppression = suppressions_en_cours()
+    for pk, case in apres.items():
+        ancienne = avant.get(pk)
+        if ancienne is not None and ancienne != case and pk not in en_suppression:
+            deltas[ancienne] -= 1
+            deltas[case] += 1
+    # Ordre fixe : deux transactions verrouillent les lignes dans le même ordre
+    for case, delta in sorted(deltas.items(), key=lambda item: repr(item[0])):
+        if delta:
+            ajouter(case, delta)
+
+
+def reconstruire_statistiques():
+    """Vide et recalcule entièrement la table d'agrégats (réparation, chargements en masse)."""
+    with transaction.atomic():
+        StatistiqueMensuelle.objects.all().delete()
+        lignes = StatistiqueMensuelle.objects.bulk_create(
+            calculer_agregats(Declaration.objects.all()), batch_size=1000
+        )
+    return len(lignes)
+
+
+def statistiques_globales():
+    """Compteurs de la page statistiques (3 requêtes au lieu de 5)."""
+    utilisateurs = Utilisateur.objects.aggregate(
+        citoyens=Count("id", filter=Q(role="citoyen")),
+        admins=Count("id", filter=Q(role="admin", is_active=True)),
+        policiers=Count("id", filter=Q(role="policier")),
+    )
+    return StatistiquesGlobales(
+        nb_objets=Objet.objects.count(),
+        nb_restitutions=Restitution.objects.count(),
+        nb_citoyens=utilisateurs["citoyens"],
+        nb_admins=utilisateurs["admins"],
+        nb_policiers=utilisateurs["policiers"],
+    )
+
+
+# =========================
+# 📸 INSTANTANÉS QUOTIDIENS
+# =========================
+# Au-delà de MAX_POINTS jours, on ne garde qu'un point par semaine puis par mois
+MAX_POINTS = 62
+
+
+def capturer_instantane(jour=None):
+    """Enregistre (ou remplace) les compteurs globaux du ``jour``."""
+    stats = statistiques_globales()
+    instantane, _ = InstantaneQuotidien.objects.update_or_create(
+        jour=jour or timezone.localdate(),
+        defaults={
+            "nb_objets": stats.nb_objets,
+            "nb_restitutions": stats.nb_restitutions,
+            "nb_citoyens": stats.nb_citoyens,
+            "nb_admins": stats.nb_admins,
+            "nb_policiers": stats.nb_policiers,
+        },
+    )
+    return instantane
+
+
+def dernier_instantane():
+    """
+    Compteurs des cartes de la page statistiques : dernier instantané, sans
+    comptage à chaque affichage. Capturé sur-le-champ s'il n'y en a aucun.
+    """
+    return InstantaneQuotidien.objects.order_by("-jour").first() or capturer_instantane()
+
+
+def evolution(debut, fin, max_points=MAX_POINTS):
+    """
+    Évolution des compteurs entre ``debut`` et ``fin`` (inclus), lue dans
+    les instantanés. Les compteurs étant cumulés, une fenêtre longue est
+    sous-échantillonnée en gardant le dernier instantané de chaque semaine
+    (ou de chaque mois).
+    """
+    instantanes = InstantaneQuotidien.objects.filter(jour__range=(debut, fin))
+
+    nb_jours = (fin - debut).days + 1
+    if nb_jours <= max_points:
+        pas = "jour"
+    else:
+        pas = "semaine" if nb_jours <= max_points * 7 else "mois"
+        troncature = TruncWeek("jour") if pas == "semaine" else TruncMonth("jour")
+        derniers = (
+            instantanes
+            .annotate(periode=troncature)
+            .values("periode")
+            .annotate(dernier=Max("jour"))
+            .values("dernier")
+        )
+        instantanes = instantanes.filter(jour__in=Subquery(derniers))
+
+    lignes = list(instantanes.order_by("jour").values_list(
+        "jour", "nb_objets", "nb_restitutions", "nb_citoyens", "nb_admins", "nb_policiers"
+    ))
+    colonnes = list(zip(*lignes)) or [()] * 6
+    return Evolution(pas, *(list(c) for c in colonnes))
@@ -1,3 +1,1061 @@
-from django.test import TestCase
+import base64
+import importlib
+import io
+import random
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from backend.users.models import Commissariat, Courriel, Utilisateur
+from .models import (
+    CorrespondanceCandidate, Declaration, EtatObjet, InstantaneQuotidien, Objet, Restitution,
+    StatistiqueMensuelle, StatutRestitution, Suppression
+)
+from . import correspondances
+from .correspondances import (
+    MoteurCorrespondances, apparier_en_attente, enregistrer_candidats, termes,
+)
+from .empreintes_visuelles import (
+    IndexHamming, candidats_visuels, distance, empreinte_du_fichier, vers_non_signe, vers_signe
+)
+from .export_preuves import restitutions_a_exporter, zip_preuves
+from .flux import CurseurExpire, CurseurInvalide, encoder_curseur, modifications, purger_suppressions
+from .forms import DeclarationForm
+from .miniatures import TAILLES, chemin_miniature, generer_miniatures
+from .photos import dedoublonner_photos, normaliser
+from .preuves import (
+    chemin_local, enregistrer_preuve, generer_preuve_manquante, generer_preuves_en_attente, nom_fichier,
+    qr_code,
+)
+from .recherche import BackendLocal, get_backend, rechercher_declarations
+from .requetes import avec_declaration_initiale, resoudre_trouveurs
+from .statistiques import (
+    IndexMensuel, capturer_instantane, dernier_instantane, evolution, reconstruire_statistiques,
+    statistiques_declarations,
+)
+
+
+def creer_declaration(citoyen, nom, etat=EtatObjet.PERDU, description="", lieu=""):
+    objet = Objet.objects.create(nom=nom, description=description, etat=etat)
+    return Declaration.objects.create(
+        citoyen=citoyen, objet=objet, etat_initial=etat,
+        type_declaration=etat, description=description, lieu=lieu,
+    )
+
+
+# =========================
+# 🔎 RECHERCHE
+# =========================
+@override_settings(RECHERCHE_BACKEND="local")
+class RechercheLocaleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citoyen = Utilisateur.objects.create_user(
+            username="awa", email="awa@example.com", password="x", role="citoyen"
+        )
+        cls.telephone = creer_declaration(cls.citoyen, "Téléphone Samsung", lieu="Plateau")
+        cls.sac = creer_declaration(cls.citoyen, "Sac à dos", description="sac noir avec téléphone", lieu="Médina")
+        cls.cles = creer_declaration(cls.citoyen, "Clés", lieu="Almadies")
+
+    def test_backend_selectionne(self):
+        self.assertIsInstance(get_backend(), BackendLocal)
+
+    def test_requete_vide_renvoie_le_queryset(self):
+        qs = Declaration.objects.all()
+        self.assertIs(rechercher_declarations(qs, "  "), qs)
+
+    def test_classement_nom_avant_description(self):
+        resultats = list(rechercher_declarations(Declaration.objects.all(), "téléphone"))
+        self.assertEqual(resultats, [self.telephone, self.sac])
+
+    def test_tous_les_termes_sont_requis(self):
+        resultats = rechercher_declarations(Declaration.objects.all(), "sac plateau")
+        self.assertFalse(resultats.exists())
+
+    def test_recherche_par_lieu(self):
+        resultats = rechercher_declarations(Declaration.objects.all(), "almadies")
+        self.assertEqual(list(resultats), [self.cles])
+
+    def test_recherche_par_citoyen(self):
+        qs = Declaration.objects.all()
+        self.assertFalse(rechercher_declarations(qs, "awa").exists())
+        self.assertEqual(rechercher_declarations(qs, "awa", avec_citoyen=True).count(), 3)
+
+
+# =========================
+# 🔁 HISTORIQUE DES RESTITUTIONS
+# =========================
+class HistoriqueRestitutionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.proprietaire = Utilisateur.objects.create_user(
+            username="moussa", email="moussa@example.com", password="x", role="citoyen"
+        )
+        cls.trouveur = Utilisateur.objects.create_user(
+            username="fatou", email="fatou@example.com", password="x", role="citoyen"
+        )
+
+    def creer_restitutions(self, nombre):
+        for i in range(nombre):
+            perdue = creer_declaration(self.proprietaire, f"Objet {i}")
+            perdue.trouve_par.add(self.trouveur)
+            # Déclaration ultérieure du même objet : ne doit pas être retenue
+            Declaration.objects.create(
+                citoyen=self.trouveur, objet=perdue.objet,
+                etat_initial=EtatObjet.TROUVE, type_declaration="trouve",
+            )
+            Restitution.objects.create(
+                objet=perdue.objet, citoyen=self.proprietaire,
+                statut=StatutRestitution.EFFECTUEE,
+            )
+
+    def resoudre(self):
+        restitutions = avec_declaration_initiale(
+            Restitution.objects.select_related("objet", "citoyen")
+        )
+        return [resoudre_trouveurs(r) for r in restitutions]
+
+    def test_declaration_initiale_et_trouveurs(self):
+        self.creer_restitutions(1)
+        [restitution] = self.resoudre()
+        self.assertEqual(restitution.etat_initial, EtatObjet.PERDU)
+        self.assertEqual(restitution.trouveurs, [self.trouveur])
+
+    def test_nombre_de_requetes_independant_du_volume(self):
+        # restitutions + déclarations initiales + trouveurs
+        self.creer_restitutions(2)
+        with self.assertNumQueries(3):
+            self.resoudre()
+        self.creer_restitutions(30)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(self.resoudre()), 32)
+
+
+# =========================
+# 📊 STATISTIQUES
+# =========================
+class StatistiquesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        citoyen = Utilisateur.objects.create_user(
+            username="ibou", email="ibou@example.com", password="x", role="citoyen"
+        )
+        creer_declaration(citoyen, "Portefeuille")
+        creer_declaration(citoyen, "Montre", etat=EtatObjet.TROUVE)
+        reclame = creer_declaration(citoyen, "Sac")
+        reclame.objet.etat = EtatObjet.RECLAME
+        reclame.objet.save()
+        # Hors de la fenêtre des 6 mois : compté dans les totaux seulement
+        ancienne = creer_declaration(citoyen, "Casque")
+        ancienne.date_declaration = timezone.now() - timedelta(days=400)
+        ancienne.save()
+        cls.reclame = reclame
+
+    def test_series_et_totaux_en_une_requete(self):
+        with self.assertNumQueries(1):
+            stats = statistiques_declarations(nb_mois=6)
+        self.assertEqual(len(stats.mois), 6)
+        self.assertEqual(stats.total("perdus"), 3)
+        self.assertEqual(stats.total("trouves"), 1)
+        self.assertEqual(stats.total("perdus_retrouves"), 1)
+        self.assertEqual(stats.serie("perdus"), [0, 0, 0, 0, 0, 2])
+        self.assertEqual(stats.serie("trouves"), [0, 0, 0, 0, 0, 1])
+
+    def test_agregats_suivent_les_modifications(self):
+        objet = self.reclame.objet
+        objet.etat = EtatObjet.RESTITUE
+        objet.save()
+        stats = statistiques_declarations()
+        self.assertEqual(stats.total("perdus_retrouves"), 0)
+        self.assertEqual(stats.total("restitues"), 1)
+
+        self.reclame.delete()
+        self.assertEqual(statistiques_declarations().total("perdus"), 2)
+
+    def contenu(self):
+        return sorted(StatistiqueMensuelle.objects.values_list(
+            "mois", "commissariat", "etat_initial", "etat_objet", "total"
+        ), key=repr)
+
+    def assertIdentiqueALaReconstruction(self):
+        incremental = self.contenu()
+        reconstruire_statistiques()
+        self.assertEqual(self.contenu(), incremental)
+
+    def test_reconstruction_identique_au_suivi_incremental(self):
+        self.assertIdentiqueALaReconstruction()
+
+    def test_restitutions_et_cascades(self):
+        commissariat = Commissariat.objects.create(nom="Médina", adresse="-")
+        objet = self.reclame.objet
+        restitution = Restitution.objects.create(objet=objet, citoyen=self.reclame.citoyen, commissariat=commissariat)
+        self.assertEqual(statistiques_declarations(commissariat=commissariat).total("perdus"), 1)
+        self.assertIdentiqueALaReconstruction()
+
+        # Déclaration modifiée (autre mois) puis restitution effectuée
+        self.reclame.date_declaration = timezone.now() - timedelta(days=100)
+        self.reclame.save()
+        restitution.statut = StatutRestitution.EFFECTUEE
+        restitution.save()
+        self.assertIdentiqueALaReconstruction()
+
+        # Objet supprimé : déclaration et restitution partent dans la même cascade
+        objet.delete()
+        self.assertEqual(statistiques_declarations(commissariat=commissariat).total("perdus"), 0)
+        self.assertIdentiqueALaReconstruction()
+
+        # Commissariat supprimé : les restitutions partent, les déclarations restent
+        autre = creer_declaration(self.reclame.citoyen, "Lunettes")
+        Restitution.objects.create(objet=autre.objet, citoyen=autre.citoyen, commissariat=commissariat)
+        commissariat.delete()
+        self.assertIdentiqueALaReconstruction()
+
+    def test_une_ligne_par_case(self):
+        ligne = StatistiqueMensuelle.objects.filter(commissariat=None).first()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StatistiqueMensuelle.objects.create(
+                mois=ligne.mois, commissariat=None, etat_initial=ligne.etat_initial,
+                etat_objet=ligne.etat_objet, total=1,
+            )
+
+    def test_index_mensuel(self):
+        mois = [date(2025, 5, 1), date(2025, 6, 1)]
+        index = IndexMensuel([
+            {"mois": date(2025, 6, 1), "etat_initial": EtatObjet.PERDU, "total": 2},
+            {"mois": date(2025, 6, 1), "etat_initial": EtatObjet.PERDU, "total": 3},
+            {"mois": date(2025, 5, 1), "etat_initial": EtatObjet.TROUVE, "total": 1},
+            {"mois": date(2024, 1, 1), "etat_initial": EtatObjet.PERDU, "total": 9},
+        ], champ_etat="etat_initial")
+        self.assertEqual(index.serie(mois, EtatObjet.PERDU), [0, 5])
+        self.assertEqual(index.serie(mois, EtatObjet.TROUVE), [1, 0])
+        self.assertEqual(index.serie(mois, EtatObjet.EN_ATTENTE), [0, 0])
+
+
+class InstantanesTests(TestCase):
+    def test_capture_du_jour_remplace_la_precedente(self):
+        capturer_instantane()
+        Objet.objects.create(nom="Lunettes")
+        instantane = capturer_instantane()
+        self.assertEqual(InstantaneQuotidien.objects.count(), 1)
+        self.assertEqual(instantane.nb_objets, 1)
+
+    def test_cartes_lues_dans_le_dernier_instantane(self):
+        # Aucun instantané : capturé une fois
+        self.assertEqual(dernier_instantane().jour, timezone.localdate())
+        InstantaneQuotidien.objects.create(jour=timezone.localdate() - timedelta(days=3), nb_objets=7)
+        Objet.objects.create(nom="Lunettes")
+        with self.assertNumQueries(1):
+            instantane = dernier_instantane()
+        self.assertEqual((instantane.jour, instantane.nb_objets), (timezone.localdate(), 0))
+
+    def test_evolution_sous_echantillonnee(self):
+        debut = date(2025, 1, 1)
+        InstantaneQuotidien.objects.bulk_create([
+            InstantaneQuotidien(jour=debut + timedelta(days=i), nb_objets=i)
+            for i in range(365)
+        ])
+        courte = evolution(debut, debut + timedelta(days=9))
+        self.assertEqual(courte.pas, "jour")
+        self.assertEqual(courte.objets, list(range(10)))
+
+        with self.assertNumQueries(1):
+            annee = evolution(debut, date(2025, 12, 31))
+        self.assertEqual(annee.pas, "semaine")
+        self.assertLessEqual(len(annee.jours), 54)
+        # Dernier point de la fenêtre conservé
+        self.assertEqual(annee.objets[-1], 364)
+
+        longue = evolution(debut, date(2027, 12, 31))
+        self.assertEqual(longue.pas, "mois")
+        self.assertEqual(len(longue.jours), 12)
+
+
+# =========================
+# 🧾 PREUVES PDF
+# =========================
+def faux_rendu(restitution):
+    return f"%PDF-1.4 restitution {restitution.id}".encode()
+
+
+class PreuvesTestCase(TestCase):
+    """Citoyens et MEDIA_ROOT temporaire communs aux tests des preuves."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proprietaire = Utilisateur.objects.create_user(
+            username="khady", email="khady@example.com", password="x", role="citoyen"
+        )
+        cls.trouveur = Utilisateur.objects.create_user(
+            username="omar", email="omar@example.com", password="x", role="citoyen"
+        )
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+    def creer_restitution(self, statut=StatutRestitution.EFFECTUEE, a_notifier=False):
+        declaration = creer_declaration(self.proprietaire, "Portefeuille")
+        declaration.trouve_par.add(self.trouveur)
+        return Restitution.objects.create(
+            objet=declaration.objet, citoyen=self.proprietaire, statut=statut,
+            preuve_a_notifier=a_notifier,
+        )
+
+
+class PreuvesTests(PreuvesTestCase):
+    def test_nom_contient_l_empreinte(self):
+        restitution = self.creer_restitution()
+        nom = enregistrer_preuve(restitution, b"%PDF-1.4 a")
+        restitution.refresh_from_db()
+        self.assertEqual(nom, nom_fichier(restitution.id, restitution.preuve_empreinte))
+        self.assertEqual(len(restitution.preuve_empreinte), 64)
+        with default_storage.open(nom) as f:
+            self.assertEqual(f.read(), b"%PDF-1.4 a")
+
+    def test_nouvelle_version_remplace_l_ancienne(self):
+        restitution = self.creer_restitution()
+        ancien = enregistrer_preuve(restitution, b"%PDF-1.4 a")
+        with self.captureOnCommitCallbacks(execute=True):
+            nouveau = enregistrer_preuve(restitution, b"%PDF-1.4 b")
+        self.assertNotEqual(ancien, nouveau)
+        self.assertFalse(default_storage.exists(ancien))
+        self.assertTrue(default_storage.exists(nouveau))
+
+    def test_worker_genere_une_seule_fois_et_notifie(self):
+        a_notifier = self.creer_restitution(a_notifier=True)
+        ancienne = self.creer_restitution()
+        self.creer_restitution(statut=StatutRestitution.PLANIFIEE)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(generer_preuves_en_attente(rendu=faux_rendu), (2, 0))
+        self.assertEqual(generer_preuves_en_attente(rendu=faux_rendu), (0, 0))
+
+        # Seule la restitution marquée « à notifier » déclenche un mail
+        courriel = Courriel.objects.get()
+        self.assertEqual(courriel.destinataires, ["khady@example.com", "omar@example.com"])
+        self.assertEqual(bytes(courriel.piece_jointe), faux_rendu(a_notifier))
+        a_notifier.refresh_from_db()
+        ancienne.refresh_from_db()
+        self.assertFalse(a_notifier.preuve_a_notifier)
+        self.assertTrue(ancienne.preuve_empreinte)
+
+    def test_generation_a_la_demande_une_seule_fois(self):
+        restitution = self.creer_restitution(a_notifier=True)
+        rendus = []
+
+        def rendu(restitution):
+            rendus.append(restitution.pk)
+            return faux_rendu(restitution)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(generer_preuve_manquante(restitution.pk, rendu).preuve_empreinte,
+                             generer_preuve_manquante(restitution.pk, rendu).preuve_empreinte)
+        self.assertEqual(generer_preuves_en_attente(rendu=rendu), (0, 0))
+        self.assertEqual(rendus, [restitution.pk])
+        self.assertEqual(Courriel.objects.count(), 1)
+        self.assertIsNone(generer_preuve_manquante(0, rendu))
+
+    def test_erreur_de_rendu_n_arrete_pas_le_worker(self):
+        en_erreur = self.creer_restitution()
+        self.creer_restitution()
+
+        def rendu(restitution):
+            if restitution.pk == en_erreur.pk:
+                raise RuntimeError("rendu impossible")
+            return faux_rendu(restitution)
+
+        with self.assertLogs("backend.objets.preuves", "ERROR"):
+            self.assertEqual(generer_preuves_en_attente(rendu=rendu), (1, 1))
+
+    def test_telechargement_sert_le_fichier_stocke(self):
+        restitution = self.creer_restitution()
+        generer_preuves_en_attente(rendu=faux_rendu)
+        restitution.refresh_from_db()
+        url = reverse("preuve_restitution_pdf", args=[restitution.pk])
+
+        reponse = self.client.get(url)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(b"".join(reponse.streaming_content), faux_rendu(restitution))
+        self.assertEqual(reponse["ETag"], f'"{restitution.preuve_empreinte}"')
+
+        reponse = self.client.get(url, headers={"If-None-Match": reponse["ETag"]})
+        self.assertEqual(reponse.status_code, 304)
+
+    @override_settings(PREUVES_ENVOI_FICHIER="x-accel-redirect", PREUVES_URL_INTERNE="/interne/")
+    def test_envoi_delegue_au_serveur_web(self):
+        restitution = self.creer_restitution()
+        generer_preuves_en_attente(rendu=faux_rendu)
+        restitution.refresh_from_db()
+        reponse = self.client.get(reverse("preuve_restitution_pdf", args=[restitution.pk]))
+        self.assertEqual(reponse["X-Accel-Redirect"], "/interne/" + restitution.preuve_pdf.name)
+        self.assertEqual(reponse.content, b"")
+
+    def test_qr_code_et_ressources_locales(self):
+        self.assertTrue(base64.b64decode(qr_code(1)).startswith(b"\x89PNG"))
+        # Deuxième appel pour la même restitution : servi par le cache
+        avant = qr_code.cache_info().hits
+        self.assertEqual(qr_code(1), qr_code(1))
+        self.assertEqual(qr_code.cache_info().hits, avant + 2)
+        self.assertTrue(chemin_local("http://localhost/static/frontend/images/logo_police.png"))
+        self.assertIsNone(chemin_local("https://example.com/image.png"))
+
+
+class ExportPreuvesTests(PreuvesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.plateau = Commissariat.objects.create(nom="Plateau", adresse="Dakar")
+        cls.medina = Commissariat.objects.create(nom="Médina", adresse="Dakar")
+        cls.policier = Utilisateur.objects.create_user(
+            username="agent", email="agent@example.com", password="x",
+            role="policier", commissariat=cls.plateau,
+        )
+
+    def restitution_du(self, commissariat, jour):
+        restitution = self.creer_restitution()
+        Restitution.objects.filter(pk=restitution.pk).update(commissariat=commissariat, date_restitution=jour)
+        restitution.refresh_from_db()
+        return restitution
+
+    def lire_zip(self, morceaux):
+        return zipfile.ZipFile(io.BytesIO(b"".join(morceaux)))
+
+    def test_archive_du_commissariat_sur_la_periode(self):
+        premiere = self.restitution_du(self.plateau, date(2025, 3, 1))
+        seconde = self.restitution_du(self.plateau, date(2025, 3, 20))
+        self.restitution_du(self.plateau, date(2025, 5, 1))
+        self.restitution_du(self.medina, date(2025, 3, 10))
+
+        restitutions = restitutions_a_exporter(self.plateau, date(2025, 3, 1), date(2025, 3, 31))
+        archive = self.lire_zip(zip_preuves(restitutions, processus=0, rendu=faux_rendu))
+        self.assertEqual(archive.namelist(), [
+            f"2025-03-01_restitution_{premiere.id}.pdf",
+            f"2025-03-20_restitution_{seconde.id}.pdf",
+        ])
+        self.assertEqual(archive.read(archive.namelist()[1]), faux_rendu(seconde))
+        # Les preuves rendues pour l'export sont conservées
+        self.assertEqual(restitutions_a_exporter(self.plateau).filter(preuve_empreinte="").count(), 1)
+
+    def test_archive_produite_par_morceaux(self):
+        for jour in range(1, 4):
+            self.restitution_du(self.plateau, date(2025, 3, jour))
+        morceaux = list(zip_preuves(restitutions_a_exporter(self.plateau), processus=0, rendu=faux_rendu))
+        self.assertGreater(len(morceaux), 3)
+        self.assertEqual(len(self.lire_zip(morceaux).namelist()), 3)
+
+    def test_preuve_en_erreur_listee(self):
+        en_erreur = self.restitution_du(self.plateau, date(2025, 3, 1))
+        self.restitution_du(self.plateau, date(2025, 3, 2))
+
+        def rendu(restitution):
+            if restitution.pk == en_erreur.pk:
+                raise RuntimeError("rendu impossible")
+            return faux_rendu(restitution)
+
+        with self.assertLogs("backend.objets.export_preuves", "ERROR"):
+            archive = self.lire_zip(zip_preuves(restitutions_a_exporter(), processus=0, rendu=rendu))
+        self.assertEqual(len(archive.namelist()), 2)
+        self.assertIn(f"Restitution {en_erreur.id}", archive.read("erreurs.txt").decode())
+
+    def test_vue_export_en_flux(self):
+        restitution = self.restitution_du(self.plateau, date(2025, 3, 1))
+        self.restitution_du(self.medina, date(2025, 3, 1))
+        generer_preuves_en_attente(rendu=faux_rendu)
+
+        self.client.force_login(self.policier)
+        reponse = self.client.get(reverse("export_preuves"), {"debut": "2025-03-01", "fin": "2025-03-31"})
+        self.assertEqual(reponse.status_code, 200)
+        self.assertTrue(reponse.streaming)
+        self.assertIn('filename="preuves_plateau_2025-03-01_2025-03-31.zip"', reponse["Content-Disposition"])
+        archive = self.lire_zip(reponse.streaming_content)
+        self.assertEqual(archive.namelist(), [f"2025-03-01_restitution_{restitution.id}.pdf"])
+
+    def test_vue_export_limitee_au_commissariat(self):
+        self.client.force_login(self.policier)
+        url = reverse("export_preuves")
+        self.assertEqual(self.client.get(url, {"commissariat": "abc"}).status_code, 400)
+        # Le commissariat d'un autre : refusé, même s'il existe
+        self.assertRedirects(self.client.get(url, {"commissariat": self.medina.pk}), reverse("home"),
+                             fetch_redirect_response=False)
+        self.assertEqual(self.client.get(url, {"commissariat": self.plateau.pk}).status_code, 200)
+
+        # Policier sans commissariat : aucun export (et surtout pas « tous »)
+        sans = Utilisateur.objects.create_user(
+            username="sans", email="sans@example.com", password="x", role="policier"
+        )
+        self.client.force_login(sans)
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        administrateur = Utilisateur.objects.create_user(
+            username="chef", email="chef@example.com", password="x", role="admin"
+        )
+        self.client.force_login(administrateur)
+        reponse = self.client.get(url, {"commissariat": self.medina.pk})
+        self.assertIn('filename="preuves_medina.zip"', reponse["Content-Disposition"])
+        self.assertEqual(self.client.get(url, {"commissariat": "99999"}).status_code, 404)
+
+
+# =========================
+# 🖼️ MINIATURES
+# =========================
+def image_de_test(largeur, hauteur, format="PNG", orientation=None, mode="RGB"):
+    tampon = io.BytesIO()
+    image = Image.new(mode, (largeur, hauteur), "red")
+    if orientation:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(tampon, format, exif=exif)
+    else:
+        image.save(tampon, format)
+    return tampon.getvalue()
+
+
+class MiniaturesTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+    def test_noms_deterministes(self):
+        self.assertEqual(
+            chemin_miniature("declarations/12pro.png", 480, "webp"),
+            "declarations/miniatures/12pro.png.480.webp",
+        )
+
+    def test_tailles_et_formats(self):
+        nom = default_storage.save("objets/photo.png", ContentFile(image_de_test(2000, 1000, mode="RGBA")))
+        self.assertEqual(generer_miniatures(nom), len(TAILLES) * 2)
+        for taille in TAILLES.values():
+            with default_storage.open(chemin_miniature(nom, taille, "webp")) as f, Image.open(f) as webp:
+                self.assertEqual(webp.format, "WEBP")
+                self.assertEqual(webp.size, (taille, taille // 2))
+            with default_storage.open(chemin_miniature(nom, taille, "jpg")) as f, Image.open(f) as jpeg:
+                self.assertEqual(jpeg.format, "JPEG")
+        # Déjà générées : rien à refaire
+        self.assertEqual(generer_miniatures(nom), 0)
+
+    def test_pas_d_agrandissement_et_orientation_exif(self):
+        # Orientation 6 : photo prise en portrait, stockée en paysage
+        nom = default_storage.save("objets/portrait.jpg", ContentFile(image_de_test(300, 200, "JPEG", orientation=6)))
+        generer_miniatures(nom)
+        with default_storage.open(chemin_miniature(nom, TAILLES["grande"], "jpg")) as f, Image.open(f) as jpeg:
+            self.assertEqual(jpeg.size, (200, 300))
+            self.assertNotIn(0x0112, jpeg.getexif())
+
+    def test_propriete_du_modele(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            objet = Objet.objects.create(
+                nom="Sac", image=ContentFile(image_de_test(800, 800), name="sac.png")
+            )
+        # Pas encore générées : l'original est servi
+        self.assertFalse(objet.miniatures.moyenne.disponible)
+        self.assertEqual(objet.miniatures.moyenne.webp, objet.image.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            objet.save()
+        miniature = Objet.objects.get(pk=objet.pk).miniatures.moyenne
+        self.assertTrue(miniature.disponible)
+        self.assertTrue(miniature.webp.endswith(".png.480.webp"))
+        self.assertEqual(str(miniature), miniature.jpeg)
+        self.assertFalse(Objet(nom="Sans photo").miniatures.petite)
+
+
+# =========================
+# 📷 PHOTOS TÉLÉVERSÉES
+# =========================
+@override_settings(PHOTOS_DIMENSION_MAX=400, PHOTOS_TAILLE_MAX=1024 * 1024)
+class PhotosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citoyen = Utilisateur.objects.create_user(
+            username="photographe", password="x", role="citoyen"
+        )
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+
+    def declarer(self, contenu, nom="photo.jpg"):
+        form = DeclarationForm(
+            {"nom_objet": "Sac", "lieu": "Gare", "etat_initial": EtatObjet.PERDU},
+            {"image": SimpleUploadedFile(nom, contenu, "image/jpeg")},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        with self.captureOnCommitCallbacks(execute=True):
+            return form.save(citoyen=self.citoyen)
+
+    def test_redressee_reduite_sans_metadonnees(self):
+        tampon = io.BytesIO()
+        exif = Image.Exif()
+        exif[0x0112] = 6              # orientation : portrait
+        exif[0x010F] = "Fabricant"    # marque de l'appareil
+        Image.new("RGB", (1200, 800), "blue").save(tampon, "JPEG", exif=exif)
+
+        photo = normaliser(tampon)
+        self.assertTrue(photo.name.endswith(".jpg"))
+        with Image.open(photo) as image:
+            self.assertEqual(image.size, (267, 400))
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_transparence_conservee_en_png(self):
+        photo = normaliser(io.BytesIO(image_de_test(100, 100, mode="RGBA")))
+        self.assertTrue(photo.name.endswith(".png"))
+
+    def test_fichiers_refuses(self):
+        for contenu in (b"pas une image", b"x" * (1024 * 1024 + 1)):
+            form = DeclarationForm(
+                {"nom_objet": "Sac", "etat_initial": EtatObjet.PERDU},
+                {"image": SimpleUploadedFile("photo.jpg", contenu, "image/jpeg")},
+            )
+            self.assertFalse(form.is_valid())
+            self.assertIn("image", form.errors)
+
+    def test_un_seul_fichier_par_contenu(self):
+        contenu = image_de_test(600, 600, "JPEG")
+        premiere = self.declarer(contenu)
+        seconde = self.declarer(contenu, nom="photo_copie.jpg")
+
+        self.assertEqual(premiere.image.name, seconde.image.name)
+        self.assertEqual(premiere.objet.image.name, premiere.image.name)
+        self.assertEqual(default_storage.listdir("declarations")[1], [premiere.image.name.split("/")[1]])
+
+    def test_dedoublonner_les_copies_existantes(self):
+        contenu = image_de_test(50, 50)
+        original = default_storage.save("objets/14.png", ContentFile(contenu))
+        copie = default_storage.save("declarations/14_9qriWcH.png", ContentFile(contenu))
+        autre = default_storage.save("declarations/autre.png", ContentFile(image_de_test(60, 60)))
+        objet = Objet.objects.create(nom="Téléphone", image=original)
+        declaration = creer_declaration(self.citoyen, "Téléphone")
+        Declaration.objects.filter(pk=declaration.pk).update(image=copie)
+        Objet.objects.filter(pk=declaration.objet_id).update(image=autre)
+
+        self.assertEqual(dedoublonner_photos(supprimer=True), (1, len(contenu)))
+        declaration.refresh_from_db()
+        self.assertEqual(declaration.image.name, original)
+        self.assertFalse(default_storage.exists(copie))
+        self.assertTrue(default_storage.exists(autre))
+        self.assertEqual(Objet.objects.get(pk=objet.pk).image.name, original)
+
+
+# =========================
+# 🧬 EMPREINTES VISUELLES
+# =========================
+def photo_motif(graine, taille=(640, 480), format="JPEG", qualite=90):
+    """Image à motif aléatoire (déterministe) : des graines différentes donnent des photos différentes."""
+    hasard = random.Random(graine)
+    petite = Image.new("L", (8, 6))
+    petite.putdata([hasard.randrange(256) for _ in range(48)])
+    tampon = io.BytesIO()
+    petite.resize(taille, Image.BICUBIC).convert("RGB").save(tampon, format, quality=qualite)
+    return tampon.getvalue()
+
+
+class EmpreintesVisuellesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.proprietaire = Utilisateur.objects.create_user(username="perd", email="perd@example.com", password="x", role="citoyen")
+        cls.trouveur = Utilisateur.objects.create_user(username="trouve", email="trouve@example.com", password="x", role="citoyen")
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        empreinte_du_fichier.cache_clear()
+
+    def declarer(self, utilisateur, etat, contenu, nom="photo.jpg"):
+        with self.captureOnCommitCallbacks(execute=True):
+            declaration = creer_declaration(utilisateur, "Téléphone", etat=etat)
+            declaration.image = default_storage.save(f"declarations/{nom}", ContentFile(contenu))
+            declaration.save()
+        declaration.refresh_from_db()
+        return declaration
+
+    def test_conversion_signee(self):
+        for valeur in (0, 1, 2 ** 63 - 1, 2 ** 63, 2 ** 64 - 1):
+            self.assertTrue(-2 ** 63 <= vers_signe(valeur) < 2 ** 63)
+            self.assertEqual(vers_non_signe(vers_signe(valeur)), valeur)
+
+    def test_photos_proches_et_differentes(self):
+        original = self.declarer(self.proprietaire, EtatObjet.PERDU, photo_motif(1))
+        # Même photo, plus petite et plus compressée
+        copie = self.declarer(self.trouveur, EtatObjet.TROUVE, photo_motif(1, (320, 240), qualite=40), "copie.jpg")
+        autre = self.declarer(self.trouveur, EtatObjet.TROUVE, photo_motif(2), "autre.jpg")
+
+        self.assertIsNotNone(original.empreinte_visuelle)
+        self.assertLessEqual(distance(original.empreinte_visuelle, copie.empreinte_visuelle), 4)
+        self.assertGreater(distance(original.empreinte_visuelle, autre.empreinte_visuelle), 10)
+
+        candidats = candidats_visuels([original])[original.id]
+        self.assertEqual([c.id for _, c in candidats], [copie.id])
+
+        # Objet restitué : plus proposé
+        Objet.objects.filter(pk=copie.objet_id).update(etat=EtatObjet.RESTITUE)
+        self.assertEqual(candidats_visuels([original])[original.id], [])
+
+    def test_index_identique_a_un_parcours_complet(self):
+        hasard = random.Random(7)
+        empreintes = [hasard.getrandbits(64) for _ in range(2000)]
+        # Quelques voisins proches de la première empreinte
+        for bits in range(1, 12):
+            empreintes.append(empreintes[0] ^ ((1 << bits) - 1))
+        index = IndexHamming((i, vers_signe(e)) for i, e in enumerate(empreintes))
+
+        for requete in (empreintes[0], empreintes[5], hasard.getrandbits(64)):
+            for rayon in (0, 3, 6, 10, 12):
+                attendu = sorted(
+                    (distance(e, requete), i) for i, e in enumerate(empreintes)
+                    if distance(e, requete) <= rayon
+                )
+                self.assertEqual(index.rechercher(requete, rayon), attendu)
+
+    def test_affichees_aux_policiers(self):
+        perdu = self.declarer(self.proprietaire, EtatObjet.PERDU, photo_motif(3))
+        trouve = self.declarer(self.trouveur, EtatObjet.TROUVE, photo_motif(3, (400, 300)), "trouve.jpg")
+        trouve.reclame_par.add(self.proprietaire)
+        policier = Utilisateur.objects.create_user(username="agent", email="agent@example.com", password="x", role="policier")
+        self.client.force_login(policier)
+
+        reponse = self.client.get(reverse("objets_reclames"))
+        self.assertContains(reponse, "Photos similaires")
+        self.assertEqual(reponse.context["declarations"].objets[0].candidats_visuels, [perdu])
+
+
+# =========================
+# 🔗 RAPPROCHEMENT PERDU / TROUVÉ
+# =========================
+class CorrespondancesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.proprietaire = Utilisateur.objects.create_user(
+            username="fatou", email="fatou@example.com", password="x", role="citoyen"
+        )
+        cls.trouveur = Utilisateur.objects.create_user(
+            username="moussa", email="moussa@example.com", password="x", role="citoyen"
+        )
+
+    def declarer(self, utilisateur, nom, etat, description="", lieu="", il_y_a=0):
+        declaration = creer_declaration(utilisateur, nom, etat=etat, description=description, lieu=lieu)
+        if il_y_a:
+            Declaration.objects.filter(pk=declaration.pk).update(
+                date_declaration=timezone.now() - timedelta(days=il_y_a)
+            )
+        return declaration
+
+    def candidats(self, perdue):
+        return list(
+            CorrespondanceCandidate.objects.filter(perdue=perdue)
+            .order_by("-score").values_list("trouvee__objet__nom", flat=True)
+        )
+
+    def test_termes_normalises(self):
+        self.assertEqual(termes("Les Clés de la Voiture"), ["cle", "voiture"])
+
+    def test_candidats_classes(self):
+        perdue = self.declarer(self.proprietaire, "Téléphone Samsung", EtatObjet.PERDU,
+                               "noir, écran fissuré", "Plateau")
+        self.declarer(self.trouveur, "Telephone samsung noir", EtatObjet.TROUVE, "", "Plateau")
+        self.declarer(self.trouveur, "Téléphone Tecno", EtatObjet.TROUVE, "bleu", "Médina")
+        self.declarer(self.trouveur, "Sac à dos", EtatObjet.TROUVE, "noir", "Plateau")
+        # Même objet mais trouvé bien trop tard
+        self.declarer(self.trouveur, "Téléphone Samsung", EtatObjet.TROUVE, "noir", "Plateau", il_y_a=400)
+
+        moteur = MoteurCorrespondances.depuis_la_base()
+        self.assertEqual(apparier_en_attente(moteur), 5)
+        candidats = self.candidats(perdue)
+        self.assertEqual(candidats[0], "Telephone samsung noir")
+        self.assertCountEqual(candidats[1:], ["Téléphone Tecno", "Sac à dos"])
+        self.assertNotIn("Téléphone Samsung", candidats)
+        self.assertFalse(Declaration.objects.filter(a_apparier=True).exists())
+        # Rien de nouveau
+        self.assertEqual(apparier_en_attente(moteur), 0)
+
+    def test_incremental(self):
+        perdue = self.declarer(self.proprietaire, "Portefeuille cuir", EtatObjet.PERDU, "marron", "Ouakam")
+        moteur = MoteurCorrespondances.depuis_la_base()
+        apparier_en_attente(moteur)
+        self.assertEqual(self.candidats(perdue), [])
+
+        # Une déclaration trouvée arrive plus tard : seule elle est traitée
+        trouvee = self.declarer(self.trouveur, "Portefeuille", EtatObjet.TROUVE, "cuir marron", "Ouakam")
+        self.assertEqual(apparier_en_attente(moteur), 1)
+        self.assertEqual(self.candidats(perdue), ["Portefeuille"])
+
+        # Modifier l'objet relance le calcul de ses déclarations
+        trouvee.objet.nom = "Montre"
+        trouvee.objet.description = "dorée"
+        trouvee.objet.save()
+        Declaration.objects.filter(pk=trouvee.pk).update(description="")
+        self.assertEqual(apparier_en_attente(moteur), 1)
+        self.assertEqual(self.candidats(perdue), [])
+
+    def test_declaration_supprimee(self):
+        perdue = self.declarer(self.proprietaire, "Clés Toyota", EtatObjet.PERDU, lieu="HLM")
+        trouvee = self.declarer(self.trouveur, "Clés Toyota", EtatObjet.TROUVE, lieu="HLM")
+        moteur = MoteurCorrespondances.depuis_la_base()
+        apparier_en_attente(moteur)
+        trouvee.delete()
+        self.assertFalse(CorrespondanceCandidate.objects.exists())
+
+        Declaration.objects.filter(pk=perdue.pk).update(a_apparier=True)
+        apparier_en_attente(moteur)
+        self.assertEqual(self.candidats(perdue), [])
+
+    def test_couples_de_l_autre_cote_conserves(self):
+        perdue = self.declarer(self.proprietaire, "Sacoche cuir", EtatObjet.PERDU, "noire", "Fann")
+        autre = self.declarer(self.proprietaire, "Sacoche", EtatObjet.PERDU, "cuir noir", "Fann")
+        trouvee = self.declarer(self.trouveur, "Sacoche cuir noire", EtatObjet.TROUVE, "", "Fann")
+        apparier_en_attente(MoteurCorrespondances.depuis_la_base())
+        self.assertEqual(CorrespondanceCandidate.objects.filter(trouvee=trouvee).count(), 2)
+
+        # La perdue ne garde plus que son seul candidat : le couple de l'autre reste
+        candidat = correspondances.Candidat(id=trouvee.id, score=0.5, texte=0.4, lieu=1.0, date=1.0)
+        enregistrer_candidats(perdue, [candidat])
+        self.assertEqual(CorrespondanceCandidate.objects.filter(trouvee=trouvee).count(), 2)
+        ligne = CorrespondanceCandidate.objects.get(perdue=perdue, trouvee=trouvee)
+        self.assertEqual((ligne.score, ligne.score_texte), (0.5, 0.4))
+
+        # Plus aucun candidat : seul son couple disparaît
+        enregistrer_candidats(perdue, [])
+        self.assertEqual(
+            list(CorrespondanceCandidate.objects.filter(trouvee=trouvee).values_list("perdue", flat=True)),
+            [autre.pk],
+        )
+
+    def test_moteur_rattrape_un_autre_worker(self):
+        moteur = MoteurCorrespondances.depuis_la_base()
+        perdue = self.declarer(self.proprietaire, "Lunettes Ray-Ban", EtatObjet.PERDU, lieu="Almadies")
+        apparier_en_attente(moteur)
+        # Son propre lot n'est pas relu
+        self.assertEqual(moteur.rattraper(), 0)
+
+        # Un autre worker apparie une déclaration trouvée
+        trouvee = self.declarer(self.trouveur, "Lunettes Ray-Ban", EtatObjet.TROUVE, lieu="Almadies")
+        apparier_en_attente(MoteurCorrespondances.depuis_la_base())
+        self.assertEqual(self.candidats(perdue), ["Lunettes Ray-Ban"])
+
+        # Le premier l'ajoute à son index avant son lot suivant, sans reconstruction
+        self.assertEqual(moteur.rattraper(), 1)
+        self.assertIn(trouvee.pk, moteur.positions)
+        Declaration.objects.filter(pk=perdue.pk).update(a_apparier=True)
+        apparier_en_attente(moteur)
+        self.assertEqual(CorrespondanceCandidate.objects.get(perdue=perdue).trouvee_id, trouvee.pk)
+        self.assertEqual(moteur.rattraper(), 0)
+
+
+# =========================
+# 🔢 COMPTEURS
+# =========================
+class CompteursTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citoyens = [
+            Utilisateur.objects.create_user(
+                username=f"citoyen{i}", email=f"citoyen{i}@example.com", password="x", role="citoyen"
+            )
+            for i in range(3)
+        ]
+
+    def compteurs(self, declaration):
+        return tuple(
+            Declaration.objects.filter(pk=declaration.pk).values_list("nb_reclamants", "nb_trouveurs").get()
+        )
+
+    def test_ajout_et_retrait(self):
+        a, b, c = self.citoyens
+        declaration = creer_declaration(a, "Portefeuille", etat=EtatObjet.TROUVE)
+        declaration.reclame_par.add(b, c)
+        declaration.reclame_par.add(b)                 # déjà présent : ignoré
+        declaration.trouve_par.add(a)
+        self.assertEqual(self.compteurs(declaration), (2, 1))
+        self.assertEqual(declaration.nb_reclamants, 2)
+
+        declaration.reclame_par.remove(b, a)           # a n'était pas réclamant
+        self.assertEqual(self.compteurs(declaration), (1, 1))
+        declaration.trouve_par.clear()
+        self.assertEqual(self.compteurs(declaration), (1, 0))
+
+    def test_cote_utilisateur(self):
+        a, b, _ = self.citoyens
+        premiere = creer_declaration(a, "Clés")
+        seconde = creer_declaration(a, "Sac")
+        b.objets_reclames.add(premiere, seconde)
+        self.assertEqual(self.compteurs(premiere), (1, 0))
+        b.objets_reclames.set([seconde])
+        self.assertEqual((self.compteurs(premiere), self.compteurs(seconde)), ((0, 0), (1, 0)))
+        b.objets_reclames.clear()
+        self.assertEqual(self.compteurs(seconde), (0, 0))
+
+    def test_utilisateur_supprime(self):
+        a, b, c = self.citoyens
+        declaration = creer_declaration(a, "Téléphone")
+        declaration.reclame_par.add(b, c)
+        declaration.trouve_par.add(b)
+        b.delete()
+        self.assertEqual(self.compteurs(declaration), (1, 0))
+
+    def test_enregistrement_ne_reecrit_pas_les_compteurs(self):
+        a, b, _ = self.citoyens
+        declaration = creer_declaration(a, "Montre")
+        perimee = Declaration.objects.get(pk=declaration.pk)
+        declaration.reclame_par.add(b)
+        perimee.description = "Montre dorée"
+        perimee.save()
+        self.assertEqual(self.compteurs(declaration), (1, 0))
+        self.assertEqual(perimee.nb_reclamants, 0)
+
+
+# =========================
+# 🕓 HORODATAGE
+# =========================
+class HorodatageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citoyen = Utilisateur.objects.create_user(
+            username="horodate", email="horodate@example.com", password="x", role="citoyen"
+        )
+
+    def test_creation_et_modification(self):
+        declaration = creer_declaration(self.citoyen, "Casque")
+        cree, modifie = declaration.created_at, declaration.updated_at
+        self.assertIsNotNone(cree)
+
+        # update_fields : updated_at est tout de même enregistré
+        declaration.lieu = "Marché Sandaga"
+        declaration.save(update_fields=["lieu"])
+        declaration.refresh_from_db()
+        self.assertEqual(declaration.created_at, cree)
+        self.assertGreater(declaration.updated_at, modifie)
+
+    def test_changed_since(self):
+        avant = timezone.now()
+        premiere = creer_declaration(self.citoyen, "Montre")
+        seconde = creer_declaration(self.citoyen, "Bague")
+        self.assertEqual(list(Declaration.objects.changed_since(avant)), [premiere, seconde])
+        self.assertEqual(Declaration.objects.changed_since(None).count(), 2)
+
+        # Les compteurs (update() des signaux) comptent comme une modification
+        depuis = Declaration.objects.get(pk=seconde.pk).updated_at
+        premiere.reclame_par.add(self.citoyen)
+        self.assertEqual(list(Declaration.objects.changed_since(depuis)), [premiere])
+        self.assertEqual(list(Objet.objects.filter(nom="Montre").changed_since(avant)), [premiere.objet])
+
+        restitution = Restitution.objects.create(objet=premiere.objet, citoyen=self.citoyen)
+        self.assertEqual(list(Restitution.objects.changed_since(avant)), [restitution])
+        self.assertFalse(Restitution.objects.changed_since(restitution.updated_at).exists())
+
+    def test_remplissage_borne_a_maintenant(self):
+        declaration = creer_declaration(self.citoyen, "Valise")
+        Declaration.objects.filter(pk=declaration.pk).update(date_declaration=timezone.now() - timedelta(days=10))
+        restitution = Restitution.objects.create(
+            objet=declaration.objet, citoyen=self.citoyen, date_restitution=date.today() + timedelta(days=7),
+        )
+        avant = timezone.now()
+        importlib.import_module("backend.objets.migrations.0013_horodatage").remplir_dates(django_apps, None)
+
+        # Restitution planifiée : pas de date dans le futur
+        restitution.refresh_from_db()
+        self.assertLessEqual(restitution.created_at, timezone.now())
+        self.assertGreaterEqual(restitution.updated_at, avant)
+        # Objet : créé à sa déclaration, modifié à la date de la migration
+        objet = Objet.objects.get(pk=declaration.objet_id)
+        self.assertLess(objet.created_at, avant - timedelta(days=9))
+        self.assertGreater(objet.updated_at, avant - timedelta(days=1))
+
+
+
+# =========================
+# 🪦 FLUX DES MODIFICATIONS
+# =========================
+@override_settings(FLUX_MARGE_SECONDES=0)
+class FluxModificationsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citoyen = Utilisateur.objects.create_user(
+            username="flux", email="flux@example.com", password="x", role="citoyen"
+        )
+
+    def colonne(self, donnees, source, champ):
+        indice = donnees["champs"][source].index(champ)
+        return [ligne[indice] for ligne in donnees[source]]
+
+    def test_synchronisation_puis_deltas(self):
+        montre = creer_declaration(self.citoyen, "Montre")
+        sac = creer_declaration(self.citoyen, "Sac", etat=EtatObjet.TROUVE)
+        Restitution.objects.create(objet=montre.objet, citoyen=self.citoyen)
+
+        # Synchronisation initiale, par pages de 1
+        donnees = modifications(limite=1, complet=True)
+        self.assertTrue(donnees["encore"])
+        self.assertEqual(self.colonne(donnees, "objets", "nom"), ["Montre"])
+        donnees = modifications(donnees["curseur"], limite=1, complet=True)
+        self.assertEqual(self.colonne(donnees, "objets", "nom"), ["Sac"])
+        self.assertEqual(self.colonne(donnees, "declarations", "objet"), [sac.objet_id])
+        donnees = modifications(donnees["curseur"], limite=1, complet=True)
+        self.assertFalse(donnees["encore"])
+        curseur = donnees["curseur"]
+        self.assertEqual(modifications(curseur, complet=True)["objets"], [])
+
+        # Delta : seule la ligne modifiée revient, suppressions en pierres tombales
+        sac.lieu = "Gare routière"
+        sac.save()
+        montre.objet.delete()
+        donnees = modifications(curseur, complet=True)
+        self.assertEqual(self.colonne(donnees, "declarations", "lieu"), ["Gare routière"])
+        self.assertEqual(donnees["objets"], [])
+        self.assertEqual(donnees["suppressions"]["objets"], [montre.objet_id])
+        self.assertEqual(donnees["suppressions"]["declarations"], [montre.pk])
+        self.assertEqual(len(donnees["suppressions"]["restitutions"]), 1)
+
+    def test_projection_citoyen(self):
+        montre = creer_declaration(self.citoyen, "Montre")
+        Declaration.objects.filter(pk=montre.pk).update(latitude=14.69, longitude=-17.44)
+        restitution = Restitution.objects.create(objet=montre.objet, citoyen=self.citoyen)
+        restitution.delete()
+
+        donnees = modifications()
+        self.assertNotIn("restitutions", donnees)
+        self.assertNotIn("restitutions", donnees["suppressions"])
+        self.assertNotIn("latitude", donnees["champs"]["declarations"])
+        self.assertNotIn(14.69, donnees["declarations"][0])
+        self.assertEqual(self.colonne(modifications(complet=True), "declarations", "latitude"), [14.69])
+
+    @override_settings(FLUX_MARGE_SECONDES=60)
+    def test_marge_avant_publication(self):
+        creer_declaration(self.citoyen, "Clés")
+        self.assertEqual(modifications()["objets"], [])
+
+    def test_curseurs_refuses(self):
+        with self.assertRaises(CurseurInvalide):
+            modifications("n'importe quoi")
+        ancien = encoder_curseur({"p": {}, "s": 0, "e": timezone.now() - timedelta(days=31)})
+        with self.assertRaises(CurseurExpire):
+            modifications(ancien)
+
+    def test_purge(self):
+        objet = Objet.objects.create(nom="Parapluie")
+        objet.delete()
+        Suppression.objects.update(date=timezone.now() - timedelta(days=31))
+        Objet.objects.create(nom="Gants").delete()
+        self.assertEqual(purger_suppressions(), 1)
+        self.assertEqual(Suppression.objects.count(), 1)
@@ -0,0 +1,20 @@
+"""
+Vocabulaire des déclarations synthétiques (objets, marques, couleurs,
+détails, lieux de Dakar), partagé par les benchmarks et le générateur de
+données (``frontend/donnees_synthetiques.py``).
+"""
+OBJETS = [
+    "téléphone", "portefeuille", "sac à dos", "clés", "montre", "lunettes", "ordinateur",
+    "tablette", "casque", "carte d'identité", "passeport", "veste", "parapluie", "bague",
+]
+MARQUES = ["samsung", "iphone", "tecno", "infinix", "huawei", "dell", "hp", "casio", "sony", "nike"]
+COULEURS = ["noir", "blanc", "rouge", "bleu", "vert", "gris", "marron", "doré", "rose"]
+DETAILS = [
+    "écran fissuré", "coque transparente", "avec chargeur", "étui en cuir", "porte-clés",
+    "autocollant", "rayé", "neuf", "ancien modèle", "initiales gravées", "fermeture cassée",
+]
+LIEUX = [
+    "Plateau", "Médina", "Almadies", "Parcelles Assainies", "Grand Yoff", "Ouakam",
+    "Liberté 6", "Sacré-Cœur", "Point E", "HLM", "Pikine", "Guédiawaye", "Rufisque",
+]
+PRECISIONS = ["marché", "gare routière", "arrêt de bus", "université", "mosquée", "plage", "stade"]
@@ -21,6 +21,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'backend.users',
     'backend.objets',
     'frontend',
@@ -29,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # En tête : mesure aussi les requêtes SQL des autres middlewares
+    'frontend.middleware.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,6 +41,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# ─── Instrumentation (frontend/middleware.py) ──────────────
+# Requêtes SQL, temps base/rendu par requête HTTP ; retiré de la chaîne si inactif
+INSTRUMENTATION_ACTIVE = os.getenv('INSTRUMENTATION_ACTIVE', 'False') == 'True'
+INSTRUMENTATION_SERVER_TIMING = os.getenv('INSTRUMENTATION_SERVER_TIMING', 'False') == 'True'
+# Répétitions d'une même requête SQL à partir desquelles un N+1 est signalé
+INSTRUMENTATION_SEUIL_DOUBLONS = int(os.getenv('INSTRUMENTATION_SEUIL_DOUBLONS', 5))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'frontend.middleware': {
+            'handlers': ['console'],
+            'level': os.getenv('INSTRUMENTATION_NIVEAU_JOURNAL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'backend.urls'
 
 # ─── Templates ─────────────────────────────────────────────
@@ -62,16 +87,65 @@ TEMPLATES = [
 WSGI_APPLICATION = 'backend.wsgi.application'
 
 # ─── Base de données PostgreSQL ─────────────────────────────
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('DB_NAME'),
-        'USER': os.getenv('DB_USER'),
-        'PASSWORD': os.getenv('DB_PASSWORD'),
-        'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', 5432),
+# DB_ENGINE=django.db.backends.sqlite3 permet de lancer les tests sans Postgres
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.postgresql')
+
+if DB_ENGINE.endswith('sqlite3'):
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv('DB_NAME'),
+            'USER': os.getenv('DB_USER'),
+            'PASSWORD': os.getenv('DB_PASSWORD'),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', 5432),
+        }
     }
-}
+
+# ─── Recherche ──────────────────────────────────────────────
+# "postgres" (plein texte + trigrammes) ou "local" (SQLite / tests).
+# Par défaut, choisi selon le moteur de base de données.
+RECHERCHE_BACKEND = os.getenv('RECHERCHE_BACKEND', '')
+
+# ─── Cache ──────────────────────────────────────────────────
+# Redis en production (REDIS_URL), mémoire locale par défaut,
+# CACHE_BACKEND=file pour un cache fichier partagé entre processus.
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif os.getenv('CACHE_BACKEND') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', BASE_DIR / '.cache'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Durée de vie (secondes) des contextes de tableaux de bord en cache
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 300))
+# Carrousel et page anonyme de l'accueil (invalidés à chaque modification d'objet)
+ACCUEIL_CACHE_TIMEOUT = int(os.getenv('ACCUEIL_CACHE_TIMEOUT', 3600))
+# Filigranes (dernière modification) des listes d'objets et du détail d'un objet
+LISTES_CACHE_TIMEOUT = int(os.getenv('LISTES_CACHE_TIMEOUT', 300))
 
 # ─── Validation des mots de passe ───────────────────────────
 AUTH_PASSWORD_VALIDATORS = [
@@ -94,6 +168,36 @@ STATICFILES_DIRS = [BASE_DIR / "frontend" / "static"]
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Preuves de restitution (PDF) : envoi délégué au serveur web si possible.
+# '' (flux Django), 'x-sendfile' (Apache) ou 'x-accel-redirect' (Nginx,
+# avec un location interne PREUVES_URL_INTERNE -> MEDIA_ROOT).
+PREUVES_ENVOI_FICHIER = os.getenv('PREUVES_ENVOI_FICHIER', '')
+PREUVES_URL_INTERNE = os.getenv('PREUVES_URL_INTERNE', '/media-protege/')
+# Base des URL relatives du gabarit PDF (les /static/ et /media/ sont lus sur le disque)
+PREUVES_URL_BASE = os.getenv('PREUVES_URL_BASE', 'http://localhost/')
+# Processus de rendu pour l'export groupé des preuves manquantes
+PREUVES_EXPORT_PROCESSUS = int(os.getenv('PREUVES_EXPORT_PROCESSUS', min(os.cpu_count() or 1, 4)))
+
+# Photos téléversées (backend/objets/photos.py) : plafonds et ré-encodage
+PHOTOS_DIMENSION_MAX = int(os.getenv('PHOTOS_DIMENSION_MAX', 2048))
+PHOTOS_TAILLE_MAX = int(os.getenv('PHOTOS_TAILLE_MAX', 15 * 1024 * 1024))
+PHOTOS_PIXELS_MAX = int(os.getenv('PHOTOS_PIXELS_MAX', 50_000_000))
+PHOTOS_QUALITE_JPEG = int(os.getenv('PHOTOS_QUALITE_JPEG', 85))
+# Distance de Hamming maximale (sur 64 bits) entre deux photos « similaires »
+EMPREINTES_RAYON = int(os.getenv('EMPREINTES_RAYON', 10))
+# Filtre « près de moi » (rayon en km, voir backend/users/geo.py)
+GEO_RAYON_DEFAUT_KM = float(os.getenv('GEO_RAYON_DEFAUT_KM', 5))
+GEO_RAYON_MAX_KM = float(os.getenv('GEO_RAYON_MAX_KM', 50))
+# Rapprochement perdu/trouvé (commande apparier_declarations)
+CORRESPONDANCES_K = int(os.getenv('CORRESPONDANCES_K', 10))
+CORRESPONDANCES_FENETRE_JOURS = int(os.getenv('CORRESPONDANCES_FENETRE_JOURS', 90))
+CORRESPONDANCES_TAILLE_LOT = int(os.getenv('CORRESPONDANCES_TAILLE_LOT', 200))
+CORRESPONDANCES_MARGE_SECONDES = int(os.getenv('CORRESPONDANCES_MARGE_SECONDES', 60))
+# Flux des modifications (backend/objets/flux.py) : délai avant qu'une
+# modification soit servie, durée de conservation des suppressions
+FLUX_MARGE_SECONDES = int(os.getenv('FLUX_MARGE_SECONDES', 5))
+FLUX_RETENTION_JOURS = int(os.getenv('FLUX_RETENTION_JOURS', 30))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # ─── Authentification custom ─────────────────────────────────
@@ -104,12 +208,19 @@ AUTHENTICATION_BACKENDS = [
 ]
 
 # ─── Mail ──────────────────────────────────────────────────
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
 EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True") == "True"
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Boîte d'envoi (commande envoyer_courriels)
+COURRIELS_TAILLE_LOT = int(os.getenv("COURRIELS_TAILLE_LOT", 50))
+COURRIELS_MAX_TENTATIVES = int(os.getenv("COURRIELS_MAX_TENTATIVES", 5))
+COURRIELS_DELAI_BASE = int(os.getenv("COURRIELS_DELAI_BASE", 60))
+COURRIELS_DELAI_MAX = int(os.getenv("COURRIELS_DELAI_MAX", 6 * 3600))
+
 # settings.py
 LOGIN_URL = '/login/'
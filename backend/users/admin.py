@@ -1,7 +1,15 @@
 from django.contrib import admin
 
-from backend.users.models import Commissariat, Utilisateur
+from backend.users.models import Commissariat, Courriel, Utilisateur
 
 # Register your models here.
 admin.site.register(Utilisateur)
-admin.site.register(Commissariat)
\ No newline at end of file
+admin.site.register(Commissariat)
+
+
+@admin.register(Courriel)
+class CourrielAdmin(admin.ModelAdmin):
+    list_display = ("sujet", "statut", "tentatives", "prochaine_tentative", "date_envoi")
+    list_filter = ("statut",)
+    # Le corps peut contenir un lien de définition de mot de passe
+    exclude = ("corps", "piece_jointe")
@@ -0,0 +1,177 @@
+"""
+Boîte d'envoi des courriels.
+
+Les vues n'envoient plus de courriel pendant la requête : ``envoyer_plus_tard``
+enregistre le message dans la table ``Courriel`` une fois la transaction
+validée (``transaction.on_commit``), et la commande ``envoyer_courriels``
+les expédie par lots sur une seule connexion SMTP.
+
+Une fois envoyé, le corps du message est effacé : il peut contenir un lien
+de définition de mot de passe, qui ne doit pas rester lisible en base.
+
+Un envoi en erreur est retenté plus tard avec un délai exponentiel
+(``COURRIELS_DELAI_BASE`` × 2^tentatives, plafonné à ``COURRIELS_DELAI_MAX``),
+puis abandonné après ``COURRIELS_MAX_TENTATIVES`` essais.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import Courriel, StatutCourriel
+
+logger = logging.getLogger(__name__)
+
+TAILLE_LOT = 50
+MAX_TENTATIVES = 5
+DELAI_BASE = 60          # secondes
+DELAI_MAX = 6 * 3600     # secondes
+
+
+def _reglage(nom, defaut):
+    return getattr(settings, nom, defaut)
+
+
+def envoyer_plus_tard(sujet, message, destinataires, expediteur=None,
+                      piece_jointe=None, nom_piece_jointe="", type_piece_jointe=""):
+    """
+    Met un courriel en file d'attente. Rien n'est enregistré si la
+    transaction en cours est annulée.
+    """
+    destinataires = sorted({d for d in destinataires if d})
+    if not destinataires:
+        return
+
+    def enregistrer():
+        Courriel.objects.create(
+            sujet=sujet,
+            corps=message,
+            expediteur=expediteur or settings.DEFAULT_FROM_EMAIL or "",
+            destinataires=destinataires,
+            piece_jointe=piece_jointe,
+            nom_piece_jointe=nom_piece_jointe,
+            type_piece_jointe=type_piece_jointe,
+        )
+
+    transaction.on_commit(enregistrer)
+
+
+def lien_definir_mot_de_passe(request, utilisateur):
+    """
+    Lien absolu où ``utilisateur`` choisit son mot de passe (à usage unique,
+    valable ``PASSWORD_RESET_TIMEOUT``) : aucun mot de passe ne transite
+    par la boîte d'envoi.
+    """
+    chemin = reverse("definir_mot_de_passe", kwargs={
+        "uidb64": urlsafe_base64_encode(force_bytes(utilisateur.pk)),
+        "token": default_token_generator.make_token(utilisateur),
+    })
+    return request.build_absolute_uri(chemin)
+
+
+def delai_avant_nouvel_essai(tentatives):
+    """Délai exponentiel après ``tentatives`` échecs."""
+    secondes = _reglage("COURRIELS_DELAI_BASE", DELAI_BASE) * 2 ** max(tentatives - 1, 0)
+    return datetime.timedelta(seconds=min(secondes, _reglage("COURRIELS_DELAI_MAX", DELAI_MAX)))
+
+
+def _message(courriel, connexion):
+    email = EmailMessage(
+        subject=courriel.sujet,
+        body=courriel.corps,
+        from_email=courriel.expediteur or None,
+        to=courriel.destinataires,
+        connection=connexion,
+    )
+    if courriel.piece_jointe:
+        email.attach(
+            courriel.nom_piece_jointe or "piece_jointe",
+            bytes(courriel.piece_jointe),
+            courriel.type_piece_jointe or None,
+        )
+    return email
+
+
+def _echec(courriel, erreur, maintenant):
+    courriel.tentatives += 1
+    courriel.derniere_erreur = str(erreur)
+    if courriel.tentatives >= _reglage("COURRIELS_MAX_TENTATIVES", MAX_TENTATIVES):
+        courriel.statut = StatutCourriel.ECHEC
+        logger.error("Courriel %s abandonné après %s tentatives : %s",
+                     courriel.pk, courriel.tentatives, erreur)
+    else:
+        courriel.prochaine_tentative = maintenant + delai_avant_nouvel_essai(courriel.tentatives)
+        logger.warning("Courriel %s en erreur (tentative %s) : %s",
+                       courriel.pk, courriel.tentatives, erreur)
+
+
+def envoyer_lot(taille=None, connexion=None):
+    """
+    Envoie un lot de courriels dus sur une seule connexion SMTP.
+    Renvoie ``(envoyés, en_erreur)``.
+
+    Les lignes sont verrouillées (``SKIP LOCKED``) : plusieurs workers
+    peuvent tourner en parallèle sans envoyer deux fois le même courriel.
+    """
+    taille = taille or _reglage("COURRIELS_TAILLE_LOT", TAILLE_LOT)
+    maintenant = timezone.now()
+    envoyes = erreurs = 0
+
+    with transaction.atomic():
+        lot = list(
+            Courriel.objects
+            .select_for_update(skip_locked=True)
+            .filter(statut=StatutCourriel.EN_ATTENTE, prochaine_tentative__lte=maintenant)
+            .order_by("prochaine_tentative", "id")[:taille]
+        )
+        if not lot:
+            return 0, 0
+
+        connexion = connexion or get_connection()
+        try:
+            connexion.open()
+        except Exception as e:
+            # Serveur injoignable : tout le lot est reporté
+            for courriel in lot:
+                _echec(courriel, e, maintenant)
+            erreurs = len(lot)
+        else:
+            try:
+                for courriel in lot:
+                    try:
+                        _message(courriel, connexion).send(fail_silently=False)
+                    except Exception as e:
+                        _echec(courriel, e, maintenant)
+                        erreurs += 1
+                    else:
+                        courriel.statut = StatutCourriel.ENVOYE
+                        courriel.date_envoi = timezone.now()
+                        courriel.derniere_erreur = ""
+                        courriel.corps = ""
+                        envoyes += 1
+            finally:
+                connexion.close()
+
+        Courriel.objects.bulk_update(
+            lot, ["statut", "tentatives", "prochaine_tentative", "derniere_erreur", "date_envoi", "corps"]
+        )
+    return envoyes, erreurs
+
+
+def envoyer_courriels_en_attente(taille=None):
+    """Vide la file (lot après lot) ; renvoie ``(envoyés, en_erreur)``."""
+    total_envoyes = total_erreurs = 0
+    while True:
+        envoyes, erreurs = envoyer_lot(taille)
+        total_envoyes += envoyes
+        total_erreurs += erreurs
+        # Un lot sans aucun envoi réussi : inutile d'insister maintenant
+        if not envoyes:
+            return total_envoyes, total_erreurs
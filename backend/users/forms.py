@@ -1,7 +1,6 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
-from django.utils.crypto import get_random_string
-from django.core.mail import send_mail
+from .courriels import envoyer_plus_tard, lien_definir_mot_de_passe
 from django.core.validators import RegexValidator
 from .models import Utilisateur, Commissariat, Message
 
@@ -37,10 +36,12 @@ class UtilisateurCreationForm(UserCreationForm):
 class CommissariatForm(forms.ModelForm):
     class Meta:
         model = Commissariat
-        fields = ['nom', 'adresse']
+        fields = ['nom', 'adresse', 'latitude', 'longitude']
         widgets = {
             'nom': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Nom du commissariat'}),
             'adresse': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Adresse du commissariat'}),
+            'latitude': forms.NumberInput(attrs={'class': 'form-control', 'step': 'any', 'min': -90, 'max': 90}),
+            'longitude': forms.NumberInput(attrs={'class': 'form-control', 'step': 'any', 'min': -180, 'max': 180}),
         }
 
 # =========================
@@ -99,8 +100,6 @@ class PolicierForm(forms.ModelForm):
 # =========================
 
 from django import forms
-from django.core.mail import send_mail
-from django.utils.crypto import get_random_string
 from .models import Utilisateur
 
 class AdministrateurCreationForm(forms.ModelForm):
@@ -122,7 +121,11 @@ class AdministrateurCreationForm(forms.ModelForm):
             }),
         }
 
-    def save(self, commit=True):
+    def save(self, commit=True, *, request):
+        """
+        ``request`` est obligatoire : sans le lien envoyé, le compte (sans mot
+        de passe) resterait inaccessible.
+        """
         user = super().save(commit=False)
         user.role = 'admin'
 
@@ -132,23 +135,21 @@ class AdministrateurCreationForm(forms.ModelForm):
         if not user.last_name:
             user.last_name = user.username.split('.')[-1].capitalize()
 
-        # Création d'un mot de passe aléatoire
-        password = get_random_string(10)
-        user.set_password(password)
+        # Pas de mot de passe : l'administrateur choisit le sien via le lien envoyé
+        user.set_unusable_password()
 
         if commit:
             user.save()
-            # Envoi du mot de passe par email
-            send_mail(
-                subject="Vos identifiants administrateur",
+            envoyer_plus_tard(
+                sujet="Votre compte administrateur",
                 message=(
                     f"Bonjour {user.first_name} {user.last_name},\n\n"
                     f"Votre compte administrateur a été créé.\n"
-                    f"Username: {user.username}\nEmail: {user.email}\nTéléphone: {user.telephone}\nMot de passe: {password}\n\nMerci."
+                    f"Username: {user.username}\nEmail: {user.email}\nTéléphone: {user.telephone}\n\n"
+                    f"Choisissez votre mot de passe : {lien_definir_mot_de_passe(request, user)}\n\nMerci."
                 ),
-                from_email="noreply@lostfound.com",
-                recipient_list=[user.email],
-                fail_silently=False,
+                destinataires=[user.email],
+                expediteur="noreply@lostfound.com",
             )
         return user
 
@@ -0,0 +1,130 @@
+"""
+Localisation des déclarations et des commissariats, sans PostGIS.
+
+Les coordonnées (facultatives) sont complétées par un geohash : une chaîne
+dont chaque caractère affine la cellule précédente, si bien que les points
+d'une même zone partagent un préfixe. Une recherche « dans un rayon » se
+ramène à quelques ``LIKE 'préfixe%'`` servis par l'index B-tree de la
+colonne (la cellule du point et ses 8 voisines, d'une taille au moins égale
+au rayon), puis à un filtre exact par distance (haversine) :
+
+- PostgreSQL : distance calculée dans la requête ;
+- autres bases (SQLite des tests) : distance calculée en Python sur les
+  seuls candidats du préfixe.
+"""
+import math
+
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 9               # cellule d'environ 5 m × 5 m
+RAYON_TERRE_KM = 6371.0088
+KM_PAR_DEGRE = 111.32
+
+
+def encoder(latitude, longitude, precision=PRECISION):
+    """Geohash de ``(latitude, longitude)``."""
+    intervalles = [[-90.0, 90.0], [-180.0, 180.0]]
+    caracteres = []
+    bit = valeur = 0
+    longitude_ensuite = True
+    while len(caracteres) < precision:
+        intervalle, coordonnee = (intervalles[1], longitude) if longitude_ensuite else (intervalles[0], latitude)
+        milieu = (intervalle[0] + intervalle[1]) / 2
+        valeur <<= 1
+        if coordonnee >= milieu:
+            valeur |= 1
+            intervalle[0] = milieu
+        else:
+            intervalle[1] = milieu
+        longitude_ensuite = not longitude_ensuite
+        bit += 1
+        if bit == 5:
+            caracteres.append(ALPHABET[valeur])
+            bit = valeur = 0
+    return "".join(caracteres)
+
+
+def dimensions_cellule(precision):
+    """``(hauteur, largeur)`` en degrés d'une cellule de ``precision`` caractères."""
+    bits = 5 * precision
+    return 180 / 2 ** (bits // 2), 360 / 2 ** ((bits + 1) // 2)
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """Distance orthodromique (haversine) en kilomètres."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * RAYON_TERRE_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def prefixes_autour(latitude, longitude, rayon_km):
+    """Préfixes geohash dont les cellules couvrent le cercle ``rayon_km`` autour du point."""
+    hauteur_rayon = rayon_km / KM_PAR_DEGRE
+    largeur_rayon = rayon_km / (KM_PAR_DEGRE * max(math.cos(math.radians(latitude)), 1e-6))
+    precision = 0
+    while precision < PRECISION:
+        hauteur, largeur = dimensions_cellule(precision + 1)
+        if hauteur < hauteur_rayon or largeur < largeur_rayon:
+            break
+        precision += 1
+    if precision == 0:
+        return [""]     # rayon plus grand qu'une cellule de premier niveau : tout
+    hauteur, largeur = dimensions_cellule(precision)
+    prefixes = set()
+    for dlat in (-hauteur, 0, hauteur):
+        for dlon in (-largeur, 0, largeur):
+            lat = min(max(latitude + dlat, -90.0), 90.0)
+            lon = (longitude + dlon + 180) % 360 - 180
+            prefixes.add(encoder(lat, lon, precision))
+    return sorted(prefixes)
+
+
+def _distance_sql(latitude, longitude):
+    phi = math.radians(latitude)
+    a = (
+        Power(Sin((Radians(F("latitude")) - phi) / 2), 2)
+        + math.cos(phi) * Cos(Radians(F("latitude"))) * Power(Sin((Radians(F("longitude")) - math.radians(longitude)) / 2), 2)
+    )
+    return 2 * RAYON_TERRE_KM * ASin(Sqrt(a))
+
+
+def dans_un_rayon(queryset, latitude, longitude, rayon_km):
+    """
+    Restreint ``queryset`` (modèle avec ``latitude``, ``longitude``,
+    ``geohash``) aux lignes à moins de ``rayon_km`` du point.
+    """
+    filtre = Q()
+    for prefixe in prefixes_autour(latitude, longitude, rayon_km):
+        filtre |= Q(geohash__startswith=prefixe)
+    candidats = queryset.filter(filtre).exclude(geohash="")
+
+    if connection.vendor == "postgresql":
+        return (
+            candidats.annotate(distance_km=_distance_sql(latitude, longitude))
+            .filter(distance_km__lte=rayon_km)
+        )
+
+    # Repli portable : distance exacte en Python sur les candidats du préfixe
+    proches = [
+        pk for pk, lat, lon in candidats.values_list("pk", "latitude", "longitude")
+        if distance_km(latitude, longitude, lat, lon) <= rayon_km
+    ]
+    return queryset.filter(pk__in=proches)
+
+
+def le_plus_proche(elements, latitude, longitude):
+    """``(élément, distance)`` le plus proche parmi ``elements`` localisés, ou ``(None, None)``."""
+    meilleur, distance_min = None, None
+    for element in elements:
+        if element.latitude is None or element.longitude is None:
+            continue
+        d = distance_km(latitude, longitude, element.latitude, element.longitude)
+        if distance_min is None or d < distance_min:
+            meilleur, distance_min = element, d
+    return meilleur, distance_min
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend.users.courriels import envoyer_courriels_en_attente
+
+
+class Command(BaseCommand):
+    help = (
+        "Envoie les courriels en attente par lots, sur une seule connexion SMTP "
+        "par lot. Sans --boucle, vide la file puis s'arrête (cron) ; avec --boucle, "
+        "tourne en continu (worker)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lot", type=int, default=None, help="Nombre de courriels par lot.")
+        parser.add_argument("--boucle", action="store_true", help="Tourne en continu.")
+        parser.add_argument("--pause", type=float, default=5.0,
+                            help="Secondes d'attente quand la file est vide (avec --boucle).")
+
+    def handle(self, *args, **options):
+        while True:
+            envoyes, erreurs = envoyer_courriels_en_attente(options["lot"])
+            if envoyes or erreurs or not options["boucle"]:
+                self.stdout.write(f"{envoyes} courriel(s) envoyé(s), {erreurs} en erreur.")
+            if not options["boucle"]:
+                return
+            time.sleep(options["pause"])
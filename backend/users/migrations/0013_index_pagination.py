@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0012_alter_utilisateur_role'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['-date_envoi', '-id'], name='message_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='utilisateur',
+            index=models.Index(fields=['role', '-date_joined', '-id'], name='user_role_joined_id_idx'),
+        ),
+    ]
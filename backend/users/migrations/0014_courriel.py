@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:18
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_index_pagination'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Courriel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sujet', models.CharField(max_length=255)),
+                ('corps', models.TextField()),
+                ('expediteur', models.CharField(blank=True, max_length=254)),
+                ('destinataires', models.JSONField(default=list)),
+                ('piece_jointe', models.BinaryField(blank=True, null=True)),
+                ('nom_piece_jointe', models.CharField(blank=True, max_length=255)),
+                ('type_piece_jointe', models.CharField(blank=True, max_length=100)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('envoye', 'Envoyé'), ('echec', 'Échec définitif')], default='en_attente', max_length=20)),
+                ('tentatives', models.PositiveIntegerField(default=0)),
+                ('prochaine_tentative', models.DateTimeField(default=django.utils.timezone.now)),
+                ('derniere_erreur', models.TextField(blank=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_envoi', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Courriel',
+                'verbose_name_plural': 'Courriels',
+                'ordering': ['prochaine_tentative', 'id'],
+                'indexes': [models.Index(fields=['statut', 'prochaine_tentative', 'id'], name='courriel_a_envoyer_idx')],
+            },
+        ),
+    ]
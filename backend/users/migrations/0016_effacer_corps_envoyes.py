@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def effacer_corps_envoyes(apps, schema_editor):
+    # Les courriels de création de compte contenaient le mot de passe en clair
+    Courriel = apps.get_model('users', 'Courriel')
+    Courriel.objects.filter(statut='envoye').update(corps='')
+    Courriel.objects.filter(
+        statut='echec', sujet__in=['Vos identifiants administrateur', 'Création de votre compte Policier'],
+    ).update(corps='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_localisation'),
+    ]
+
+    operations = [
+        migrations.RunPython(effacer_corps_envoyes, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,39 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils import timezone
 from django.conf import settings
 
+from .geo import encoder
 
 
+# =========================
+# 📍 LOCALISATION
+# =========================
+class Localisable(models.Model):
+    """Coordonnées facultatives et leur geohash indexé (recherches par rayon, voir geo.py)."""
+    latitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)]
+    )
+    longitude = models.FloatField(
+        null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)]
+    )
+    geohash = models.CharField(max_length=12, blank=True, default="", editable=False, db_index=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def est_localise(self):
+        return self.latitude is not None and self.longitude is not None
+
+    def save(self, *args, **kwargs):
+        self.geohash = encoder(self.latitude, self.longitude) if self.est_localise else ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"geohash"}
+        super().save(*args, **kwargs)
+
 
 # =========================
 # 👤 UTILISATEUR
@@ -38,6 +67,12 @@ class Utilisateur(AbstractUser):
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username"]
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Pagination par clé des listes par rôle (liste_citoyens)
+            models.Index(fields=['role', '-date_joined', '-id'], name='user_role_joined_id_idx'),
+        ]
     
     def __str__(self):
      return f"{self.username} ({self.role})"
@@ -48,7 +83,7 @@ class Utilisateur(AbstractUser):
 # 🏢 COMMISSARIAT
 # =========================
 
-class Commissariat(models.Model):
+class Commissariat(Localisable):
     nom = models.CharField(max_length=100)
     adresse = models.CharField(max_length=200)
 
@@ -97,7 +132,49 @@ class Message(models.Model):
         ordering = ['-date_envoi']
         verbose_name = "Message citoyen"
         verbose_name_plural = "Messages citoyens"
+        indexes = [
+            models.Index(fields=['-date_envoi', '-id'], name='message_date_id_idx'),
+        ]
 
     def _str_(self):
         return f"{self.nom} ({self.email})"
 
+
+
+# =========================
+# 📮 COURRIEL EN ATTENTE (boîte d'envoi)
+# =========================
+class StatutCourriel(models.TextChoices):
+    EN_ATTENTE = "en_attente", "En attente"
+    ENVOYE = "envoye", "Envoyé"
+    ECHEC = "echec", "Échec définitif"
+
+
+class Courriel(models.Model):
+    sujet = models.CharField(max_length=255)
+    corps = models.TextField()
+    expediteur = models.CharField(max_length=254, blank=True)
+    destinataires = models.JSONField(default=list)
+    piece_jointe = models.BinaryField(null=True, blank=True)
+    nom_piece_jointe = models.CharField(max_length=255, blank=True)
+    type_piece_jointe = models.CharField(max_length=100, blank=True)
+
+    statut = models.CharField(
+        max_length=20, choices=StatutCourriel.choices, default=StatutCourriel.EN_ATTENTE
+    )
+    tentatives = models.PositiveIntegerField(default=0)
+    prochaine_tentative = models.DateTimeField(default=timezone.now)
+    derniere_erreur = models.TextField(blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_envoi = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['prochaine_tentative', 'id']
+        verbose_name = "Courriel"
+        verbose_name_plural = "Courriels"
+        indexes = [
+            models.Index(fields=['statut', 'prochaine_tentative', 'id'], name='courriel_a_envoyer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sujet} → {', '.join(self.destinataires)}"
@@ -1,3 +1,227 @@
-from django.test import TestCase
+import math
+import random
+from datetime import timedelta
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .courriels import delai_avant_nouvel_essai, envoyer_lot, envoyer_plus_tard
+from .forms import AdministrateurCreationForm
+from .geo import dans_un_rayon, distance_km, encoder, le_plus_proche, prefixes_autour
+from .models import Commissariat, Courriel, StatutCourriel, Utilisateur
+
+
+class ConnexionComptee(EmailBackend):
+    ouvertures = 0
+
+    def open(self):
+        ConnexionComptee.ouvertures += 1
+        return super().open()
+
+
+class ConnexionEnPanne(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("SMTP indisponible")
+
+
+# =========================
+# 📮 BOÎTE D'ENVOI
+# =========================
+@override_settings(
+    COURRIELS_MAX_TENTATIVES=3, COURRIELS_DELAI_BASE=60, COURRIELS_DELAI_MAX=3600,
+    DEFAULT_FROM_EMAIL="noreply@example.com",
+)
+class CourrielsTests(TestCase):
+    def mettre_en_file(self, nombre=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(nombre):
+                envoyer_plus_tard(f"Sujet {i}", "Bonjour", [f"c{i}@example.com", ""])
+
+    def test_enregistre_apres_commit_seulement(self):
+        with self.captureOnCommitCallbacks(execute=False) as rappels:
+            envoyer_plus_tard("Sujet", "Bonjour", ["a@example.com"])
+        self.assertFalse(Courriel.objects.exists())
+        rappels[0]()
+        courriel = Courriel.objects.get()
+        self.assertEqual(courriel.destinataires, ["a@example.com"])
+        self.assertEqual(courriel.expediteur, "noreply@example.com")
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_rien_si_la_transaction_est_annulee(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    envoyer_plus_tard("Sujet", "Bonjour", ["a@example.com"])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(Courriel.objects.exists())
+
+    def test_sans_destinataire_rien_n_est_mis_en_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            envoyer_plus_tard("Sujet", "Bonjour", ["", None])
+        self.assertFalse(Courriel.objects.exists())
+
+    def test_lot_envoye_sur_une_seule_connexion(self):
+        self.mettre_en_file(5)
+        ConnexionComptee.ouvertures = 0
+        self.assertEqual(envoyer_lot(connexion=ConnexionComptee()), (5, 0))
+        self.assertEqual(ConnexionComptee.ouvertures, 1)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(Courriel.objects.exclude(statut=StatutCourriel.ENVOYE).exists())
+        # Corps effacé une fois envoyé (liens de définition de mot de passe)
+        self.assertFalse(Courriel.objects.exclude(corps="").exists())
+        self.assertEqual(mail.outbox[0].body, "Bonjour")
+        # Déjà envoyés : rien à refaire
+        self.assertEqual(envoyer_lot(), (0, 0))
+
+    def test_piece_jointe(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            envoyer_plus_tard(
+                "Preuve", "Ci-joint", ["a@example.com"], piece_jointe=b"%PDF-1.4",
+                nom_piece_jointe="preuve.pdf", type_piece_jointe="application/pdf",
+            )
+        envoyer_lot()
+        self.assertEqual(mail.outbox[0].attachments, [("preuve.pdf", b"%PDF-1.4", "application/pdf")])
+
+    def test_nouvel_essai_avec_delai_exponentiel(self):
+        self.mettre_en_file()
+        with self.assertLogs("backend.users.courriels", "WARNING"):
+            self.assertEqual(envoyer_lot(connexion=ConnexionEnPanne()), (0, 1))
+        courriel = Courriel.objects.get()
+        self.assertEqual(courriel.statut, StatutCourriel.EN_ATTENTE)
+        self.assertEqual(courriel.tentatives, 1)
+        self.assertIn("SMTP indisponible", courriel.derniere_erreur)
+        self.assertGreater(courriel.prochaine_tentative, timezone.now() + timedelta(seconds=50))
+        # Pas encore dû
+        self.assertEqual(envoyer_lot(), (0, 0))
+
+        Courriel.objects.update(prochaine_tentative=timezone.now())
+        self.assertEqual(envoyer_lot(), (1, 0))
+        self.assertEqual(Courriel.objects.get().statut, StatutCourriel.ENVOYE)
+
+    def test_abandon_apres_le_nombre_maximal_de_tentatives(self):
+        self.mettre_en_file()
+        with self.assertLogs("backend.users.courriels", "WARNING") as journal:
+            for _ in range(3):
+                Courriel.objects.update(prochaine_tentative=timezone.now())
+                envoyer_lot(connexion=ConnexionEnPanne())
+        self.assertIn("abandonné", journal.output[-1])
+        courriel = Courriel.objects.get()
+        self.assertEqual(courriel.statut, StatutCourriel.ECHEC)
+        self.assertEqual(courriel.tentatives, 3)
+
+    def test_delai_plafonne(self):
+        self.assertEqual(delai_avant_nouvel_essai(1), timedelta(seconds=60))
+        self.assertEqual(delai_avant_nouvel_essai(3), timedelta(seconds=240))
+        self.assertEqual(delai_avant_nouvel_essai(20), timedelta(seconds=3600))
+
+
+# =========================
+# 🔑 CRÉATION DE COMPTES
+# =========================
+class CreationComptesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Utilisateur.objects.create_user(
+            username="chef", email="chef@example.com", password="x", role="admin"
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def lien(self):
+        corps = Courriel.objects.get().corps
+        return corps[corps.index("http"):].split()[0]
+
+    def test_policier_recoit_un_lien_et_non_un_mot_de_passe(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("creer_policier"), {
+                "username": "agent", "email": "agent@example.com", "first_name": "Awa",
+                "last_name": "Diop", "telephone": "770000000",
+            })
+        policier = Utilisateur.objects.get(username="agent")
+        self.assertFalse(policier.has_usable_password())
+        self.assertNotIn("Mot de passe :", Courriel.objects.get().corps)
+
+        # Le lien permet de choisir son mot de passe, une seule fois
+        self.client.logout()
+        formulaire = self.client.get(self.lien(), follow=True)
+        self.assertTrue(formulaire.context["validlink"])
+        reponse = self.client.post(formulaire.redirect_chain[-1][0], {
+            "new_password1": "Sable-Rouge-2024", "new_password2": "Sable-Rouge-2024",
+        })
+        self.assertRedirects(reponse, reverse("login"), fetch_redirect_response=False)
+        policier.refresh_from_db()
+        self.assertTrue(policier.check_password("Sable-Rouge-2024"))
+        self.assertFalse(self.client.get(self.lien(), follow=True).context["validlink"])
+
+    def test_administrateur_recoit_un_lien(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("creer_administrateur"), {
+                "username": "ndiaye.fall", "email": "nf@example.com", "telephone": "770000001",
+            })
+        self.assertFalse(Utilisateur.objects.get(username="ndiaye.fall").has_usable_password())
+        self.assertIn("/mot-de-passe/definir/", self.lien())
+
+    def test_formulaire_administrateur_exige_la_requete(self):
+        formulaire = AdministrateurCreationForm({"username": "sans.lien", "email": "sl@example.com"})
+        self.assertTrue(formulaire.is_valid())
+        with self.assertRaises(TypeError):
+            formulaire.save()
+        self.assertFalse(Utilisateur.objects.filter(username="sans.lien").exists())
+
+
+# =========================
+# 📍 LOCALISATION
+# =========================
+class GeoTests(TestCase):
+    def test_geohash(self):
+        self.assertEqual(encoder(57.64911, 10.40744, 11), "u4pruydqqvj")
+        # Préfixes communs pour des points voisins
+        self.assertEqual(encoder(14.6937, -17.4441, 5), encoder(14.6940, -17.4445, 5))
+
+    def test_distance(self):
+        # Dakar Plateau -> ancien aéroport de Yoff : environ 9,5 km
+        self.assertAlmostEqual(distance_km(14.6708, -17.4381, 14.7397, -17.4902), 9.5, delta=0.5)
+        self.assertEqual(distance_km(14.7, -17.4, 14.7, -17.4), 0)
+
+    def test_prefixes_couvrent_le_cercle(self):
+        hasard = random.Random(3)
+        for rayon in (0.5, 2, 5, 25):
+            centre = (14.7 + hasard.uniform(-0.2, 0.2), -17.4 + hasard.uniform(-0.2, 0.2))
+            prefixes = prefixes_autour(*centre, rayon)
+            for _ in range(200):
+                # Point aléatoire dans le cercle
+                angle, r = hasard.uniform(0, 2 * math.pi), rayon * math.sqrt(hasard.random())
+                point = (
+                    centre[0] + r * math.cos(angle) / 111.32,
+                    centre[1] + r * math.sin(angle) / (111.32 * math.cos(math.radians(centre[0]))),
+                )
+                if distance_km(*centre, *point) <= rayon:
+                    self.assertTrue(any(encoder(*point).startswith(p) for p in prefixes))
+
+    def test_dans_un_rayon_et_le_plus_proche(self):
+        plateau = Commissariat.objects.create(nom="Plateau", adresse="-", latitude=14.6708, longitude=-17.4381)
+        medina = Commissariat.objects.create(nom="Médina", adresse="-", latitude=14.6839, longitude=-17.4519)
+        Commissariat.objects.create(nom="Rufisque", adresse="-", latitude=14.7156, longitude=-17.2733)
+        sans_position = Commissariat.objects.create(nom="Inconnu", adresse="-")
+        self.assertEqual(plateau.geohash, encoder(14.6708, -17.4381))
+        self.assertEqual(sans_position.geohash, "")
+
+        proches = dans_un_rayon(Commissariat.objects.all(), 14.6750, -17.4420, 3)
+        self.assertCountEqual(proches, [plateau, medina])
+
+        commissariat, distance = le_plus_proche(Commissariat.objects.all(), 14.6840, -17.4500)
+        self.assertEqual(commissariat, medina)
+        self.assertLess(distance, 0.5)
+
+        # Le geohash suit les coordonnées, même avec update_fields
+        medina.latitude = medina.longitude = None
+        medina.save(update_fields=["latitude", "longitude"])
+        medina.refresh_from_db()
+        self.assertEqual(medina.geohash, "")
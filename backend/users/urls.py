@@ -1,4 +1,5 @@
-from django.urls import path
+from django.contrib.auth import views as auth_views
+from django.urls import path, reverse_lazy
 from . import views
 
 urlpatterns = [
@@ -6,6 +7,14 @@ urlpatterns = [
     path('login/', views.login_view, name='login'),
     path('logout/', views.logout_view, name='logout'),
     path('register/', views.register_view, name='register'),
+    # Lien envoyé à la création d'un compte policier/administrateur (courriels.lien_definir_mot_de_passe)
+    path(
+        'mot-de-passe/definir/<uidb64>/<token>/',
+        auth_views.PasswordResetConfirmView.as_view(
+            template_name='users/definir_mot_de_passe.html', success_url=reverse_lazy('login'),
+        ),
+        name='definir_mot_de_passe',
+    ),
 
     # -------------------- Dashboards --------------------
     path('dashboard/admin/', views.admin_dashboard, name='dashboard_admin'),
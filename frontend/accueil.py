@@ -0,0 +1,137 @@
+"""
+Page d'accueil : carrousel précalculé, page en cache et GET conditionnels.
+
+- Les diapositives du carrousel (derniers objets perdus/réclamés et trouvés)
+  sont calculées une fois par version puis lues dans le cache.
+- ``accueil:version`` est incrémentée (signaux, après le commit) à chaque
+  modification d'un objet ; elle invalide d'un coup le carrousel, la page
+  des visiteurs anonymes et leur ``ETag``. La date de cette modification
+  sert de ``Last-Modified``.
+- Les visiteurs anonymes reçoivent la page entière depuis le cache, sans
+  requête SQL ; la réponse porte ``Vary: Cookie`` (un utilisateur connecté
+  voit son menu) et un ``ETag`` qui permet de répondre 304.
+
+Les clés incluent aussi une empreinte des gabarits de la page : un
+déploiement qui les modifie ne sert pas l'ancienne version.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils import timezone
+
+from backend.objets.models import EtatObjet, Objet
+
+from .cache import _cle_version_utilisateur, _incrementer, _version
+
+PREFIXE = "accueil"
+CLE_VERSION = f"{PREFIXE}:version"
+CLE_MODIFICATION = f"{PREFIXE}:modification"
+GABARITS = ("frontend/home.html", "frontend/base.html", "frontend/navbar.html", "frontend/footer.html")
+NB_DIAPOSITIVES = 6
+DUREE = 3600
+
+DIAPOSITIVES_PAR_DEFAUT = [
+    {'url': '/static/frontend/images/head2.jpg', 'titre': 'Aucun objet', 'description': 'Slide par défaut', 'etat_type': 'default'},
+    {'url': '/static/frontend/images/head1.jpg', 'titre': 'Aucun objet', 'description': 'Slide par défaut', 'etat_type': 'default'},
+    {'url': '/static/frontend/images/head3.jpg', 'titre': 'Aucun objet', 'description': 'Slide par défaut', 'etat_type': 'default'},
+]
+
+
+def _duree():
+    return getattr(settings, "ACCUEIL_CACHE_TIMEOUT", DUREE)
+
+
+@lru_cache(maxsize=None)
+def revision_gabarits():
+    """Empreinte courte des gabarits de la page (calculée une fois par processus)."""
+    empreinte = hashlib.sha256()
+    for nom in GABARITS:
+        empreinte.update(get_template(nom).template.source.encode())
+    return empreinte.hexdigest()[:12]
+
+
+def version():
+    return f"{_version(CLE_VERSION)}.{revision_gabarits()}"
+
+
+def invalider():
+    """Invalide carrousel, page anonyme et ETag ; date la modification."""
+    cache.set(CLE_MODIFICATION, timezone.now().replace(microsecond=0), timeout=None)
+    _incrementer(CLE_VERSION)
+
+
+def derniere_modification():
+    modification = cache.get(CLE_MODIFICATION)
+    if modification is None:
+        modification = timezone.now().replace(microsecond=0)
+        if not cache.add(CLE_MODIFICATION, modification, timeout=None):
+            modification = cache.get(CLE_MODIFICATION, modification)
+    return modification
+
+
+def etag(utilisateur):
+    """ETag de la page pour ``utilisateur`` (le menu d'un utilisateur connecté dépend de lui)."""
+    if not utilisateur.is_authenticated:
+        return f"accueil-{version()}"
+    return f"accueil-{version()}-u{utilisateur.pk}.{_version(_cle_version_utilisateur(utilisateur.pk))}"
+
+
+# =========================
+# 🎠 CARROUSEL
+# =========================
+def _diapositive(objet, etat_type):
+    grande = objet.miniatures.grande
+    return {
+        # Miniature "grande" (l'original tant qu'elle n'est pas générée)
+        'url': grande.jpeg or None,
+        'webp': grande.webp if grande.disponible else None,
+        'titre': objet.nom,
+        'description': (objet.description[:120] + "...") if objet.description else "",
+        'etat': objet.get_etat_display(),
+        'etat_type': etat_type,
+    }
+
+
+def calculer_diapositives():
+    perdus_reclames = (
+        Objet.objects.filter(etat__in=[EtatObjet.PERDU, EtatObjet.RECLAME])
+        .only('id', 'nom', 'description', 'etat', 'image').order_by('-id')[:NB_DIAPOSITIVES]
+    )
+    trouves = (
+        Objet.objects.filter(etat=EtatObjet.TROUVE)
+        .only('id', 'nom', 'description', 'etat', 'image').order_by('-id')[:NB_DIAPOSITIVES]
+    )
+    diapositives = [
+        _diapositive(objet, 'perdu' if objet.etat == EtatObjet.PERDU else 'reclame') for objet in perdus_reclames
+    ] + [_diapositive(objet, 'trouve') for objet in trouves]
+    return diapositives or DIAPOSITIVES_PAR_DEFAUT
+
+
+def diapositives():
+    """Diapositives du carrousel, lues dans le cache (calculées une fois par version)."""
+    cle = f"{PREFIXE}:carrousel:v{version()}"
+    resultat = cache.get(cle)
+    if resultat is None:
+        resultat = calculer_diapositives()
+        cache.set(cle, resultat, timeout=_duree())
+    return resultat
+
+
+# =========================
+# 📄 PAGE ANONYME
+# =========================
+def cle_page():
+    """Clé de la page anonyme, à lire avant le rendu (une invalidation pendant le rendu la change)."""
+    return f"{PREFIXE}:page:v{version()}"
+
+
+def page_anonyme(cle):
+    """``(contenu, type de contenu)`` de la page anonyme en cache, ou None."""
+    return cache.get(cle)
+
+
+def memoriser_page_anonyme(cle, response):
+    cache.set(cle, (response.content, response["Content-Type"]), timeout=_duree())
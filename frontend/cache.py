@@ -0,0 +1,115 @@
+"""
+Cache des tableaux de bord (citoyen, policier, administrateur).
+
+Le contexte de chaque tableau de bord est calculé une fois puis servi depuis
+le cache Django (mémoire locale, fichier ou Redis selon ``CACHES``).
+
+Plutôt que de rechercher et supprimer les clés à invalider, chaque clé
+embarque un numéro de version :
+
+- ``dashboard:version:objets`` est incrémentée à chaque modification d'un
+  objet, d'une déclaration ou d'une restitution : elle invalide tous les
+  tableaux de bord d'un coup ;
+- ``dashboard:version:utilisateur:<id>`` est incrémentée à chaque
+  modification d'un utilisateur : elle n'invalide que son tableau de bord.
+
+Les anciennes entrées ne sont plus jamais lues et expirent d'elles-mêmes.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+PREFIXE = "dashboard"
+CLE_VERSION_OBJETS = f"{PREFIXE}:version:objets"
+CLE_SUCCES = f"{PREFIXE}:compteur:succes"
+CLE_ECHECS = f"{PREFIXE}:compteur:echecs"
+ROLES = ("citoyen", "policier", "admin")
+DUREE = 300
+
+
+def _cle_version_utilisateur(utilisateur_id):
+    return f"{PREFIXE}:version:utilisateur:{utilisateur_id}"
+
+
+def _version(cle):
+    version = cache.get(cle)
+    if version is None:
+        # Version initiale unique : une clé perdue (éviction, redémarrage)
+        # ne doit pas retomber sur une ancienne entrée encore en cache.
+        version = time.time_ns()
+        if not cache.add(cle, version, timeout=None):
+            version = cache.get(cle, version)
+    return version
+
+
+def _incrementer(cle):
+    try:
+        return cache.incr(cle)
+    except ValueError:
+        # Clé absente (jamais lue ou évincée)
+        version = time.time_ns()
+        cache.set(cle, version, timeout=None)
+        return version
+
+
+def invalider_objets():
+    """Invalide tous les tableaux de bord (objets, déclarations, restitutions)."""
+    _incrementer(CLE_VERSION_OBJETS)
+
+
+def invalider_utilisateur(utilisateur_id):
+    """Invalide le tableau de bord d'un utilisateur."""
+    _incrementer(_cle_version_utilisateur(utilisateur_id))
+
+
+def cle_tableau_de_bord(role, utilisateur=None):
+    """Clé versionnée du tableau de bord ``role`` (par utilisateur pour un citoyen)."""
+    if role not in ROLES:
+        raise ValueError(f"Rôle inconnu : {role}")
+    version = _version(CLE_VERSION_OBJETS)
+    if role == "citoyen":
+        version_utilisateur = _version(_cle_version_utilisateur(utilisateur.pk))
+        return f"{PREFIXE}:{role}:{utilisateur.pk}:v{version}.{version_utilisateur}"
+    return f"{PREFIXE}:{role}:v{version}"
+
+
+def _compter(cle):
+    try:
+        cache.incr(cle)
+    except ValueError:
+        if not cache.add(cle, 1, timeout=None):
+            cache.incr(cle)
+
+
+def contexte_en_cache(role, calculer, utilisateur=None):
+    """
+    Contexte du tableau de bord ``role`` : lu dans le cache ou calculé par
+    ``calculer()`` (qui doit renvoyer un dict sérialisable) puis mis en cache.
+    """
+    cle = cle_tableau_de_bord(role, utilisateur)
+    contexte = cache.get(cle)
+    if contexte is not None:
+        _compter(CLE_SUCCES)
+        return contexte
+    _compter(CLE_ECHECS)
+    contexte = calculer()
+    cache.set(cle, contexte, timeout=getattr(settings, "DASHBOARD_CACHE_TIMEOUT", DUREE))
+    return contexte
+
+
+def compteurs():
+    """Nombre de succès et d'échecs du cache depuis le dernier ``reinitialiser_compteurs``."""
+    valeurs = cache.get_many([CLE_SUCCES, CLE_ECHECS])
+    succes = valeurs.get(CLE_SUCCES, 0)
+    echecs = valeurs.get(CLE_ECHECS, 0)
+    total = succes + echecs
+    return {
+        "succes": succes,
+        "echecs": echecs,
+        "taux": succes / total if total else 0.0,
+    }
+
+
+def reinitialiser_compteurs():
+    cache.delete_many([CLE_SUCCES, CLE_ECHECS])
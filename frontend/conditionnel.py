@@ -0,0 +1,128 @@
+"""
+GET conditionnels des listes d'objets perdus/trouvés et du détail d'un objet.
+
+Chaque page a un filigrane : la date de dernière modification
+(``updated_at``) des déclarations de la liste et de leurs objets, ou de
+l'objet affiché. Il est lu dans le cache sous une clé qui embarque la
+version des objets (voir ``frontend.cache``) : la première requête après
+une modification le recalcule (un agrégat), les suivantes ne touchent pas
+la base avant de répondre 304.
+
+Une suppression ne laisse pas de ``updated_at`` : sa date est mémorisée
+(signaux, après le commit) et compte dans le filigrane des listes.
+
+L'``ETag`` combine le filigrane, l'URL complète (recherche, page, position)
+et, pour un utilisateur connecté, sa version de cache (menu, réclamations).
+Comme pour l'accueil, ``Last-Modified`` n'est envoyé qu'aux visiteurs
+anonymes : un autre compte sur le même navigateur ne doit pas recevoir 304.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from backend.objets.models import Declaration, EtatObjet, Objet
+
+from .cache import CLE_VERSION_OBJETS, _cle_version_utilisateur, _version
+
+PREFIXE = "conditionnel"
+CLE_SUPPRESSION = f"{PREFIXE}:suppression"
+DUREE = 300
+
+# Liste -> état initial de ses déclarations (leurs objets peuvent en sortir en changeant d'état)
+LISTES = {
+    "objets_perdus": EtatObjet.PERDU,
+    "objets_trouves": EtatObjet.TROUVE,
+}
+
+
+def noter_suppression():
+    """Date la dernière suppression d'objet ou de déclaration."""
+    cache.set(CLE_SUPPRESSION, timezone.now(), timeout=None)
+
+
+def _en_cache(cle, calculer):
+    cle = f"{PREFIXE}:{cle}:v{_version(CLE_VERSION_OBJETS)}"
+    valeur = cache.get(cle)
+    if valeur is None:
+        valeur = calculer()
+        if valeur is not None:
+            cache.set(cle, valeur, timeout=getattr(settings, "LISTES_CACHE_TIMEOUT", DUREE))
+    return valeur
+
+
+def _plus_recente(*dates):
+    dates = [d for d in dates if d is not None]
+    return max(dates) if dates else None
+
+
+def filigrane_liste(liste):
+    """Dernière modification des déclarations de ``liste`` et de leurs objets."""
+    def calculer():
+        dates = Declaration.objects.filter(etat_initial=LISTES[liste]).aggregate(
+            declaration=Max("updated_at"), objet=Max("objet__updated_at"),
+        )
+        # Liste vide : la date courante, pour avoir tout de même un filigrane
+        return _plus_recente(dates["declaration"], dates["objet"]) or timezone.now()
+
+    return _plus_recente(_en_cache(f"liste:{liste}", calculer), cache.get(CLE_SUPPRESSION))
+
+
+def filigrane_objet(pk):
+    """Dernière modification de l'objet ``pk`` (None s'il n'existe pas)."""
+    return _en_cache(
+        f"objet:{pk}", lambda: Objet.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+    )
+
+
+def etag(request, filigrane):
+    utilisateur = request.user
+    parties = [request.get_full_path(), filigrane.isoformat()]
+    if utilisateur.is_authenticated:
+        parties.append(f"u{utilisateur.pk}.{_version(_cle_version_utilisateur(utilisateur.pk))}")
+    return hashlib.sha256("|".join(parties).encode()).hexdigest()[:32]
+
+
+def get_conditionnel(filigrane):
+    """
+    Décorateur de vue : ``ETag``/``Last-Modified`` tirés de
+    ``filigrane(*args, **kwargs)`` (arguments de l'URL), réponses 304 et
+    en-têtes de cache (``Vary: Cookie``, revalidation systématique).
+    """
+    def _filigrane(request, *args, **kwargs):
+        # Lu une fois par requête (ETag puis Last-Modified)
+        if not hasattr(request, "_filigrane"):
+            request._filigrane = filigrane(*args, **kwargs)
+        return request._filigrane
+
+    def _etag(request, *args, **kwargs):
+        date = _filigrane(request, *args, **kwargs)
+        return etag(request, date) if date else None
+
+    def _derniere_modification(request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return None
+        return _filigrane(request, *args, **kwargs)
+
+    def decorateur(vue):
+        vue_conditionnelle = condition(etag_func=_etag, last_modified_func=_derniere_modification)(vue)
+
+        @wraps(vue)
+        def enveloppe(request, *args, **kwargs):
+            response = vue_conditionnelle(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_vary_headers(response, ("Cookie",))
+                if request.user.is_authenticated:
+                    patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+                else:
+                    patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+            return response
+
+        return enveloppe
+
+    return decorateur
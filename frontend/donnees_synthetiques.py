@@ -0,0 +1,227 @@
+"""
+Données synthétiques réalistes pour mesurer l'application à l'échelle.
+
+``generer()`` crée, par ``bulk_create`` et de façon reproductible (graine),
+des commissariats, policiers, citoyens, objets avec leur déclaration,
+trouveurs et réclamants, restitutions, messages et notifications. Les
+signaux n'étant pas émis, ce qu'ils maintiennent est rempli directement
+(geohash, compteurs ``nb_reclamants``/``nb_trouveurs``) ou recalculé à la
+fin (statistiques mensuelles, caches des tableaux de bord et de l'accueil).
+
+Tout ce qui est créé est reconnaissable (adresses ``@synthetique.test``,
+noms d'utilisateur ``….syn``, codes ``SYN…``) et ``supprimer()`` le
+retire. Le suffixe évite toute collision avec un vrai compte ``admin0``.
+"""
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from backend.objets.models import Declaration, EtatObjet, Objet, Restitution, StatutRestitution
+from backend.objets.statistiques import reconstruire_statistiques
+from backend.objets.vocabulaire import COULEURS, DETAILS, LIEUX, MARQUES, OBJETS, PRECISIONS
+from backend.users.geo import encoder
+from backend.users.models import Commissariat, Message, Notification, Utilisateur
+from frontend import accueil
+from frontend.cache import invalider_objets
+
+DOMAINE = "synthetique.test"
+PREFIXE_CODE = "SYN"
+SUFFIXE_NOM = ".syn"
+PREFIXE_COMMISSARIAT = "Commissariat synthétique"
+MOT_DE_PASSE = "synthetique"
+TAILLE_LOT = 2000
+
+# Dakar et sa banlieue
+LATITUDES = (14.65, 14.80)
+LONGITUDES = (-17.52, -17.25)
+
+# État actuel de l'objet selon l'état initial de sa déclaration (poids)
+EVOLUTIONS = {
+    EtatObjet.PERDU: {EtatObjet.PERDU: 6, EtatObjet.RECLAME: 2, EtatObjet.EN_ATTENTE: 1, EtatObjet.RESTITUE: 1},
+    EtatObjet.TROUVE: {EtatObjet.TROUVE: 6, EtatObjet.RECLAME: 2, EtatObjet.EN_ATTENTE: 1, EtatObjet.RESTITUE: 1},
+}
+MESSAGES = [
+    "Bonjour, comment savoir si mon objet a été retrouvé ?",
+    "Je n'arrive pas à modifier ma déclaration.",
+    "Merci pour la restitution rapide de mon téléphone !",
+    "Quels documents apporter au commissariat ?",
+    "Mon objet apparaît deux fois dans la liste.",
+]
+NOTIFICATIONS = [
+    "Un citoyen a signalé avoir trouvé votre objet.",
+    "Votre restitution est planifiée.",
+    "Un objet correspondant à votre déclaration a été déposé.",
+    "Votre objet a été restitué.",
+]
+
+
+def existe():
+    return Utilisateur.objects.filter(email__endswith=f"@{DOMAINE}").exists()
+
+
+def supprimer():
+    """Supprime les données synthétiques (objets d'abord : leurs déclarations suivent en cascade)."""
+    with transaction.atomic():
+        Objet.objects.filter(code_unique__startswith=PREFIXE_CODE).delete()
+        Utilisateur.objects.filter(email__endswith=f"@{DOMAINE}").delete()
+        Commissariat.objects.filter(nom__startswith=PREFIXE_COMMISSARIAT).delete()
+    reconstruire_statistiques()
+    invalider_objets()
+    accueil.invalider()
+
+
+def _position(hasard):
+    latitude = round(hasard.uniform(*LATITUDES), 6)
+    longitude = round(hasard.uniform(*LONGITUDES), 6)
+    return {"latitude": latitude, "longitude": longitude, "geohash": encoder(latitude, longitude)}
+
+
+def _utilisateurs(role, nombre, mot_de_passe, hasard, **champs):
+    return Utilisateur.objects.bulk_create(
+        [
+            Utilisateur(
+                username=f"{role}{i}{SUFFIXE_NOM}", email=f"{role}{i}@{DOMAINE}", password=mot_de_passe, role=role,
+                telephone=f"77{hasard.randrange(10**7):07d}",
+                **{nom: valeur(hasard) if callable(valeur) else valeur for nom, valeur in champs.items()},
+            )
+            for i in range(nombre)
+        ],
+        batch_size=TAILLE_LOT,
+    )
+
+
+def generer(citoyens=200, policiers=20, commissariats=10, objets=2000, messages=200,
+            notifications=1000, jours=365, graine=0):
+    """Crée les données synthétiques ; renvoie le nombre de lignes créées par table."""
+    hasard = random.Random(graine)
+    maintenant = timezone.now()
+    mot_de_passe = make_password(MOT_DE_PASSE)  # hachage coûteux : une seule fois
+
+    with transaction.atomic():
+        liste_commissariats = Commissariat.objects.bulk_create([
+            Commissariat(
+                nom=f"{PREFIXE_COMMISSARIAT} {i + 1}",
+                adresse=f"{hasard.choice(LIEUX)}, Dakar",
+                **_position(hasard),
+            )
+            for i in range(commissariats)
+        ])
+        liste_policiers = _utilisateurs(
+            "policier", policiers, mot_de_passe, hasard,
+            commissariat=lambda h: h.choice(liste_commissariats) if liste_commissariats else None,
+        )
+        liste_citoyens = _utilisateurs("citoyen", citoyens, mot_de_passe, hasard)
+        _utilisateurs("admin", 1, mot_de_passe, hasard, is_staff=True)
+
+        # Objets et déclaration initiale de chacun
+        initiaux = [hasard.choice([EtatObjet.PERDU, EtatObjet.TROUVE]) for _ in range(objets)]
+        liste_objets = Objet.objects.bulk_create(
+            [
+                Objet(
+                    nom=f"{hasard.choice(OBJETS).capitalize()} {hasard.choice(MARQUES)}",
+                    description=" ".join(hasard.sample(DETAILS, 2) + [hasard.choice(COULEURS)]),
+                    etat=hasard.choices(list(EVOLUTIONS[initial]), weights=EVOLUTIONS[initial].values())[0],
+                    code_unique=f"{PREFIXE_CODE}{graine:03d}{i:07d}",
+                )
+                for i, initial in enumerate(initiaux)
+            ],
+            batch_size=TAILLE_LOT,
+        )
+        declarations = []
+        for objet, initial in zip(liste_objets, initiaux):
+            localisee = hasard.random() < 0.6
+            declarations.append(Declaration(
+                citoyen=hasard.choice(liste_citoyens), objet=objet,
+                etat_initial=initial, type_declaration=initial,
+                date_declaration=maintenant - datetime.timedelta(days=hasard.uniform(0, jours)),
+                lieu=f"{hasard.choice(LIEUX)} {hasard.choice(PRECISIONS)}",
+                description=hasard.choice(DETAILS),
+                **(_position(hasard) if localisee else {}),
+            ))
+
+        # Trouveurs (objets perdus) et réclamants (objets trouvés) des objets suivis
+        liens = {"trouve_par": [], "reclame_par": []}
+        for declaration in declarations:
+            if declaration.objet.etat == declaration.etat_initial:
+                continue
+            champ = "trouve_par" if declaration.etat_initial == EtatObjet.PERDU else "reclame_par"
+            autres = hasard.sample(liste_citoyens, min(len(liste_citoyens), hasard.randint(1, 3)))
+            autres = [c for c in autres if c != declaration.citoyen] or autres[:1]
+            liens[champ].append((declaration, autres))
+            if champ == "trouve_par":
+                declaration.nb_trouveurs = len(autres)
+                declaration.proprietaire = declaration.citoyen
+            else:
+                declaration.nb_reclamants = len(autres)
+                declaration.proprietaire = autres[0]
+        Declaration.objects.bulk_create(declarations, batch_size=TAILLE_LOT)
+        total_liens = 0
+        for champ, couples in liens.items():
+            through = getattr(Declaration, champ).through
+            lignes = through.objects.bulk_create(
+                [through(declaration=d, utilisateur=u) for d, utilisateurs in couples for u in utilisateurs],
+                batch_size=TAILLE_LOT,
+            )
+            total_liens += len(lignes)
+
+        # Restitutions : effectuées (objets restitués) ou planifiées (en attente)
+        restitutions = []
+        for declaration in declarations:
+            etat = declaration.objet.etat
+            if etat not in (EtatObjet.RESTITUE, EtatObjet.EN_ATTENTE) or not liste_policiers:
+                continue
+            policier = hasard.choice(liste_policiers)
+            effectuee = etat == EtatObjet.RESTITUE
+            quand = declaration.date_declaration + datetime.timedelta(days=hasard.uniform(1, 20))
+            restitutions.append(Restitution(
+                objet=declaration.objet,
+                citoyen=declaration.proprietaire,
+                policier=policier,
+                restitue_par=policier if effectuee else None,
+                commissariat=policier.commissariat,
+                date_restitution=quand.date(),
+                heure_restitution=quand.time(),
+                statut=StatutRestitution.EFFECTUEE if effectuee else StatutRestitution.PLANIFIEE,
+            ))
+        Restitution.objects.bulk_create(restitutions, batch_size=TAILLE_LOT)
+
+        liste_messages = []
+        for _ in range(messages):
+            citoyen = hasard.choice(liste_citoyens)
+            repondu = hasard.random() < 0.5
+            envoi = maintenant - datetime.timedelta(days=hasard.uniform(0, jours))
+            liste_messages.append(Message(
+                expediteur=citoyen, nom=citoyen.username, email=citoyen.email,
+                contenu=hasard.choice(MESSAGES), date_envoi=envoi,
+                reponse="Merci, nous revenons vers vous." if repondu else None,
+                date_reponse=envoi + datetime.timedelta(hours=hasard.uniform(1, 72)) if repondu else None,
+                lu=repondu or hasard.random() < 0.3, traite=repondu,
+            ))
+        Message.objects.bulk_create(liste_messages, batch_size=TAILLE_LOT)
+
+        destinataires = liste_citoyens + liste_policiers
+        Notification.objects.bulk_create(
+            [
+                Notification(user=hasard.choice(destinataires), message=hasard.choice(NOTIFICATIONS), lu=hasard.random() < 0.5)
+                for _ in range(notifications if destinataires else 0)
+            ],
+            batch_size=TAILLE_LOT,
+        )
+
+    reconstruire_statistiques()
+    invalider_objets()
+    accueil.invalider()
+    return {
+        "commissariats": len(liste_commissariats),
+        "policiers": len(liste_policiers),
+        "citoyens": len(liste_citoyens),
+        "objets": len(liste_objets),
+        "declarations": len(declarations),
+        "trouveurs_reclamants": total_liens,
+        "restitutions": len(restitutions),
+        "messages": len(liste_messages),
+        "notifications": notifications if destinataires else 0,
+    }
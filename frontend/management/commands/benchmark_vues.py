@@ -0,0 +1,260 @@
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+
+from backend.objets.models import Declaration, EtatObjet, Objet, Restitution, StatutRestitution
+from backend.users.models import Commissariat, Message, Notification, Utilisateur
+from frontend import urls
+
+# Rôle de l'utilisateur connecté pour chaque route (citoyen par défaut)
+ANONYMES = {"home", "contact"}
+POLICIERS = {
+    "dashboard_policier", "liste_objets_declares", "maj_objet", "objets_restitues",
+    "historique_restitutions", "planifier_restitution", "marquer_restitue", "annuler_restitution",
+    "supprimer_restitution", "objets_trouves_attente", "supprimer_objet", "objets_reclames",
+    "export_preuves", "objets_perdus_trouves", "objets_trouves_reclames",
+}
+ADMINS = {
+    "dashboard_admin", "gerer_commissariats", "gerer_utilisateurs", "creer_administrateur",
+    "modifier_administrateur", "supprimer_administrateur", "liste_citoyens", "bannir_citoyen",
+    "debannir_citoyen", "gerer_policiers", "creer_policier", "modifier_policier", "supprimer_policier",
+    "preuve_restitution_pdf", "liste_messages", "repondre_message", "voir_stats",
+    "ajax_ajouter_commissariat", "ajax_modifier_commissariat", "ajax_supprimer_commissariat",
+}
+MODELES = (Utilisateur, Commissariat, Objet, Declaration, Restitution, Message, Notification)
+
+
+def _derniere(queryset):
+    return queryset.order_by("-id").first()
+
+
+class Echantillon:
+    """Lignes existantes servant à remplir les paramètres des routes, et leurs utilisateurs."""
+
+    def __init__(self):
+        self.citoyen = (
+            Utilisateur.objects.filter(role="citoyen")
+            .annotate(nombre=Count("declaration")).order_by("-nombre", "id").first()
+        )
+        self.policier = _derniere(Utilisateur.objects.filter(role="policier", commissariat__isnull=False)) \
+            or _derniere(Utilisateur.objects.filter(role="policier"))
+        self.admin = _derniere(Utilisateur.objects.filter(role="admin"))
+        self.perdue = _derniere(Declaration.objects.filter(etat_initial=EtatObjet.PERDU).select_related("citoyen"))
+        self.trouvee = _derniere(Declaration.objects.filter(etat_initial=EtatObjet.TROUVE).select_related("citoyen"))
+        self.reclamee = _derniere(Declaration.objects.filter(nb_reclamants__gt=0))
+        self.planifiee = _derniere(
+            Restitution.objects.filter(statut=StatutRestitution.PLANIFIEE).select_related("citoyen", "policier")
+        )
+        self.effectuee = _derniere(Restitution.objects.filter(statut=StatutRestitution.EFFECTUEE))
+        self.message = _derniere(Message.objects.all())
+        self.commissariat = _derniere(Commissariat.objects.all())
+
+    def utilisateur(self, nom):
+        if nom in ANONYMES:
+            return None, None
+        if nom in POLICIERS:
+            return "policier", self.policier
+        if nom in ADMINS:
+            return "admin", self.admin
+        return "citoyen", self.citoyen
+
+    def parametres(self, nom):
+        """``(url, rôle, utilisateur)`` de la route ``nom`` ; lève ``LookupError`` si rien ne convient."""
+        e = self
+
+        def exiger(ligne, quoi):
+            if ligne is None:
+                raise LookupError(f"aucun(e) {quoi}")
+            return ligne
+
+        routes = {
+            "objet_detail": lambda: ({"pk": exiger(e.perdue, "déclaration perdue").objet_id}, None),
+            "je_le_trouve": lambda: ({"declaration_id": exiger(e.perdue, "déclaration perdue").pk}, None),
+            "ca_m_appartient": lambda: ({"declaration_id": exiger(e.trouvee, "déclaration trouvée").pk}, None),
+            "modifier_declaration": lambda: ({"declaration_id": exiger(e.perdue, "déclaration perdue").pk}, e.perdue.citoyen),
+            "supprimer_declaration": lambda: ({"declaration_id": exiger(e.perdue, "déclaration perdue").pk}, e.perdue.citoyen),
+            "modifier_objet_trouve": lambda: ({"objet_id": exiger(e.trouvee, "déclaration trouvée").objet_id}, e.trouvee.citoyen),
+            "supprimer_objet_trouve": lambda: ({"objet_id": exiger(e.trouvee, "déclaration trouvée").objet_id}, e.trouvee.citoyen),
+            "reclamer_objet": lambda: ({"restitution_id": exiger(e.planifiee, "restitution planifiée").pk}, e.planifiee.citoyen),
+            "maj_objet": lambda: ({"pk": exiger(e.perdue, "déclaration perdue").objet_id}, None),
+            "planifier_restitution": lambda: (
+                {"objet_id": exiger(e.reclamee, "déclaration réclamée").pk, "type_objet": "declaration"}, None
+            ),
+            "marquer_restitue": lambda: ({"restitution_id": exiger(e.planifiee, "restitution planifiée").pk}, e.planifiee.policier),
+            "annuler_restitution": lambda: ({"pk": exiger(e.planifiee, "restitution planifiée").pk}, e.planifiee.policier),
+            "supprimer_restitution": lambda: ({"restitution_id": exiger(e.planifiee, "restitution planifiée").pk}, e.planifiee.policier),
+            "supprimer_objet": lambda: ({"objet_id": exiger(e.perdue, "déclaration perdue").objet_id}, None),
+            "modifier_administrateur": lambda: ({"pk": exiger(e.admin, "administrateur").pk}, None),
+            "supprimer_administrateur": lambda: ({"pk": exiger(e.admin, "administrateur").pk}, None),
+            "bannir_citoyen": lambda: ({"pk": exiger(e.citoyen, "citoyen").pk}, None),
+            "debannir_citoyen": lambda: ({"pk": exiger(e.citoyen, "citoyen").pk}, None),
+            "modifier_policier": lambda: ({"pk": exiger(e.policier, "policier").pk}, None),
+            "supprimer_policier": lambda: ({"pk": exiger(e.policier, "policier").pk}, None),
+            "preuve_restitution_pdf": lambda: ({"pk": exiger(e.effectuee, "restitution effectuée").pk}, None),
+            "repondre_message": lambda: ({"message_id": exiger(e.message, "message").pk}, None),
+            "ajax_modifier_commissariat": lambda: ({"pk": exiger(e.commissariat, "commissariat").pk}, None),
+            "ajax_supprimer_commissariat": lambda: ({"pk": exiger(e.commissariat, "commissariat").pk}, None),
+        }
+        kwargs, proprietaire = routes[nom]() if nom in routes else ({}, None)
+        role, utilisateur = self.utilisateur(nom)
+        if role and (proprietaire or utilisateur) is None:
+            raise LookupError(f"aucun utilisateur {role}")
+        return reverse(nom, kwargs=kwargs), role, proprietaire or utilisateur
+
+
+def routes_frontend():
+    return [motif.name for motif in urls.urlpatterns if isinstance(motif, URLPattern) and motif.name]
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _requete(client, url):
+    """GET de ``url`` dans une transaction annulée : les vues qui modifient la base restent rejouables."""
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as requetes:
+            debut = time.perf_counter()
+            reponse = client.get(url)
+            if reponse.streaming:
+                for _ in reponse.streaming_content:
+                    pass
+            duree = time.perf_counter() - debut
+        transaction.set_rollback(True)
+    return reponse, len(requetes), duree
+
+
+def mesurer(client, url, repetitions):
+    _requete(client, url)  # échauffement : gabarits compilés, caches remplis
+    durees, nombres = [], []
+    for _ in range(repetitions):
+        reponse, nombre, duree = _requete(client, url)
+        durees.append(duree * 1000)
+        nombres.append(nombre)
+    # Mémoire mesurée à part : tracemalloc ralentit l'exécution
+    tracemalloc.start()
+    try:
+        _requete(client, url)
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    resultat = {
+        "statut": reponse.status_code,
+        "requetes": max(nombres),
+        "duree_ms": {
+            "mediane": round(statistics.median(durees), 2),
+            "min": round(min(durees), 2),
+            "max": round(max(durees), 2),
+        },
+        "memoire_pic_ko": round(pic / 1024, 1),
+    }
+    if getattr(reponse, "exc_info", None):
+        resultat["erreur"] = repr(reponse.exc_info[1])
+    return resultat
+
+
+class Command(BaseCommand):
+    help = (
+        "Appelle chaque vue de frontend/urls.py avec le client de test (GET, transaction annulée) "
+        "et écrit un rapport JSON : requêtes SQL, durée et pic mémoire par route. "
+        "Préparer les données avec generer_donnees."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repetitions", type=int, default=5)
+        parser.add_argument("--routes", nargs="+", help="Noms des routes à mesurer (toutes par défaut).")
+        parser.add_argument("--sortie", default="benchmark_vues.json", help="Fichier du rapport JSON.")
+        parser.add_argument("--comparer", help="Rapport précédent : affiche les écarts.")
+
+    def handle(self, *args, **options):
+        noms = routes_frontend()
+        if options["routes"]:
+            inconnues = set(options["routes"]) - set(noms)
+            if inconnues:
+                raise CommandError(f"Routes inconnues : {', '.join(sorted(inconnues))}")
+            noms = [nom for nom in noms if nom in options["routes"]]
+        if not Declaration.objects.exists():
+            raise CommandError("Base vide : lancez d'abord generer_donnees.")
+
+        rapport = {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "base": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "repetitions": options["repetitions"],
+            "volumes": {modele.__name__: modele.objects.count() for modele in MODELES},
+            "routes": {},
+        }
+        echantillon = Echantillon()
+        clients = {}
+        # Fichiers écrits par les vues (preuves PDF…) : dossier temporaire. Les
+        # preuves sont rendues dans ce processus : un processus fils ne verrait
+        # ni la transaction en cours ni ce dossier.
+        with tempfile.TemporaryDirectory() as media, override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            MEDIA_ROOT=media,
+            EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+            PREUVES_EXPORT_PROCESSUS=0,
+        ):
+            for nom in noms:
+                try:
+                    url, role, utilisateur = echantillon.parametres(nom)
+                except LookupError as e:
+                    rapport["routes"][nom] = {"ignoree": str(e)}
+                    continue
+                cle = utilisateur.pk if utilisateur else None
+                if cle not in clients:
+                    clients[cle] = Client(raise_request_exception=False)
+                    if utilisateur:
+                        clients[cle].force_login(utilisateur)
+                resultat = {"url": url, "role": role}
+                resultat.update(mesurer(clients[cle], url, options["repetitions"]))
+                rapport["routes"][nom] = resultat
+
+        with open(options["sortie"], "w", encoding="utf-8") as fichier:
+            json.dump(rapport, fichier, ensure_ascii=False, indent=2)
+
+        precedent = {}
+        if options["comparer"]:
+            with open(options["comparer"], encoding="utf-8") as fichier:
+                precedent = json.load(fichier).get("routes", {})
+        self.afficher(rapport["routes"], precedent)
+        self.stdout.write(self.style.SUCCESS(f"Rapport écrit dans {options['sortie']}"))
+
+    def afficher(self, routes, precedent):
+        self.stdout.write(f"{'route':<32} {'statut':>6} {'requêtes':>9} {'médiane (ms)':>13} {'mémoire (ko)':>13}")
+        for nom, resultat in routes.items():
+            if "ignoree" in resultat:
+                self.stdout.write(f"{nom:<32} ignorée : {resultat['ignoree']}")
+                continue
+            requetes = str(resultat["requetes"])
+            mediane = f"{resultat['duree_ms']['mediane']:.1f}"
+            ancien = precedent.get(nom, {})
+            if "requetes" in ancien:
+                requetes += f" ({resultat['requetes'] - ancien['requetes']:+d})"
+                mediane += f" ({resultat['duree_ms']['mediane'] - ancien['duree_ms']['mediane']:+.1f})"
+            self.stdout.write(
+                f"{nom:<32} {resultat['statut']:>6} {requetes:>9} {mediane:>13} {resultat['memoire_pic_ko']:>13}"
+            )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from frontend.cache import compteurs, invalider_objets, reinitialiser_compteurs
+
+
+class Command(BaseCommand):
+    help = "Affiche les compteurs de succès/échecs du cache des tableaux de bord."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reinitialiser", action="store_true", help="Remet les compteurs à zéro.")
+        parser.add_argument("--invalider", action="store_true", help="Invalide tous les tableaux de bord.")
+
+    def handle(self, *args, **options):
+        c = compteurs()
+        self.stdout.write(
+            f"Succès : {c['succes']}  Échecs : {c['echecs']}  Taux de succès : {c['taux']:.1%}"
+        )
+        if options["invalider"]:
+            invalider_objets()
+            self.stdout.write(self.style.SUCCESS("Tableaux de bord invalidés."))
+        if options["reinitialiser"]:
+            reinitialiser_compteurs()
+            self.stdout.write(self.style.SUCCESS("Compteurs remis à zéro."))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from frontend import donnees_synthetiques
+
+
+class Command(BaseCommand):
+    help = (
+        "Génère des données synthétiques réalistes (citoyens, policiers, commissariats, objets, "
+        "déclarations avec trouveurs/réclamants, restitutions, messages, notifications). "
+        "À lancer sur une base dédiée aux mesures."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--citoyens", type=int, default=200)
+        parser.add_argument("--policiers", type=int, default=20)
+        parser.add_argument("--commissariats", type=int, default=10)
+        parser.add_argument("--objets", type=int, default=2000, help="Un objet par déclaration.")
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument("--notifications", type=int, default=1000)
+        parser.add_argument("--jours", type=int, default=365, help="Ancienneté maximale des déclarations.")
+        parser.add_argument("--graine", type=int, default=0)
+        parser.add_argument("--vider", action="store_true", help="Supprime d'abord les données synthétiques existantes.")
+        parser.add_argument("--indexer", action="store_true", help="Recalcule ensuite l'index de recherche.")
+
+    def handle(self, *args, **options):
+        if options["vider"]:
+            donnees_synthetiques.supprimer()
+        elif donnees_synthetiques.existe():
+            raise CommandError("Des données synthétiques existent déjà : relancez avec --vider.")
+
+        debut = time.perf_counter()
+        volumes = donnees_synthetiques.generer(
+            citoyens=options["citoyens"],
+            policiers=options["policiers"],
+            commissariats=options["commissariats"],
+            objets=options["objets"],
+            messages=options["messages"],
+            notifications=options["notifications"],
+            jours=options["jours"],
+            graine=options["graine"],
+        )
+        for table, nombre in volumes.items():
+            self.stdout.write(f"{table:>22} : {nombre}")
+        if options["indexer"]:
+            call_command("reindexer_recherche", stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Données générées en {time.perf_counter() - debut:.1f} s "
+            f"(mot de passe : {donnees_synthetiques.MOT_DE_PASSE})."
+        ))
@@ -0,0 +1,143 @@
+"""
+Instrumentation des requêtes HTTP.
+
+Pour chaque requête : nombre de requêtes SQL, temps passé en base, temps de
+rendu des gabarits et durée totale, journalisés sur une ligne ``clé=valeur``
+(logger ``frontend.middleware``, détail dans ``extra["instrumentation"]``).
+Une même requête SQL (paramètres exclus) exécutée au moins
+``INSTRUMENTATION_SEUIL_DOUBLONS`` fois signale un N+1 probable
+(avertissement). Avec ``INSTRUMENTATION_SERVER_TIMING``, les mêmes mesures
+sont renvoyées dans l'en-tête ``Server-Timing`` (onglet Réseau du
+navigateur).
+
+Désactivé (``INSTRUMENTATION_ACTIVE = False``, par défaut), le middleware
+lève ``MiddlewareNotUsed`` au démarrage : Django le retire de la chaîne et il
+ne coûte rien. Les réponses en flux (exports ZIP, fichiers) ne sont mesurées
+que jusqu'au début de l'envoi.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+SEUIL_DOUBLONS = 5
+LONGUEUR_SQL_JOURNAL = 300
+
+_mesure_courante = ContextVar("mesure_courante", default=None)
+
+
+class Mesure:
+    """Compteurs d'une requête HTTP ; sert aussi d'``execute_wrapper`` pour les connexions."""
+
+    def __init__(self):
+        self.requetes = 0
+        self.duree_bd = 0.0
+        self.duree_rendu = 0.0
+        self.sql = Counter()
+        self._profondeur_rendu = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duree_bd += time.perf_counter() - debut
+            self.requetes += 1
+            self.sql[sql] += 1
+
+    def doublons(self, seuil):
+        """``[(sql, répétitions), …]`` des requêtes exécutées au moins ``seuil`` fois."""
+        return [(sql, nombre) for sql, nombre in self.sql.most_common() if nombre >= seuil]
+
+
+def _render_mesure(render):
+    def render_mesure(self, context):
+        mesure = _mesure_courante.get()
+        # Hors mesure, ou gabarit inclus dans un autre : déjà compté par le parent
+        if mesure is None or mesure._profondeur_rendu:
+            return render(self, context)
+        mesure._profondeur_rendu += 1
+        debut = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            mesure.duree_rendu += time.perf_counter() - debut
+            mesure._profondeur_rendu -= 1
+
+    render_mesure.original = render
+    return render_mesure
+
+
+def _mesurer_les_rendus():
+    # Même principe que l'instrumentation des tests de Django (Template._render)
+    if not hasattr(Template.render, "original"):
+        Template.render = _render_mesure(Template.render)
+
+
+def _ms(secondes):
+    return round(secondes * 1000, 1)
+
+
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTATION_ACTIVE", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, "INSTRUMENTATION_SERVER_TIMING", False)
+        self.seuil_doublons = getattr(settings, "INSTRUMENTATION_SEUIL_DOUBLONS", SEUIL_DOUBLONS)
+        _mesurer_les_rendus()
+
+    def __call__(self, request):
+        mesure = Mesure()
+        jeton = _mesure_courante.set(mesure)
+        debut = time.perf_counter()
+        try:
+            with ExitStack() as pile:
+                for connexion in connections.all():
+                    pile.enter_context(connexion.execute_wrapper(mesure))
+                response = self.get_response(request)
+        finally:
+            _mesure_courante.reset(jeton)
+        total = time.perf_counter() - debut
+
+        self.journaliser(request, response, mesure, total)
+        if self.server_timing:
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={_ms(mesure.duree_bd)};desc="{mesure.requetes} requetes SQL"',
+                f"rendu;dur={_ms(mesure.duree_rendu)}",
+                f"total;dur={_ms(total)}",
+            ])
+        return response
+
+    def journaliser(self, request, response, mesure, total):
+        correspondance = getattr(request, "resolver_match", None)
+        vue = correspondance.view_name if correspondance else "-"
+        doublons = mesure.doublons(self.seuil_doublons)
+        donnees = {
+            "vue": vue,
+            "methode": request.method,
+            "chemin": request.path,
+            "statut": response.status_code,
+            "requetes": mesure.requetes,
+            "bd_ms": _ms(mesure.duree_bd),
+            "rendu_ms": _ms(mesure.duree_rendu),
+            "total_ms": _ms(total),
+            "doublons": len(doublons),
+        }
+        logger.info(
+            " ".join(f"{cle}=%s" for cle in donnees), *donnees.values(),
+            extra={"instrumentation": donnees},
+        )
+        for sql, nombre in doublons:
+            logger.warning(
+                "n_plus_1 vue=%s repetitions=%s sql=%s", vue, nombre, sql[:LONGUEUR_SQL_JOURNAL],
+                extra={"instrumentation": {"vue": vue, "repetitions": nombre, "sql": sql}},
+            )
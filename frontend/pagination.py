@@ -0,0 +1,156 @@
+"""
+Pagination par clé (« keyset » / seek) pour les listes.
+
+Au lieu d'un OFFSET, chaque page part des valeurs de tri du dernier élément de
+la page précédente : ``WHERE (date, id) < (:date, :id) ORDER BY date DESC, id
+DESC LIMIT n``. La page N coûte donc autant que la page 1 (avec un index
+composite sur les clés) et l'ordre reste stable même si des lignes sont
+insérées entre deux requêtes.
+
+Le curseur transmis dans l'URL est opaque : JSON encodé en base64.
+"""
+import base64
+import binascii
+import datetime
+import json
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+PAR_PAGE = 20
+PARAM_CURSEUR = "curseur"
+
+
+class CurseurInvalide(ValueError):
+    pass
+
+
+class _EncodeurCurseur(DjangoJSONEncoder):
+    # Contrairement à DjangoJSONEncoder, conserve les microsecondes :
+    # le curseur doit retrouver exactement la valeur stockée.
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+@dataclass
+class PageCurseur:
+    objets: list
+    curseur_suivant: str = None
+    curseur_precedent: str = None
+
+    @property
+    def a_suivant(self):
+        return self.curseur_suivant is not None
+
+    @property
+    def a_precedent(self):
+        return self.curseur_precedent is not None
+
+    def __iter__(self):
+        return iter(self.objets)
+
+    def __len__(self):
+        return len(self.objets)
+
+    def __bool__(self):
+        return bool(self.objets)
+
+
+def encoder_curseur(valeurs, sens):
+    donnees = json.dumps({"v": valeurs, "s": sens}, cls=_EncodeurCurseur)
+    return base64.urlsafe_b64encode(donnees.encode()).decode().rstrip("=")
+
+
+def decoder_curseur(curseur, nb_cles):
+    try:
+        brut = base64.urlsafe_b64decode(curseur + "=" * (-len(curseur) % 4))
+        donnees = json.loads(brut)
+        valeurs, sens = donnees["v"], donnees["s"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise CurseurInvalide(curseur)
+    if sens not in ("suivant", "precedent") or len(valeurs) != nb_cles:
+        raise CurseurInvalide(curseur)
+    return valeurs, sens
+
+
+def _valeur(obj, cle):
+    for attr in cle.lstrip("-").split("__"):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _filtre_apres(cles, valeurs, inverse=False):
+    """
+    Condition « strictement après le curseur » pour un tri sur ``cles`` :
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...
+    (> devient < pour une clé décroissante, et inversement si ``inverse``).
+    """
+    filtre = Q()
+    egalites = {}
+    for cle, valeur in zip(cles, valeurs):
+        nom = cle.lstrip("-")
+        decroissant = cle.startswith("-") != inverse
+        operateur = "lt" if decroissant else "gt"
+        filtre |= Q(**egalites, **{f"{nom}__{operateur}": valeur})
+        egalites[nom] = valeur
+    return filtre
+
+
+def _inverser(cle):
+    return cle[1:] if cle.startswith("-") else "-" + cle
+
+
+def paginer(request, queryset, cles=None, par_page=None, param=PARAM_CURSEUR):
+    """
+    Renvoie la ``PageCurseur`` demandée par ``request.GET[param]``.
+
+    ``cles`` : champs de tri (par défaut l'``order_by`` du queryset) ; le
+    dernier doit être unique (``id``) pour garantir un ordre total.
+    """
+    cles = tuple(cles or queryset.query.order_by)
+    if not cles or cles[-1].lstrip("-") not in ("id", "pk"):
+        raise ValueError("La pagination par clé exige un tri terminé par 'id'.")
+    par_page = par_page or getattr(settings, "PAGINATION_PAR_PAGE", PAR_PAGE)
+
+    curseur = request.GET.get(param)
+    valeurs, sens = None, "suivant"
+    if curseur:
+        try:
+            valeurs, sens = decoder_curseur(curseur, len(cles))
+        except CurseurInvalide:
+            valeurs = None
+
+    qs = queryset
+    if valeurs is not None:
+        try:
+            qs = qs.filter(_filtre_apres(cles, valeurs, inverse=sens == "precedent"))
+        except (ValidationError, ValueError, TypeError):
+            # Curseur forgé : on repart de la première page
+            qs, valeurs = queryset, None
+    en_arriere = valeurs is not None and sens == "precedent"
+    ordre = [_inverser(c) for c in cles] if en_arriere else list(cles)
+
+    # Un élément de plus pour savoir s'il existe une page au-delà
+    objets = list(qs.order_by(*ordre)[:par_page + 1])
+    au_dela = len(objets) > par_page
+    objets = objets[:par_page]
+    if en_arriere:
+        objets.reverse()
+
+    def curseur_de(obj, sens_curseur):
+        return encoder_curseur([_valeur(obj, c) for c in cles], sens_curseur)
+
+    page = PageCurseur(objets=objets)
+    if objets:
+        # En reculant, la page suivante existe toujours (on en vient) ;
+        # en avançant, la précédente existe dès qu'on est parti d'un curseur.
+        if au_dela or en_arriere:
+            page.curseur_suivant = curseur_de(objets[-1], "suivant")
+        if au_dela if en_arriere else valeurs is not None:
+            page.curseur_precedent = curseur_de(objets[0], "precedent")
+    return page
@@ -0,0 +1,51 @@
+"""
+Invalidation du cache des tableaux de bord (voir ``frontend.cache``), de
+la page d'accueil (voir ``frontend.accueil``) et des filigranes des listes
+(voir ``frontend.conditionnel``).
+"""
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from backend.objets.models import Declaration, Objet, Restitution
+from backend.users.models import Utilisateur
+
+from . import accueil
+from .cache import invalider_objets, invalider_utilisateur
+from .conditionnel import noter_suppression
+
+
+@receiver(post_save, sender=Objet)
+@receiver(post_delete, sender=Objet)
+@receiver(post_save, sender=Declaration)
+@receiver(post_delete, sender=Declaration)
+@receiver(post_save, sender=Restitution)
+@receiver(post_delete, sender=Restitution)
+@receiver(m2m_changed, sender=Declaration.reclame_par.through)
+@receiver(m2m_changed, sender=Declaration.trouve_par.through)
+def invalider_tableaux_de_bord(sender, **kwargs):
+    # Après le commit : une lecture concurrente ne doit pas remettre en
+    # cache l'état d'avant la transaction.
+    transaction.on_commit(invalider_objets)
+
+
+@receiver(post_save, sender=Utilisateur)
+@receiver(post_delete, sender=Utilisateur)
+def invalider_tableau_de_bord_utilisateur(sender, instance, **kwargs):
+    utilisateur_id = instance.pk
+    transaction.on_commit(lambda: invalider_utilisateur(utilisateur_id))
+
+
+@receiver(post_save, sender=Objet)
+@receiver(post_delete, sender=Objet)
+def invalider_accueil(sender, **kwargs):
+    # Après le commit, et après les miniatures (signaux de backend.objets,
+    # enregistrés avant) : le carrousel recalculé pointe vers elles.
+    transaction.on_commit(accueil.invalider)
+
+
+@receiver(post_delete, sender=Objet)
+@receiver(post_delete, sender=Declaration)
+def dater_suppression(sender, **kwargs):
+    # Les listes perdent une ligne sans qu'aucun updated_at ne change
+    transaction.on_commit(noter_suppression)
@@ -1,3 +1,611 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import logging
+import os
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from backend.objets.models import Declaration, EtatObjet, Objet, Restitution
+from backend.users.models import Commissariat, Message, Utilisateur
+from frontend import donnees_synthetiques
+from frontend.cache import cle_tableau_de_bord, compteurs, contexte_en_cache
+from frontend.management.commands.benchmark_vues import routes_frontend
+from frontend.middleware import InstrumentationMiddleware
+from frontend.pagination import encoder_curseur, paginer
+
+
+# =========================
+# 📄 PAGINATION PAR CLÉ
+# =========================
+class PaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        debut = timezone.now()
+        # Deux messages par instant pour vérifier le départage par id
+        for i in range(25):
+            Message.objects.create(
+                nom=f"m{i}", email="m@example.com", contenu="...",
+                date_envoi=debut - timedelta(minutes=i // 2),
+            )
+        cls.attendus = list(Message.objects.order_by("-date_envoi", "-id"))
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def page(self, curseur=None, par_page=10):
+        params = {"curseur": curseur} if curseur else {}
+        request = self.factory.get("/", params)
+        return paginer(request, Message.objects.order_by("-date_envoi", "-id"), par_page=par_page)
+
+    def test_parcours_complet_avant_et_arriere(self):
+        p1 = self.page()
+        self.assertFalse(p1.a_precedent)
+        p2 = self.page(p1.curseur_suivant)
+        p3 = self.page(p2.curseur_suivant)
+        self.assertFalse(p3.a_suivant)
+        self.assertEqual(p1.objets + p2.objets + p3.objets, self.attendus)
+
+        retour = self.page(p3.curseur_precedent)
+        self.assertEqual(retour.objets, p2.objets)
+        self.assertTrue(retour.a_suivant)
+        debut = self.page(retour.curseur_precedent)
+        self.assertEqual(debut.objets, p1.objets)
+        self.assertFalse(debut.a_precedent)
+
+    def test_insertion_concurrente_ne_decale_pas_la_page(self):
+        p1 = self.page()
+        Message.objects.create(nom="nouveau", email="n@example.com", contenu="...")
+        p2 = self.page(p1.curseur_suivant)
+        self.assertEqual(p2.objets, self.attendus[10:20])
+
+    def test_curseur_invalide_renvoie_la_premiere_page(self):
+        self.assertEqual(self.page("n'importe-quoi").objets, self.attendus[:10])
+
+    def test_nombre_de_requetes_constant(self):
+        curseur = self.page(self.page().curseur_suivant).curseur_suivant
+        with self.assertNumQueries(1):
+            self.page(curseur)
+
+    def test_curseur_forge_renvoie_la_premiere_page(self):
+        curseur = encoder_curseur(["pas-une-date", 3], "suivant")
+        self.assertEqual(self.page(curseur).objets, self.attendus[:10])
+
+
+# =========================
+# 🗄️ CACHE DES TABLEAUX DE BORD
+# =========================
+CACHE_LOCAL = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=CACHE_LOCAL)
+class CacheTableauxDeBordTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.awa = Utilisateur.objects.create_user(
+            username="awa", email="awa@example.com", password="x", role="citoyen"
+        )
+        cls.modou = Utilisateur.objects.create_user(
+            username="modou", email="modou@example.com", password="x", role="citoyen"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.calculs = 0
+
+    def calculer(self):
+        self.calculs += 1
+        return {"calcul": self.calculs}
+
+    def lire(self, role="policier", utilisateur=None):
+        return contexte_en_cache(role, self.calculer, utilisateur=utilisateur)
+
+    def test_succes_et_echecs(self):
+        self.assertEqual(self.lire(), {"calcul": 1})
+        self.assertEqual(self.lire(), {"calcul": 1})
+        self.assertEqual(self.calculs, 1)
+        self.assertEqual(compteurs(), {"succes": 1, "echecs": 1, "taux": 0.5})
+
+    def test_cle_par_role_et_par_citoyen(self):
+        cles = {
+            cle_tableau_de_bord("policier"),
+            cle_tableau_de_bord("admin"),
+            cle_tableau_de_bord("citoyen", self.awa),
+            cle_tableau_de_bord("citoyen", self.modou),
+        }
+        self.assertEqual(len(cles), 4)
+        with self.assertRaises(ValueError):
+            cle_tableau_de_bord("inconnu")
+
+    def test_modification_d_une_declaration_invalide_tout(self):
+        self.lire()
+        self.lire("citoyen", self.awa)
+        with self.captureOnCommitCallbacks(execute=True):
+            objet = Objet.objects.create(nom="Clés", etat=EtatObjet.PERDU)
+            Declaration.objects.create(
+                citoyen=self.awa, objet=objet, etat_initial=EtatObjet.PERDU,
+                type_declaration="perdu",
+            )
+        self.assertEqual(self.lire(), {"calcul": 3})
+        self.assertEqual(self.lire("citoyen", self.awa), {"calcul": 4})
+
+    def test_modification_d_un_utilisateur_n_invalide_que_lui(self):
+        self.lire()
+        self.lire("citoyen", self.awa)
+        self.lire("citoyen", self.modou)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.awa.first_name = "Awa"
+            self.awa.save()
+        self.assertEqual(self.lire(), {"calcul": 1})
+        self.assertEqual(self.lire("citoyen", self.modou), {"calcul": 3})
+        self.assertEqual(self.lire("citoyen", self.awa), {"calcul": 4})
+
+    def test_invalidation_apres_commit_seulement(self):
+        self.lire()
+        with self.captureOnCommitCallbacks(execute=False) as rappels:
+            Objet.objects.create(nom="Sac")
+            self.assertEqual(self.lire(), {"calcul": 1})
+        self.assertTrue(rappels)
+
+
+class CacheFichierTableauxDeBordTests(CacheTableauxDeBordTests):
+    def setUp(self):
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        reglages = override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": dossier.name,
+        }})
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        super().setUp()
+
+
+# =========================
+# 📍 PRÈS DE MOI
+# =========================
+class LocalisationVuesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citoyen = Utilisateur.objects.create_user(
+            username="awa", email="awa@example.com", password="x", role="citoyen"
+        )
+
+        def trouve(nom, latitude=None, longitude=None):
+            objet = Objet.objects.create(nom=nom, etat=EtatObjet.TROUVE)
+            return Declaration.objects.create(
+                citoyen=cls.citoyen, objet=objet, etat_initial=EtatObjet.TROUVE,
+                type_declaration=EtatObjet.TROUVE, latitude=latitude, longitude=longitude,
+            )
+
+        cls.plateau = trouve("Sac Plateau", 14.6708, -17.4381)
+        cls.rufisque = trouve("Sac Rufisque", 14.7156, -17.2733)
+        cls.sans_position = trouve("Sac sans position")
+
+    def setUp(self):
+        self.client.force_login(self.citoyen)
+
+    def test_filtre_pres_de_moi(self):
+        reponse = self.client.get(reverse("objets_trouves"), {"lat": "14.6750", "lon": "-17.4420", "rayon": "5"})
+        declarations = list(reponse.context["declarations"])
+        self.assertEqual(declarations, [self.plateau])
+        self.assertLess(declarations[0].distance, 1)
+
+        # Rayon plus large : Rufisque (~19 km) apparaît aussi
+        reponse = self.client.get(reverse("objets_trouves"), {"lat": "14.6750", "lon": "-17.4420", "rayon": "25"})
+        self.assertCountEqual(reponse.context["declarations"], [self.plateau, self.rufisque])
+
+    def test_position_invalide_ignoree(self):
+        for params in ({"lat": "abc", "lon": "1"}, {"lat": "95", "lon": "0"}, {"lat": "", "lon": ""}):
+            reponse = self.client.get(reverse("objets_trouves"), params)
+            self.assertEqual(len(reponse.context["declarations"]), 3)
+
+    def test_commissariat_le_plus_proche_suggere(self):
+        Commissariat.objects.create(nom="Rufisque", adresse="-", latitude=14.7156, longitude=-17.2733)
+        centre = Commissariat.objects.create(nom="Central", adresse="-", latitude=14.6690, longitude=-17.4370)
+        Commissariat.objects.create(nom="Sans position", adresse="-")
+
+        reponse = self.client.get(reverse("planifier_restitution", args=[self.plateau.id, "declaration"]))
+        self.assertEqual(reponse.context["commissariat_suggere"], centre)
+        self.assertContains(reponse, "Suggéré : Central")
+
+        reponse = self.client.get(reverse("planifier_restitution", args=[self.sans_position.id, "declaration"]))
+        self.assertIsNone(reponse.context["commissariat_suggere"])
+
+
+# =========================
+# 📋 OBJETS RÉCLAMÉS
+# =========================
+class ObjetsReclamesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.policier = Utilisateur.objects.create_user(
+            username="agent", email="agent@example.com", password="x", role="policier"
+        )
+        cls.proprietaire, cls.reclamant, cls.trouveur = (
+            Utilisateur.objects.create_user(
+                username=nom, email=f"{nom}@example.com", password="x", role="citoyen"
+            )
+            for nom in ("awa", "binta", "cheikh")
+        )
+
+    def setUp(self):
+        self.client.force_login(self.policier)
+
+    def creer_en_masse(self, nombre):
+        """Déclarations réclamées et trouvées, sans signaux (bulk_create)."""
+        objets = Objet.objects.bulk_create(
+            Objet(nom=f"Objet {i}", etat=EtatObjet.RECLAME) for i in range(nombre)
+        )
+        declarations = Declaration.objects.bulk_create(
+            Declaration(
+                citoyen=self.proprietaire, objet=objet,
+                etat_initial=EtatObjet.PERDU if i % 2 else EtatObjet.TROUVE,
+                type_declaration=EtatObjet.PERDU if i % 2 else EtatObjet.TROUVE,
+                nb_reclamants=1, nb_trouveurs=1, a_apparier=False,
+            )
+            for i, objet in enumerate(objets)
+        )
+        for champ, utilisateur in (("reclame_par", self.reclamant), ("trouve_par", self.trouveur)):
+            through = getattr(Declaration, champ).through
+            through.objects.bulk_create(
+                through(declaration=declaration, utilisateur=utilisateur) for declaration in declarations
+            )
+
+    def requetes(self):
+        with CaptureQueriesContext(connection) as requetes:
+            reponse = self.client.get(reverse("objets_reclames"))
+        self.assertEqual(reponse.status_code, 200)
+        return len(requetes)
+
+    def test_principaux_et_restitution_planifiee(self):
+        objet = Objet.objects.create(nom="Sac", etat=EtatObjet.RECLAME)
+        declaration = Declaration.objects.create(
+            citoyen=self.trouveur, objet=objet, etat_initial=EtatObjet.TROUVE, type_declaration=EtatObjet.TROUVE,
+        )
+        declaration.reclame_par.add(self.proprietaire, self.reclamant)
+        declaration.trouve_par.add(self.trouveur)
+        restitution = Restitution.objects.create(objet=objet, citoyen=self.proprietaire)
+        Declaration.objects.create(citoyen=self.proprietaire, etat_initial=EtatObjet.PERDU, type_declaration=EtatObjet.PERDU)
+
+        reponse = self.client.get(reverse("objets_reclames"))
+        [dec] = reponse.context["declarations"]
+        self.assertEqual(dec.reclamant_principal, self.proprietaire)
+        self.assertEqual(dec.trouveur_principal, self.trouveur)
+        self.assertEqual(dec.restitution_planifiee, restitution)
+        self.assertContains(reponse, "Restitution planifiée")
+
+    def test_acces_policiers_et_administrateurs(self):
+        administrateur = Utilisateur.objects.create_user(
+            username="chef", email="chef@example.com", password="x", role="admin"
+        )
+        self.client.force_login(administrateur)
+        self.assertEqual(self.client.get(reverse("objets_reclames")).status_code, 200)
+        self.client.force_login(self.reclamant)
+        self.assertEqual(self.client.get(reverse("objets_reclames")).status_code, 302)
+
+    def test_nombre_de_requetes_constant(self):
+        self.creer_en_masse(10)
+        peu = self.requetes()
+        self.creer_en_masse(9990)
+        self.assertEqual(self.requetes(), peu)
+
+
+# =========================
+# ⏱️ INSTRUMENTATION
+# =========================
+@override_settings(INSTRUMENTATION_ACTIVE=True, INSTRUMENTATION_SERVER_TIMING=True, INSTRUMENTATION_SEUIL_DOUBLONS=3)
+class InstrumentationTests(TestCase):
+    def test_inactif_retire_de_la_chaine(self):
+        with override_settings(INSTRUMENTATION_ACTIVE=False):
+            with self.assertRaises(MiddlewareNotUsed):
+                InstrumentationMiddleware(lambda request: HttpResponse())
+
+    def test_mesures_journalisees_et_en_tete(self):
+        with self.assertLogs("frontend.middleware", "INFO") as journal:
+            reponse = self.client.get(reverse("home"))
+        ligne = journal.records[0]
+        self.assertEqual(ligne.instrumentation["vue"], "home")
+        self.assertGreater(ligne.instrumentation["requetes"], 0)
+        self.assertGreater(ligne.instrumentation["rendu_ms"], 0)
+        self.assertIn("requetes=", ligne.getMessage())
+        self.assertRegex(reponse["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ requetes SQL", rendu;dur=[\d.]+, total;dur=[\d.]+$')
+
+    def test_n_plus_1_signale(self):
+        def vue(request):
+            list(Message.objects.order_by("id")[:1])
+            for i in range(4):
+                Message.objects.filter(id=i).exists()
+            return HttpResponse()
+
+        with self.assertLogs("frontend.middleware", "INFO") as journal:
+            InstrumentationMiddleware(vue)(RequestFactory().get("/"))
+        avertissements = [r for r in journal.records if r.levelname == "WARNING"]
+        self.assertEqual(len(avertissements), 1)
+        self.assertEqual(avertissements[0].instrumentation["repetitions"], 4)
+        self.assertEqual(journal.records[0].instrumentation["requetes"], 5)
+
+
+# =========================
+# 🏋️ DONNÉES SYNTHÉTIQUES ET BENCHMARK
+# =========================
+class BenchmarkVuesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.volumes = donnees_synthetiques.generer(
+            citoyens=8, policiers=3, commissariats=2, objets=60, messages=5, notifications=10, graine=1
+        )
+
+    def test_donnees_coherentes(self):
+        self.assertEqual(self.volumes["declarations"], 60)
+        for champ, compteur in (("reclame_par", "nb_reclamants"), ("trouve_par", "nb_trouveurs")):
+            through = getattr(Declaration, champ).through
+            for declaration in Declaration.objects.filter(**{f"{compteur}__gt": 0}):
+                self.assertEqual(through.objects.filter(declaration=declaration).count(), getattr(declaration, compteur))
+        self.assertTrue(Restitution.objects.exists())
+
+        donnees_synthetiques.supprimer()
+        self.assertFalse(donnees_synthetiques.existe())
+        self.assertFalse(Declaration.objects.exists())
+
+    def test_noms_distincts_des_vrais_comptes(self):
+        donnees_synthetiques.supprimer()
+        Utilisateur.objects.create_user(username="admin0", email="admin0@example.com", password="x", role="admin")
+        Utilisateur.objects.create_user(username="citoyen1", email="c1@example.com", password="x", role="citoyen")
+        donnees_synthetiques.generer(citoyens=2, policiers=1, commissariats=1, objets=4, messages=1, notifications=1)
+        self.assertTrue(Utilisateur.objects.filter(username="citoyen1.syn").exists())
+        donnees_synthetiques.supprimer()
+        self.assertEqual(sorted(Utilisateur.objects.values_list("username", flat=True)), ["admin0", "citoyen1"])
+
+    def test_rapport_de_toutes_les_routes(self):
+        # Erreurs des vues (500) : consignées dans le rapport, pas dans la sortie des tests
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        sortie = os.path.join(dossier.name, "rapport.json")
+
+        call_command("benchmark_vues", repetitions=1, sortie=sortie, stdout=open(os.devnull, "w"))
+        with open(sortie, encoding="utf-8") as fichier:
+            rapport = json.load(fichier)
+        self.assertEqual(list(rapport["routes"]), routes_frontend())
+        self.assertEqual(rapport["volumes"]["Declaration"], 60)
+        mesuree = rapport["routes"]["objets_reclames"]
+        self.assertEqual(mesuree["statut"], 200)
+        self.assertGreater(mesuree["requetes"], 0)
+        # Transactions annulées : les vues de suppression n'ont rien supprimé
+        self.assertEqual(Declaration.objects.count(), 60)
+
+
+# =========================
+# 🏠 ACCUEIL EN CACHE
+# =========================
+@override_settings(CACHES=CACHE_LOCAL)
+class AccueilTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_page_anonyme_en_cache_et_304(self):
+        Objet.objects.create(nom="Parapluie rouge", etat=EtatObjet.PERDU)
+        premiere = self.client.get(reverse("home"))
+        self.assertContains(premiere, "Parapluie rouge")
+        self.assertIn("Cookie", premiere["Vary"])
+        self.assertIn("public", premiere["Cache-Control"])
+
+        with self.assertNumQueries(0):
+            seconde = self.client.get(reverse("home"))
+        self.assertEqual(seconde.content, premiere.content)
+        self.assertEqual(seconde["ETag"], premiere["ETag"])
+
+        reponse = self.client.get(reverse("home"), HTTP_IF_NONE_MATCH=premiere["ETag"])
+        self.assertEqual(reponse.status_code, 304)
+        reponse = self.client.get(reverse("home"), HTTP_IF_MODIFIED_SINCE=premiere["Last-Modified"])
+        self.assertEqual(reponse.status_code, 304)
+
+    def test_modification_d_objet_invalide(self):
+        premiere = self.client.get(reverse("home"))
+        self.assertContains(premiere, "Slide par défaut")
+        with self.captureOnCommitCallbacks(execute=True):
+            Objet.objects.create(nom="Montre Casio", etat=EtatObjet.TROUVE)
+
+        reponse = self.client.get(reverse("home"), HTTP_IF_NONE_MATCH=premiere["ETag"])
+        self.assertEqual(reponse.status_code, 200)
+        self.assertContains(reponse, "Montre Casio")
+        self.assertNotEqual(reponse["ETag"], premiere["ETag"])
+
+    def test_utilisateur_connecte(self):
+        anonyme = self.client.get(reverse("home"))
+        citoyen = Utilisateur.objects.create_user(
+            username="ndeye", email="ndeye@example.com", password="x", role="citoyen"
+        )
+        self.client.force_login(citoyen)
+        reponse = self.client.get(reverse("home"))
+        self.assertContains(reponse, "ndeye")
+        self.assertNotEqual(reponse["ETag"], anonyme["ETag"])
+        self.assertIn("private", reponse["Cache-Control"])
+        self.assertNotIn("Last-Modified", reponse)
+        self.assertEqual(self.client.get(reverse("home"), HTTP_IF_NONE_MATCH=reponse["ETag"]).status_code, 304)
+
+
+# =========================
+# 🔁 GET CONDITIONNELS
+# =========================
+@override_settings(CACHES=CACHE_LOCAL)
+class GetConditionnelTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citoyen = Utilisateur.objects.create_user(
+            username="moussa", email="moussa@example.com", password="x", role="citoyen"
+        )
+        cls.autre = Utilisateur.objects.create_user(
+            username="fatou", email="fatou@example.com", password="x", role="citoyen"
+        )
+
+        def declarer(nom, etat):
+            objet = Objet.objects.create(nom=nom, etat=etat)
+            return Declaration.objects.create(
+                citoyen=cls.citoyen, objet=objet, etat_initial=etat, type_declaration=etat,
+            )
+
+        cls.perdue = declarer("Portefeuille", EtatObjet.PERDU)
+        cls.trouvee = declarer("Lunettes", EtatObjet.TROUVE)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.citoyen)
+
+    def obtenir(self, nom, **entetes):
+        return self.client.get(reverse(nom), **entetes)
+
+    def test_304_sans_rendu(self):
+        premiere = self.obtenir("objets_perdus")
+        self.assertContains(premiere, "Portefeuille")
+        self.assertIn("Cookie", premiere["Vary"])
+        self.assertIn("private", premiere["Cache-Control"])
+        self.assertNotIn("Last-Modified", premiere)
+
+        # Filigrane en cache : session et utilisateur seulement
+        with self.assertNumQueries(2):
+            reponse = self.obtenir("objets_perdus", HTTP_IF_NONE_MATCH=premiere["ETag"])
+        self.assertEqual(reponse.status_code, 304)
+        self.assertEqual(reponse.content, b"")
+
+        # Autre recherche, autre ETag
+        self.assertNotEqual(self.client.get(reverse("objets_perdus"), {"q": "sac"})["ETag"], premiere["ETag"])
+
+    def test_modifications_par_liste(self):
+        perdus = self.obtenir("objets_perdus")["ETag"]
+        trouves = self.obtenir("objets_trouves")["ETag"]
+
+        # Une déclaration trouvée modifiée ne change que la liste des objets trouvés
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trouvee.lieu = "Gare"
+            self.trouvee.save()
+        self.assertEqual(self.obtenir("objets_perdus", HTTP_IF_NONE_MATCH=perdus).status_code, 304)
+        self.assertEqual(self.obtenir("objets_trouves", HTTP_IF_NONE_MATCH=trouves).status_code, 200)
+
+        # Un trouveur ajouté (compteur mis à jour par update())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.perdue.trouve_par.add(self.autre)
+        self.assertEqual(self.obtenir("objets_perdus", HTTP_IF_NONE_MATCH=perdus).status_code, 200)
+        perdus = self.obtenir("objets_perdus")["ETag"]
+
+        # Une suppression ne laisse pas d'updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            self.perdue.objet.delete()
+        reponse = self.obtenir("objets_perdus", HTTP_IF_NONE_MATCH=perdus)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertNotContains(reponse, "Portefeuille")
+
+    def test_etag_par_utilisateur(self):
+        etag = self.obtenir("objets_perdus")["ETag"]
+        self.client.force_login(self.autre)
+        self.assertEqual(self.obtenir("objets_perdus", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_objet_detail_200_puis_304(self):
+        url = reverse("objet_detail", args=[self.perdue.objet_id])
+        premiere = self.client.get(url)
+        self.assertEqual(premiere.status_code, 200)
+        self.assertTemplateUsed(premiere, "frontend/objets/objet_detail.html")
+        self.assertContains(premiere, "Portefeuille")
+
+        reponse = self.client.get(url, HTTP_IF_NONE_MATCH=premiere["ETag"])
+        self.assertEqual(reponse.status_code, 304)
+        self.assertEqual(reponse["ETag"], premiere["ETag"])
+
+        # Objet modifié : nouvelle page
+        with self.captureOnCommitCallbacks(execute=True):
+            objet = Objet.objects.get(pk=self.perdue.objet_id)
+            objet.description = "Cuir marron"
+            objet.save()
+        self.assertContains(self.client.get(url, HTTP_IF_NONE_MATCH=premiere["ETag"]), "Cuir marron")
+
+    def test_objet_detail_anonyme(self):
+        self.client.logout()
+        url = reverse("objet_detail", args=[self.perdue.objet_id])
+        plus_tard = http_date((self.perdue.objet.updated_at + timedelta(minutes=1)).timestamp())
+        reponse = self.client.get(url, HTTP_IF_MODIFIED_SINCE=plus_tard)
+        self.assertEqual(reponse.status_code, 304)
+        self.assertIn("public", reponse["Cache-Control"])
+        self.assertIn("Last-Modified", reponse)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Objet.objects.get(pk=self.perdue.objet_id).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=plus_tard).status_code, 404)
+
+
+# =========================
+# 🔄 FLUX DES MODIFICATIONS (API)
+# =========================
+@override_settings(FLUX_MARGE_SECONDES=0)
+class FluxModificationsVueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.citoyen = Utilisateur.objects.create_user(
+            username="partenaire", email="partenaire@example.com", password="x", role="citoyen"
+        )
+        for i in range(30):
+            Objet.objects.create(nom=f"Téléphone {i}", description="Écran fissuré, coque bleue " * 5)
+
+    def test_authentification_requise(self):
+        reponse = self.client.get(reverse("flux_modifications"))
+        self.assertEqual(reponse.status_code, 401)
+
+    def test_json_compresse_et_curseur(self):
+        self.client.force_login(self.citoyen)
+        reponse = self.client.get(reverse("flux_modifications"), {"limite": 20}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(reponse["Content-Encoding"], "gzip")
+        self.assertIn("no-store", reponse["Cache-Control"])
+
+        donnees = json.loads(gzip.decompress(reponse.content))
+        self.assertEqual(len(donnees["objets"]), 20)
+        self.assertTrue(donnees["encore"])
+        suite = self.client.get(reverse("flux_modifications"), {"curseur": donnees["curseur"]}).json()
+        self.assertEqual(len(suite["objets"]), 10)
+        self.assertFalse(suite["encore"])
+
+    def test_citoyen_sans_restitutions_ni_coordonnees(self):
+        objet = Objet.objects.first()
+        Declaration.objects.create(
+            objet=objet, citoyen=self.citoyen, etat_initial=EtatObjet.PERDU, lieu="Plateau",
+            latitude=14.69, longitude=-17.44,
+        )
+        Restitution.objects.create(objet=objet, citoyen=self.citoyen)
+
+        self.client.force_login(self.citoyen)
+        donnees = self.client.get(reverse("flux_modifications")).json()
+        self.assertNotIn("restitutions", donnees)
+        self.assertNotIn("latitude", donnees["champs"]["declarations"])
+        self.assertNotIn("longitude", donnees["champs"]["declarations"])
+
+        policier = Utilisateur.objects.create_user(
+            username="agent", email="agent@example.com", password="x", role="policier"
+        )
+        self.client.force_login(policier)
+        donnees = self.client.get(reverse("flux_modifications")).json()
+        self.assertEqual(len(donnees["restitutions"]), 1)
+        self.assertIn("latitude", donnees["champs"]["declarations"])
+
+    def test_parametres_invalides(self):
+        self.client.force_login(self.citoyen)
+        self.assertEqual(self.client.get(reverse("flux_modifications"), {"curseur": "x"}).status_code, 400)
+        # Dates sans fuseau : refusées, pas d'erreur 500
+        for etat in (
+            {"p": {}, "s": 0, "e": "2030-01-01T00:00:00"},
+            {"p": {"objets": ["2030-01-01T00:00:00", 1]}, "s": 0, "e": timezone.now().isoformat()},
+        ):
+            curseur = base64.urlsafe_b64encode(json.dumps(etat).encode()).decode()
+            self.assertEqual(self.client.get(reverse("flux_modifications"), {"curseur": curseur}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("flux_modifications"), {"limite": "beaucoup"}).status_code, 400)
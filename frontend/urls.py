@@ -74,6 +74,7 @@ urlpatterns = [
 
     # Preuves PDF
     path("dashboard/admin/preuve-restitution/<int:pk>/", views.preuve_restitution_pdf, name="preuve_restitution_pdf"),
+    path("dashboard/policier/restitutions/export-preuves/", views.export_preuves, name="export_preuves"),
 
     # Messages citoyens
     path("dashboard/admin/messages/", views.liste_messages, name="liste_messages"),
@@ -99,5 +100,10 @@ urlpatterns = [
     path('commissariats/ajax/modifier/<int:pk>/', views.ajax_modifier_commissariat, name='ajax_modifier_commissariat'),
     path('commissariats/ajax/supprimer/<int:pk>/', views.ajax_supprimer_commissariat, name='ajax_supprimer_commissariat'),
 
+    # =========================
+    # API (applications mobiles et partenaires)
+    # =========================
+    path("api/modifications/", views.flux_modifications, name="flux_modifications"),
+
     
 ]
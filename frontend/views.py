@@ -1,6 +1,5 @@
 # views.py (réorganisé)
 
-from email.message import EmailMessage
 from functools import wraps
 import calendar
 import random
@@ -12,19 +11,34 @@ from django import forms
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.core.mail import send_mail, BadHeaderError
 from django.db import transaction
 from django.db.models import Count, Q, Prefetch
+from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition
 
 # Modèles & forms
 from backend.objets.models import (
     Objet, Declaration, Restitution, Commissariat,
     EtatObjet, StatutRestitution
 )
+from backend.objets.empreintes_visuelles import BITS as BITS_EMPREINTE, candidats_visuels
 from backend.objets.forms import DeclarationForm, RestitutionForm
+from backend.objets.recherche import rechercher_declarations
+from backend.objets.requetes import avec_declaration_initiale, resoudre_reclamations, resoudre_trouveurs
+from backend.objets.statistiques import (
+    IndexMensuel, dernier_instantane, evolution as evolution_statistiques, statistiques_declarations
+)
+from frontend import accueil
+from frontend.conditionnel import filigrane_liste, filigrane_objet, get_conditionnel
+from frontend.cache import contexte_en_cache
+from frontend.pagination import paginer
+from backend.users.courriels import envoyer_plus_tard, lien_definir_mot_de_passe
+from backend.users.geo import dans_un_rayon, distance_km, le_plus_proche
 from backend.users.models import Message, Utilisateur, Notification
 from backend.users.forms import (
     AdministrateurForm, CommissariatForm, ContactForm, MotifForm, PolicierForm,
@@ -67,65 +81,45 @@ def admin_required(view_func):
 
 
 
-def home(request):
-    # 🔹 Objets avec statut PERDU ou RECLAME
-    objets_perdus_reclames = Objet.objects.filter(etat__in=[EtatObjet.PERDU, EtatObjet.RECLAME]).order_by('-id')[:6]
-
-    # 🔹 Objets trouvés récents
-    objets_trouves = Objet.objects.filter(etat=EtatObjet.TROUVE).order_by('-id')[:6]
+# 🔹 Timeline restitution par la police
+ETAPES_RESTITUTION = [
+    {'icon': 'bi bi-clipboard-check', 'title': '⿡ Vérification de la déclaration', 'desc': "Le policier consulte la fiche de l’objet et valide l’identité du déclarant."},
+    {'icon': 'bi bi-person-badge', 'title': '⿢ Identification du propriétaire', 'desc': "Une vérification d’identité est effectuée à l’aide d’une pièce officielle."},
+    {'icon': 'bi bi-box-seam', 'title': '⿣ Restitution de l’objet', 'desc': "Le policier remet l’objet au propriétaire et enregistre la restitution."},
+    {'icon': 'bi bi-file-earmark-text', 'title': '⿤ Génération d’une preuve', 'desc': "Une attestation PDF est générée et remise au citoyen comme preuve."},
+]
 
-    # 🔸 Construction des slides dynamiques pour les objets perdus/reclamés
-    slides_perdus_reclames = [
-        {
-            'url': obj.image.url if obj.image else None,
-            'titre': obj.nom,
-            'description': (obj.description[:120] + "...") if obj.description else "",
-            'etat': obj.get_etat_display(),
-            'etat_type': 'perdu' if obj.etat == EtatObjet.PERDU else 'reclame'
-        }
-        for obj in objets_perdus_reclames
-    ]
 
-    # 🔸 Construction des slides dynamiques pour les objets trouvés
-    slides_trouves = [
-        {
-            'url': obj.image.url if obj.image else None,
-            'titre': obj.nom,
-            'description': (obj.description[:120] + "...") if obj.description else "",
-            'etat': obj.get_etat_display(),
-            'etat_type': 'trouve'
-        }
-        for obj in objets_trouves
-    ]
-
-    # 🔹 Fusionner les listes pour le carrousel
-    all_slides = slides_perdus_reclames + slides_trouves
-
-    # 🔹 Slides par défaut si aucun objet réel
-    default_slides = [
-        {'url': '/static/frontend/images/head2.jpg', 'titre': 'Aucun objet', 'description': 'Slide par défaut', 'etat_type': 'default'},
-        {'url': '/static/frontend/images/head1.jpg', 'titre': 'Aucun objet', 'description': 'Slide par défaut', 'etat_type': 'default'},
-        {'url': '/static/frontend/images/head3.jpg', 'titre': 'Aucun objet', 'description': 'Slide par défaut', 'etat_type': 'default'},
-    ]
+def _derniere_modification_accueil(request):
+    # Un utilisateur connecté dépend aussi de son profil : seul l'ETag fait foi
+    return None if request.user.is_authenticated else accueil.derniere_modification()
 
-    # 🔹 Si pas de slide réel, utiliser les slides par défaut
-    if not all_slides:
-        all_slides = default_slides
 
-    # 🔹 Timeline restitution par la police
-    steps = [
-        {'icon': 'bi bi-clipboard-check', 'title': '⿡ Vérification de la déclaration', 'desc': "Le policier consulte la fiche de l’objet et valide l’identité du déclarant."},
-        {'icon': 'bi bi-person-badge', 'title': '⿢ Identification du propriétaire', 'desc': "Une vérification d’identité est effectuée à l’aide d’une pièce officielle."},
-        {'icon': 'bi bi-box-seam', 'title': '⿣ Restitution de l’objet', 'desc': "Le policier remet l’objet au propriétaire et enregistre la restitution."},
-        {'icon': 'bi bi-file-earmark-text', 'title': '⿤ Génération d’une preuve', 'desc': "Une attestation PDF est générée et remise au citoyen comme preuve."},
-    ]
-
-    context = {
-        'all_slides': all_slides,
-        'steps': steps,
-    }
+@condition(etag_func=lambda request: accueil.etag(request.user), last_modified_func=_derniere_modification_accueil)
+def home(request):
+    # 🔹 Visiteur anonyme : page entière depuis le cache (voir frontend/accueil.py)
+    anonyme = not request.user.is_authenticated
+    cle = accueil.cle_page() if anonyme else None
+    en_cache = accueil.page_anonyme(cle) if anonyme else None
+    if en_cache is not None:
+        contenu, type_contenu = en_cache
+        response = HttpResponse(contenu, content_type=type_contenu)
+    else:
+        response = render(request, "frontend/home.html", {
+            # 🔸 Slides précalculées (objets perdus/réclamés puis trouvés, ou slides par défaut)
+            'all_slides': accueil.diapositives(),
+            'steps': ETAPES_RESTITUTION,
+        })
+        if anonyme:
+            accueil.memoriser_page_anonyme(cle, response)
 
-    return render(request, "frontend/home.html", context)
+    # Le menu dépend de la session : caches partagés et navigateurs doivent distinguer les cookies
+    patch_vary_headers(response, ("Cookie",))
+    if anonyme:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    else:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
 
 
 
@@ -167,8 +161,11 @@ def liste_messages(request):
     if not request.user.is_authenticated or request.user.role != 'admin':
         return redirect('login')
 
-    messages_citoyens = Message.objects.all()
-    return render(request, 'frontend/admin/liste_messages.html', {'messages_citoyens': messages_citoyens})
+    page = paginer(request, Message.objects.order_by('-date_envoi', '-id'))
+    return render(request, 'frontend/admin/liste_messages.html', {
+        'messages_citoyens': page,
+        'page': page,
+    })
 
 # =========================
 # ✉️ Répondre à un message
@@ -186,13 +183,11 @@ def repondre_message(request, message_id):
         message_obj.traite = True
         message_obj.save()
 
-        # Envoi de l’email au citoyen
-        send_mail(
-            subject=f"Réponse à votre message - Plateforme Objets Perdus",
+        # Envoi de l’email au citoyen (boîte d'envoi)
+        envoyer_plus_tard(
+            sujet=f"Réponse à votre message - Plateforme Objets Perdus",
             message=f"Bonjour {message_obj.nom},\n\nVoici la réponse de l'administrateur :\n\n{reponse}\n\nMerci pour votre message.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[message_obj.email],
-            fail_silently=False,
+            destinataires=[message_obj.email],
         )
 
         messages.success(request, f"Réponse envoyée à {message_obj.nom}.")
@@ -204,7 +199,7 @@ def repondre_message(request, message_id):
 
 
 @login_required
-
+@get_conditionnel(lambda: filigrane_liste("objets_perdus"))
 def objets_perdus(request):
     query = request.GET.get('q', '').strip()
 
@@ -216,24 +211,39 @@ def objets_perdus(request):
             Q(etat_initial=EtatObjet.PERDU) & 
             Q(objet__etat__in=[EtatObjet.PERDU, EtatObjet.RECLAME])
         )
-        .order_by('-date_declaration')
+        .order_by('-date_declaration', '-id')
     )
 
-    if query:
-        declarations = declarations.filter(objet__nom__icontains=query)
+    declarations = rechercher_declarations(declarations, query)
+    page = paginer(request, declarations)
 
     # Préparer les données pour le template
-    for dec in declarations:
+    for dec in page:
         dec.declarant = dec.citoyen
         dec.details_objet = dec.objet
         dec.est_reclame_par_user = request.user.is_authenticated and request.user in dec.reclame_par.all()
 
     return render(request, "frontend/objets/objets_perdus.html", {
-        "declarations": declarations,
+        "declarations": page,
+        "page": page,
         "query": query,
     })
 
+def position_demandee(request):
+    """``(latitude, longitude, rayon_km)`` des paramètres GET « près de moi », ou None."""
+    try:
+        latitude = float(request.GET["lat"])
+        longitude = float(request.GET["lon"])
+        rayon = float(request.GET.get("rayon") or settings.GEO_RAYON_DEFAUT_KM)
+    except (KeyError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180 and 0 < rayon <= settings.GEO_RAYON_MAX_KM):
+        return None
+    return latitude, longitude, rayon
+
+
 @login_required
+@get_conditionnel(lambda: filigrane_liste("objets_trouves"))
 def objets_trouves(request):
     query = request.GET.get("q", "").strip()
     
@@ -241,18 +251,26 @@ def objets_trouves(request):
     declarations = Declaration.objects.filter(
         Q(etat_initial=EtatObjet.TROUVE) &
         Q(objet__etat__in=[EtatObjet.TROUVE, EtatObjet.RECLAME])
-    ).select_related('citoyen', 'objet').order_by('-date_declaration')
+    ).select_related('citoyen', 'objet').order_by('-date_declaration', '-id')
     
-    if query:
-        declarations = declarations.filter(
-            Q(objet__nom__icontains=query) |
-            Q(description__icontains=query) |
-            Q(lieu__icontains=query)
-        )
+    declarations = rechercher_declarations(declarations, query)
+
+    # 🔹 « Près de moi » : déclarations localisées dans le rayon demandé
+    position = position_demandee(request)
+    if position:
+        declarations = dans_un_rayon(declarations, *position)
+    page = paginer(request, declarations)
+    if position:
+        for declaration in page:
+            declaration.distance = distance_km(
+                position[0], position[1], declaration.latitude, declaration.longitude
+            )
     
     context = {
-        "declarations": declarations.distinct(),
+        "declarations": page,
+        "page": page,
         "query": query,
+        "position": position,
         "EtatObjet": EtatObjet,
     }
     
@@ -260,6 +278,7 @@ def objets_trouves(request):
 
 
 
+@get_conditionnel(filigrane_objet)
 def objet_detail(request, pk):
     objet = get_object_or_404(Objet, pk=pk)
     return render(request, "frontend/objets/objet_detail.html", {"objet": objet})
@@ -286,98 +305,54 @@ import json
 
 @policier_required
 def dashboard_policier(request):
-    today = timezone.now()
-
-    # --- Labels des 6 derniers mois ---
-    months_labels = []
-    last_6_months = []
-    for i in range(5, -1, -1):
-        month = today - relativedelta(months=i)
-        months_labels.append(month.strftime("%b"))
-        last_6_months.append((month.year, month.month))
-
-    # --- Statistiques globales ---
-    nb_objets_perdus_trouves = Declaration.objects.filter(
-        etat_initial=EtatObjet.PERDU,
-        objet__etat=EtatObjet.RECLAME
-    ).count()
-
-    nb_objets_trouves_reclames = Declaration.objects.filter(
-        etat_initial=EtatObjet.TROUVE,
-        objet__etat=EtatObjet.RECLAME
-    ).count()
+    context = contexte_en_cache("policier", contexte_dashboard_policier)
+    return render(request, "frontend/policier/dashboard_policier.html", context)
 
-    nb_objets_trouves_attente = Declaration.objects.filter(
-        objet__etat=EtatObjet.EN_ATTENTE
-    ).count()
 
-    nb_restitutions = Declaration.objects.filter(
-        objet__etat=EtatObjet.RESTITUE
-    ).count()
+def contexte_dashboard_policier():
+    # --- Séries des 6 derniers mois et totaux, en une requête ---
+    stats = statistiques_declarations(nb_mois=6)
 
     stats_cards = [
         {
             "label": "Objets perdus & trouvés",
-            "count": nb_objets_perdus_trouves,
+            "count": stats.total("perdus_retrouves"),
             "icon": "📌",
             "url": reverse("objets_perdus_trouves")
         },
         {
             "label": "Objets trouvés & réclamés",
-            "count": nb_objets_trouves_reclames,
+            "count": stats.total("trouves_reclames"),
             "icon": "📌",
             "url": reverse("objets_trouves_reclames")
         },
         {
             "label": "Objets retrouvés (en attente)",
-            "count": nb_objets_trouves_attente,
+            "count": stats.total("en_attente"),
             "icon": "📦",
             "url": reverse("objets_trouves_attente")
         },
         {
             "label": "Objets restitués",
-            "count": nb_restitutions,
+            "count": stats.total("restitues"),
             "icon": "📂",
             "url": reverse("historique_restitutions")
         },
     ]
 
-    # --- Données par mois pour le graphique ---
-    def data_by_last_6_months(queryset):
-        data = []
-        for y, m in last_6_months:
-            count = queryset.filter(date_declaration__year=y, date_declaration__month=m).count()
-            data.append(count)
-        return data
-
-    data_perdus_trouves = data_by_last_6_months(
-        Declaration.objects.filter(etat_initial=EtatObjet.PERDU, objet__etat=EtatObjet.RECLAME)
-    )
-    data_trouves_reclames = data_by_last_6_months(
-        Declaration.objects.filter(etat_initial=EtatObjet.TROUVE, objet__etat=EtatObjet.RECLAME)
-    )
-    data_attente = data_by_last_6_months(
-        Declaration.objects.filter(objet__etat=EtatObjet.EN_ATTENTE)
-    )
-    data_restitues = data_by_last_6_months(
-        Declaration.objects.filter(objet__etat=EtatObjet.RESTITUE)
-    )
-
-    context = {
+    return {
         "stats_cards": stats_cards,
-        "chart_labels": json.dumps(months_labels),
-        "chart_perdus": json.dumps(data_perdus_trouves),
-        "chart_trouves": json.dumps(data_trouves_reclames),
-        "chart_attente": json.dumps(data_attente),
-        "chart_restitues": json.dumps(data_restitues),  # <-- nouveau dataset
+        "chart_labels": json.dumps(stats.labels("%b")),
+        "chart_perdus": json.dumps(stats.serie("perdus_retrouves")),
+        "chart_trouves": json.dumps(stats.serie("trouves_reclames")),
+        "chart_attente": json.dumps(stats.serie("en_attente")),
+        "chart_restitues": json.dumps(stats.serie("restitues")),
     }
 
-    return render(request, "frontend/policier/dashboard_policier.html", context)
-
 @policier_required
 def liste_objets_declares(request):
-    objets = Objet.objects.all()
-    return render(request, "frontend/policier/liste_objets_declares.html", {"objets": objets})
+    page = paginer(request, Objet.objects.order_by('-id'))
+    return render(request, "frontend/policier/liste_objets_declares.html", {"objets": page, "page": page})
 
 
 @policier_required
@@ -418,95 +393,64 @@ def supprimer_restitution(request, restitution_id):
 def objets_restitues(request):
     restitutions = Restitution.objects.select_related(
         'objet', 'citoyen', 'policier', 'commissariat'
-    ).order_by('-date_restitution')
-    return render(request, "frontend/objets/objets_restitues.html", {"restitutions": restitutions})
-
-
+    ).order_by('-date_restitution', '-heure_restitution', '-id')
+    page = paginer(request, restitutions)
+    return render(request, "frontend/objets/objets_restitues.html", {"restitutions": page, "page": page})
 
 
-def objets_reclames(request):
-    declarations = (
-        Declaration.objects
-        .select_related("objet", "citoyen")  # seulement FK
-        .prefetch_related("reclame_par", "trouve_par")  # M2M
-        .order_by("-date_declaration")
-    )
-
-    restitutions = Restitution.objects.filter(restitue_par__isnull=True)
-    restit_dict = {(r.objet.id, r.citoyen.id): r for r in restitutions}
-
-    for dec in declarations:
-        # Déterminer le réclamant / trouveur principal
-        if dec.etat_initial == EtatObjet.PERDU:
-            dec.principal = dec.citoyen  # Réclamant
-            dec.restitution_planifiee = restit_dict.get((dec.objet.id, dec.citoyen.id))
-        elif dec.etat_initial == EtatObjet.TROUVE:
-            dec.principal = dec.citoyen  # Déclarant / trouveur
-            dec.restitution_planifiee = None
-
-    return render(request, "frontend/objets/objets_reclames.html", {"declarations": declarations})
-
 @login_required
 @policier_ou_admin_required
 def historique_restitutions(request):
-    # Récupère toutes les restitutions d'objets restitués
-    restitutions = Restitution.objects.select_related(
-        'objet', 'citoyen', 'policier', 'restitue_par', 'commissariat'
-    ).filter(
-        objet__etat=EtatObjet.RESTITUE
-    ).order_by('-date_restitution', '-heure_restitution')
+    # Récupère toutes les restitutions d'objets restitués,
+    # avec la déclaration initiale et ses trouveurs préchargés
+    restitutions = avec_declaration_initiale(
+        Restitution.objects.select_related(
+            'objet', 'citoyen', 'policier', 'restitue_par', 'commissariat'
+        ).filter(
+            objet__etat=EtatObjet.RESTITUE
+        ).order_by('-date_restitution', '-heure_restitution', '-id')
+    )
+    page = paginer(request, restitutions)
 
-    for r in restitutions:
+    for r in page:
         r.proprietaire = r.citoyen
-
-        # Récupère la déclaration correspondant à l'état initial
-        declaration_initiale = r.objet.declarations.order_by('date_declaration').first()
-        if declaration_initiale:
-            r.etat_initial = declaration_initiale.etat_initial
-
-            # Détermine le(s) citoyen(s) qui ont trouvé l'objet
-            trouveurs = set()
-            if declaration_initiale.etat_initial == EtatObjet.TROUVE:
-                # Si l'objet était trouvé initialement, le déclarant est le trouveur
-                if declaration_initiale.citoyen:
-                    trouveurs.add(declaration_initiale.citoyen)
-            else:
-                # Sinon, récupère tous ceux listés dans trouve_par
-                for user in declaration_initiale.trouve_par.all():
-                    trouveurs.add(user)
-            r.trouveurs = list(trouveurs)
-        else:
-            r.etat_initial = 'N/A'
-            r.trouveurs = []
+        resoudre_trouveurs(r)
 
     return render(request, "frontend/policier/historique_restitutions.html", {
-        "restitutions": restitutions
+        "restitutions": page,
+        "page": page,
+        "commissariats": Commissariat.objects.order_by('nom'),
     })
 
+@login_required
+@policier_ou_admin_required
 def objets_reclames(request):
     """
-    Vue qui affiche les objets réclamés pour le policier.
-    Chaque objet a au moins un réclamant et un trouveur.
+    Vue qui affiche les objets réclamés pour le policier, avec pour chacun
+    le réclamant et le trouveur principaux et la restitution déjà planifiée.
+    Nombre de requêtes constant, quel que soit le nombre de déclarations.
     """
-    # On récupère toutes les déclarations dont l'objet a été réclamé
-    declarations = Declaration.objects.filter(reclame_par__isnull=False).distinct()
-
-    # Préparer chaque déclaration pour la template
-    for dec in declarations:
-        # On garantit qu'il y a au moins un réclamant
-        if dec.reclame_par.exists():
-            dec.reclamant_principal = dec.reclame_par.first()
-        else:
-            dec.reclamant_principal = None  # juste au cas où
+    # Compteur dénormalisé : ni jointure ni DISTINCT
+    declarations = (
+        Declaration.objects.filter(nb_reclamants__gt=0)
+        .select_related("objet", "citoyen")
+        .prefetch_related("reclame_par", "trouve_par")
+        .order_by("-date_declaration", "-id")
+    )
+    page = paginer(request, declarations)
+    resoudre_reclamations(page.objets)
 
-        # On garantit qu'il y a au moins un trouveur
-        if dec.trouve_par.exists():
-            dec.trouveur_principal = dec.trouve_par.first()
-        else:
-            dec.trouveur_principal = None
+    # Déclarations du type opposé dont la photo est proche (empreintes visuelles)
+    candidats = candidats_visuels(page.objets)
+    for dec in page:
+        dec.candidats_visuels = []
+        for distance, candidat in candidats.get(dec.id, []):
+            candidat.similarite = round(100 * (1 - distance / BITS_EMPREINTE))
+            dec.candidats_visuels.append(candidat)
 
     return render(request, "frontend/objets/objets_reclames.html", {
-        "declarations": declarations
+        "declarations": page,
+        "page": page,
     })
 
 
@@ -524,11 +468,9 @@ def objets_trouves_reclames(request):
             etat_initial=EtatObjet.TROUVE,
             objet__etat=EtatObjet.RECLAME
         )
-        .annotate(nb_reclamants=Count('reclame_par'))
-        .filter(nb_reclamants__gt=0)
+        .filter(nb_reclamants__gt=0)         # compteur dénormalisé
         .select_related('citoyen', 'objet')  # trouveur
         .prefetch_related('reclame_par')     # réclamants
-        .distinct()
     )
 
     # 🔹 Attributs dynamiques pour le template
@@ -556,15 +498,10 @@ def objets_perdus_trouves(request):
     declarations = Declaration.objects.filter(
         etat_initial=EtatObjet.PERDU,
         objet__etat=EtatObjet.RECLAME
-    ).distinct()
+    )
 
     # 🔹 Filtrage par recherche
-    if query:
-        declarations = declarations.filter(
-            Q(objet__nom__icontains=query) |
-            Q(description__icontains=query) |
-            Q(citoyen__username__icontains=query)
-        )
+    declarations = rechercher_declarations(declarations, query, avec_citoyen=True)
 
     # 🔹 Préfetch pour optimiser l'accès aux relations
     declarations = declarations.select_related('citoyen', 'objet').prefetch_related('trouve_par', 'reclame_par')
@@ -634,7 +571,14 @@ def planifier_restitution(request, objet_id, type_objet="declaration"):
     # 🔹 Options pour le formulaire
     trouveurs_options = declaration.trouve_par.all() or []
     reclamants_options = declaration.reclame_par.all() or []
-    commissariats = Commissariat.objects.all()
+    commissariats = list(Commissariat.objects.all())
+
+    # 🔹 Commissariat suggéré : le plus proche du lieu déclaré (s'il est localisé)
+    commissariat_suggere, distance_suggere = None, None
+    if declaration.est_localise:
+        commissariat_suggere, distance_suggere = le_plus_proche(
+            commissariats, declaration.latitude, declaration.longitude
+        )
 
     if request.method == "POST":
         # 🔹 Récupérer date, heure et commissariat
@@ -692,12 +636,10 @@ def planifier_restitution(request, objet_id, type_objet="declaration"):
 
         recipients = list(set(recipients))  # Supprimer les doublons
 
-        # 🔹 Envoyer le mail de notification
-        if recipients:
-            try:
-                send_mail(
-                    subject=f"[Restitution planifiée] {declaration.objet.nom}",
-                    message=f"""
+        # 🔹 Mettre le mail de notification en file d'attente
+        envoyer_plus_tard(
+            sujet=f"[Restitution planifiée] {declaration.objet.nom}",
+            message=f"""
 Bonjour,
 
 La restitution de l'objet '{declaration.objet.nom}' a été planifiée.
@@ -707,13 +649,9 @@ Date : {date_restitution}
 Heure : {heure_restitution}
 
 Merci de vous présenter avec vos pièces justificatives.
-                    """,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=recipients,
-                    fail_silently=False,
-                )
-            except Exception as e:
-                print(f"Erreur lors de l'envoi du mail: {e}")
+            """,
+            destinataires=recipients,
+        )
 
         messages.success(request, f"Restitution de '{declaration.objet.nom}' planifiée avec succès ✅")
         return redirect("objets_trouves_attente")
@@ -724,6 +662,8 @@ Merci de vous présenter avec vos pièces justificatives.
         "trouveurs_options": trouveurs_options,
         "reclamants_options": reclamants_options,
         "commissariats": commissariats,
+        "commissariat_suggere": commissariat_suggere,
+        "distance_suggere": distance_suggere,
         "today": timezone.now(),
         "now": timezone.now(),
     }
@@ -736,51 +676,13 @@ def marquer_restitue(request, restitution_id):
         id=restitution_id
     )
 
-    # 🔹 Marquer comme effectuée
+    # 🔹 Marquer comme effectuée : la preuve PDF sera générée (puis envoyée
+    # par mail) en arrière-plan par la commande generer_preuves
     restitution.statut = 'effectuee'
+    restitution.preuve_empreinte = ''
+    restitution.preuve_a_notifier = True
     restitution.save()  # met aussi l'objet à RESTITUE si save() est surchargé
 
-    # 🔹 Génération du PDF
-    try:
-        html_string = render_to_string(
-            'frontend/policier/preuve_restitution_pdf.html',
-            {'restitution': restitution}
-        )
-        pdf_file = HTML(string=html_string).write_pdf()
-    except Exception as e:
-        logger.error(f"Erreur génération PDF pour restitution {restitution.id}: {e}")
-        pdf_file = None
-
-    # 🔹 Préparer les destinataires
-    recipients = set()
-    if restitution.citoyen and restitution.citoyen.email:
-        recipients.add(restitution.citoyen.email)
-
-    for declaration in restitution.objet.declarations.all():
-        for user in declaration.trouve_par.all():
-            if user.email:
-                recipients.add(user.email)
-
-    # 🔹 Envoyer le mail avec pièce jointe PDF
-    if recipients:
-        try:
-            email_body_html = render_to_string(
-                'frontend/policier/email_restitution.html',  # template HTML facultatif
-                {'restitution': restitution}
-            )
-            email = EmailMessage(
-                subject=f"Restitution de l'objet '{restitution.objet.nom}' effectuée ✅",
-                body=f"Bonjour,\n\nLa restitution de l'objet '{restitution.objet.nom}' a été effectuée avec succès.\nVeuillez trouver la preuve en pièce jointe.",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=list(recipients),
-            )
-            if pdf_file:
-                email.attach(f"preuve_{restitution.objet.nom}.pdf", pdf_file, 'application/pdf')
-            email.send(fail_silently=False)
-            logger.info(f"Mail de restitution envoyé à {recipients}")
-        except Exception as e:
-            logger.error(f"Erreur envoi mail restitution {restitution.id}: {e}")
-
     # 🔹 Redirection vers la page des objets en attente
     return redirect('objets_trouves_attente')
 
@@ -817,59 +719,85 @@ def annuler_restitution(request, pk):
     return redirect('objets_trouves_attente')
 
 
-import base64
-from io import BytesIO
-from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from weasyprint import HTML
-import qrcode
-
-
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotModified, StreamingHttpResponse
+)
+from django.utils.text import slugify
+from backend.objets.export_preuves import restitutions_a_exporter, zip_preuves
+from backend.objets.preuves import generer_preuve_manquante, preuve_disponible, rendre_pdf
 
 
 def preuve_restitution_pdf(request, pk):
-    restitution = get_object_or_404(Restitution, pk=pk)
-
-    # 🔹 Déclaration de l'objet trouvé (pour le trouveur)
-    declaration_trouve = restitution.objet.declarations.filter(
-        etat_initial=EtatObjet.TROUVE
-    ).first()
-    trouveur_principal = declaration_trouve.trouve_par.first() if declaration_trouve else None
-
-    # 🔹 Déclaration de l'objet perdu (pour le réclamant)
-    declaration_perdu = restitution.objet.declarations.filter(
-        etat_initial=EtatObjet.PERDU
-    ).first()
-    reclamant_principal = declaration_perdu.reclame_par.first() if declaration_perdu else None
-
-    # 🔹 Policier ayant planifié
-    policier_planificateur = restitution.restitue_par or restitution.policier
-
-    # 🔹 QR Code
-    qr_data = f"http://ton-site.com/verifier-restitution/{restitution.id}/"
-    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=5, border=2)
-    qr.add_data(qr_data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    qr_code_base64 = base64.b64encode(buffered.getvalue()).decode()
+    restitution = get_object_or_404(
+        Restitution.objects.select_related('objet', 'citoyen', 'policier', 'restitue_par', 'commissariat'),
+        pk=pk
+    )
+    nom = f"preuve_restitution_{restitution.id}.pdf"
+
+    # 🔹 Restitution non effectuée : document provisoire, rendu à la demande
+    if restitution.statut != StatutRestitution.EFFECTUEE:
+        response = HttpResponse(rendre_pdf(restitution), content_type='application/pdf')
+        response['Content-Disposition'] = f'filename="{nom}"'
+        return response
+
+    # 🔹 Pas encore produite par le worker : rendue une fois puis conservée,
+    #    sous le même verrou que lui (ni double rendu ni double notification)
+    if not preuve_disponible(restitution):
+        restitution = generer_preuve_manquante(restitution.pk)
+        if restitution is None:
+            response = HttpResponse("Preuve en cours de génération, réessayez dans un instant.", status=503)
+            response['Retry-After'] = '5'
+            return response
+
+    etag = f'"{restitution.preuve_empreinte}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+
+    # 🔹 Fichier servi par le serveur web (X-Sendfile / X-Accel-Redirect) ou en flux
+    envoi = getattr(settings, 'PREUVES_ENVOI_FICHIER', '')
+    if envoi == 'x-accel-redirect':
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Accel-Redirect'] = settings.PREUVES_URL_INTERNE + restitution.preuve_pdf.name
+    elif envoi == 'x-sendfile':
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Sendfile'] = restitution.preuve_pdf.path
+    else:
+        response = FileResponse(restitution.preuve_pdf.open('rb'), content_type='application/pdf')
+    response['Content-Disposition'] = f'filename="{nom}"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=86400'
+    return response
 
-    context = {
-        'restitution': restitution,
-        'reclamant_principal': reclamant_principal,
-        'trouveur_principal': trouveur_principal,
-        'policier_planificateur': policier_planificateur,
-        'now': timezone.now(),
-        'qr_code': qr_code_base64,
-    }
 
-    html_string = render_to_string('frontend/policier/preuve_restitution_pdf.html', context)
-    pdf_file = HTML(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf()
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    response['Content-Disposition'] = f'filename="preuve_restitution_{restitution.id}.pdf"'
+@login_required
+@policier_ou_admin_required
+def export_preuves(request):
+    """Archive ZIP (en flux) des preuves d'un commissariat sur une période."""
+    commissariat_id = request.GET.get('commissariat')
+    if commissariat_id and not commissariat_id.isdigit():
+        return HttpResponseBadRequest("Commissariat invalide.")
+    if request.user.role != 'admin':
+        # Un policier n'exporte que les preuves de son commissariat
+        commissariat = request.user.commissariat
+        if commissariat is None or (commissariat_id and int(commissariat_id) != commissariat.pk):
+            messages.error(request, "⛔ Export limité aux preuves de votre commissariat.")
+            return redirect("home")
+    elif commissariat_id:
+        commissariat = get_object_or_404(Commissariat, pk=commissariat_id)
+    else:
+        # Par défaut, tous les commissariats pour un administrateur
+        commissariat = None
+    debut, fin = date_param(request, 'debut'), date_param(request, 'fin')
+
+    restitutions = restitutions_a_exporter(commissariat, debut, fin)
+    nom = "_".join(filter(None, [
+        "preuves",
+        slugify(commissariat.nom) if commissariat else "tous",
+        debut and debut.isoformat(),
+        fin and fin.isoformat(),
+    ]))
+    response = StreamingHttpResponse(zip_preuves(restitutions), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{nom}.zip"'
     return response
 
 
@@ -889,74 +817,50 @@ from backend.objets.models import Declaration, Objet, EtatObjet
 from backend.users.models import Utilisateur  # Import correct du modèle utilisateur
 
 def dashboard_admin(request):
-    # --- Statistiques globales ---
-    nb_objets_perdus = Declaration.objects.filter(etat_initial=EtatObjet.PERDU).count()
-    nb_objets_trouves = Declaration.objects.filter(etat_initial=EtatObjet.TROUVE).count()
-    nb_objets_en_attente = Declaration.objects.filter(etat_initial=EtatObjet.EN_ATTENTE).count()
+    context = dict(contexte_en_cache("admin", contexte_dashboard_admin))
+    context['user'] = request.user  # pour accéder à l'utilisateur connecté dans le template
+    return render(request, "frontend/admin/dashboard_admin.html", context)
+
+
+def contexte_dashboard_admin():
+    # --- Statistiques globales (service partagé avec dashboard_policier) ---
+    stats = statistiques_declarations(nb_mois=6)
     nb_objets_restitues = Objet.objects.filter(etat=EtatObjet.RESTITUE).count()
 
     stats_cards = [
-        {'label': 'Objets perdus', 'count': nb_objets_perdus, 'icon': '📦'},
-        {'label': 'Objets trouvés', 'count': nb_objets_trouves, 'icon': '🔍'},
-        {'label': 'Objets en attente', 'count': nb_objets_en_attente, 'icon': '⏳'},
+        {'label': 'Objets perdus', 'count': stats.total('perdus'), 'icon': '📦'},
+        {'label': 'Objets trouvés', 'count': stats.total('trouves'), 'icon': '🔍'},
+        {'label': 'Objets en attente', 'count': stats.total('en_attente'), 'icon': '⏳'},
         {'label': 'Objets restitués', 'count': nb_objets_restitues, 'icon': '✅'},
     ]
 
     # --- Données pour le graphique (6 derniers mois) ---
-    date_limite = now() - timedelta(days=180)
-    declarations = Declaration.objects.filter(date_declaration__gte=date_limite)
-    restitutions = Objet.objects.filter(etat=EtatObjet.RESTITUE, restitutions__date_restitution__gte=date_limite)
-
-    # Groupement par mois
-    declarations_par_mois = declarations.annotate(mois=TruncMonth('date_declaration')) \
-                                        .values('mois', 'etat_initial') \
-                                        .annotate(total=Count('id')) \
-                                        .order_by('mois')
-
-    restitutions_par_mois = restitutions.annotate(mois=TruncMonth('restitutions__date_restitution')) \
-                                       .values('mois') \
-                                       .annotate(total=Count('id')) \
-                                       .order_by('mois')
-
-    # Générer la liste des 6 derniers mois (chronologique)
-    mois_labels = [(now() - relativedelta(months=i)).strftime('%b %Y') for i in reversed(range(6))]
-
-    # Initialiser les datasets
-    chart_perdus = []
-    chart_trouves = []
-    chart_attente = []
-    chart_restitues = []
-
-    for mois in mois_labels:
-        chart_perdus.append(
-            sum(d['total'] for d in declarations_par_mois 
-                if d['etat_initial'] == EtatObjet.PERDU and d['mois'].strftime('%b %Y') == mois)
-        )
-        chart_trouves.append(
-            sum(d['total'] for d in declarations_par_mois 
-                if d['etat_initial'] == EtatObjet.TROUVE and d['mois'].strftime('%b %Y') == mois)
-        )
-        chart_attente.append(
-            sum(d['total'] for d in declarations_par_mois 
-                if d['etat_initial'] == EtatObjet.EN_ATTENTE and d['mois'].strftime('%b %Y') == mois)
-        )
-        chart_restitues.append(
-            sum(r['total'] for r in restitutions_par_mois 
-                if r['mois'].strftime('%b %Y') == mois)
-        )
+    # Déclarations : séries déjà calculées par le service (mois calendaires).
+    # Restitutions : une seule agrégation, indexée par mois.
+    restitutions_par_mois = IndexMensuel(
+        Restitution.objects
+        .filter(objet__etat=EtatObjet.RESTITUE, date_restitution__gte=stats.mois[0])
+        .annotate(mois=TruncMonth('date_restitution'))
+        .values('mois')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
 
-    context = {
+    mois_labels = stats.labels('%b %Y')
+    chart_perdus = stats.serie('perdus')
+    chart_trouves = stats.serie('trouves')
+    chart_attente = stats.serie('en_attente')
+    chart_restitues = restitutions_par_mois.serie(stats.mois)
+
+    return {
         'stats_cards': stats_cards,
         'chart_labels': mois_labels,
         'chart_perdus': chart_perdus,
         'chart_trouves': chart_trouves,
         'chart_attente': chart_attente,
         'chart_restitues': chart_restitues,
-        'user': request.user,  # pour accéder à l'utilisateur connecté dans le template
     }
 
-    return render(request, "frontend/admin/dashboard_admin.html", context)
-
 @admin_required
 def gerer_commissariats(request):
     commissariats = Commissariat.objects.all()
@@ -976,8 +880,8 @@ def creer_administrateur(request):
     if request.method == "POST":
         form = AdministrateurCreationForm(request.POST)
         if form.is_valid():
-            form.save()
-            messages.success(request, "Administrateur créé et mot de passe envoyé par email.")
+            form.save(request=request)
+            messages.success(request, "Administrateur créé ; lien de définition du mot de passe envoyé par email.")
             return redirect('gerer_utilisateurs')
     else:
         form = AdministrateurCreationForm()
@@ -1034,34 +938,39 @@ def supprimer_policier(request, pk):
     return redirect('gerer_policiers')
 
 
+def date_param(request, nom):
+    """Date AAAA-MM-JJ lue dans request.GET, ou None si absente/invalide."""
+    try:
+        return parse_date(request.GET.get(nom) or "")
+    except ValueError:
+        return None
+
+
 @admin_required
 def voir_stats(request):
-    # Comptages globaux
-    nb_objets = Objet.objects.count()
-    nb_restitutions = Restitution.objects.count()
-    nb_citoyens = Utilisateur.objects.filter(role='citoyen').count()
-    nb_admins = Utilisateur.objects.filter(role='admin', is_active=True).count()  # admins actifs
-    nb_policiers = Utilisateur.objects.filter(role='policier').count()
-    
-    # Exemples d'évolution sur 7 jours (tu peux remplacer par données réelles)
-    evolution_objets = [5, 8, 6, 12, 15, 18, nb_objets]
-    evolution_restitutions = [2, 3, 4, 6, 5, 7, nb_restitutions]
-    evolution_citoyens = [1, 2, 3, 5, 6, 8, nb_citoyens]
-    evolution_admins = [1, 1, 1, 2, 2, 3, nb_admins]
-    evolution_policiers = [1, 1, 2, 2, 3, 4, nb_policiers]
+    # Comptages globaux (admins actifs uniquement) : dernier instantané quotidien
+    stats = dernier_instantane()
+
+    # Période affichée (?debut=AAAA-MM-JJ&fin=AAAA-MM-JJ), 7 derniers jours par défaut
+    fin = date_param(request, "fin") or timezone.localdate()
+    debut = date_param(request, "debut") or fin - timedelta(days=6)
+    if debut > fin:
+        debut, fin = fin, debut
+
+    # Évolution lue dans les instantanés quotidiens (manage.py capturer_statistiques)
+    evolution = evolution_statistiques(debut, fin)
 
     context = {
-        "nb_objets": nb_objets,
-        "nb_objets_declare": nb_objets,  # pour clarifier le libellé
-        "nb_restitutions": nb_restitutions,
-        "nb_citoyens": nb_citoyens,
-        "nb_admins": nb_admins,
-        "nb_policiers": nb_policiers,
-        "evolution_objets": evolution_objets,
-        "evolution_restitutions": evolution_restitutions,
-        "evolution_citoyens": evolution_citoyens,
-        "evolution_admins": evolution_admins,
-        "evolution_policiers": evolution_policiers,
+        "nb_objets": stats.nb_objets,
+        "nb_objets_declare": stats.nb_objets,  # pour clarifier le libellé
+        "nb_restitutions": stats.nb_restitutions,
+        "nb_citoyens": stats.nb_citoyens,
+        "nb_admins": stats.nb_admins,
+        "nb_policiers": stats.nb_policiers,
+        "instantane_du": stats.jour,
+        "debut": debut,
+        "fin": fin,
+        "evolution": evolution.en_dict(),
     }
     return render(request, "frontend/admin/voir_stats.html", context)
 
@@ -1069,9 +978,7 @@ def voir_stats(request):
 
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
-from django.utils.crypto import get_random_string
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.shortcuts import get_object_or_404
@@ -1089,6 +996,8 @@ def ajax_ajouter_commissariat(request):
             "id": c.id,
             "nom": c.nom,
             "adresse": c.adresse,
+            "latitude": c.latitude,
+            "longitude": c.longitude,
             "message": "✅ Commissariat ajouté avec succès."
         })
     return JsonResponse({"success": False, "errors": form.errors})
@@ -1106,6 +1015,8 @@ def ajax_modifier_commissariat(request, pk):
             "id": c.id,
             "nom": c.nom,
             "adresse": c.adresse,
+            "latitude": c.latitude,
+            "longitude": c.longitude,
             "message": f"✅ Commissariat '{c.nom}' modifié avec succès."
         })
     return JsonResponse({"success": False, "errors": form.errors})
@@ -1129,26 +1040,24 @@ def creer_policier(request):
 
     if request.method == "POST":
         if form.is_valid():
-            password = get_random_string(10)
             policier = form.save(commit=False)
-            policier.set_password(password)
+            # Pas de mot de passe : le policier choisit le sien via le lien envoyé
+            policier.set_unusable_password()
             policier.save()
 
-            send_mail(
-                subject="Création de votre compte Policier",
+            envoyer_plus_tard(
+                sujet="Création de votre compte Policier",
                 message=(
                     f"Bonjour {policier.first_name},\n\n"
                     f"Votre compte a été créé avec succès.\n\n"
                     f"👤 Identifiant : {policier.username}\n"
-                    f"🔐 Mot de passe : {password}\n\n"
-                    f"Merci de le modifier dès votre première connexion."
+                    f"🔐 Choisissez votre mot de passe : {lien_definir_mot_de_passe(request, policier)}\n\n"
+                    f"Ce lien n'est valable qu'une fois."
                 ),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[policier.email],
-                fail_silently=False,
+                destinataires=[policier.email],
             )
 
-            messages.success(request, "✅ Policier créé et mot de passe envoyé par email.")
+            messages.success(request, "✅ Policier créé ; lien de définition du mot de passe envoyé par email.")
             return redirect("gerer_policiers")
         else:
             messages.error(request, "⚠️ Veuillez corriger les erreurs dans le formulaire.")
@@ -1173,7 +1082,8 @@ def liste_citoyens(request):
             Q(last_name__icontains=query) |
             Q(email__icontains=query)
         )
-    return render(request, 'frontend/admin/liste_citoyens.html', {'citoyens': citoyens})
+    page = paginer(request, citoyens.order_by('-date_joined', '-id'))
+    return render(request, 'frontend/admin/liste_citoyens.html', {'citoyens': page, 'page': page})
 
 def is_admin(user):
     return user.is_authenticated and user.role == 'admin'
@@ -1192,11 +1102,10 @@ def bannir_citoyen(request, pk):
         citoyen.save()
 
         # Envoi email
-        send_mail(
-            subject="Notification de bannissement",
+        envoyer_plus_tard(
+            sujet="Notification de bannissement",
             message=f"Bonjour {citoyen.username},\n\nVous avez été banni.\nMotif : {motif}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[citoyen.email],
+            destinataires=[citoyen.email],
         )
 
         messages.success(request, f"{citoyen.username}  a été banni avec succès.")
@@ -1214,11 +1123,10 @@ def debannir_citoyen(request, pk):
         citoyen.save()
 
         # Envoi email
-        send_mail(
-            subject="Notification de débannissement",
+        envoyer_plus_tard(
+            sujet="Notification de débannissement",
             message=f"Bonjour {citoyen.username},\n\nVous avez été débanni.",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[citoyen.email],
+            destinataires=[citoyen.email],
         )
 
         messages.success(request, f"{citoyen.username} a été débanni avec succès.")
@@ -1267,20 +1175,15 @@ def je_le_trouve(request, declaration_id):
     # Notification par email au déclarant
     if declaration.citoyen and declaration.citoyen.email:
         objet_url = request.build_absolute_uri(reverse('objet_detail', args=[objet.id]))
-        try:
-            send_mail(
-                subject=f"[Objet Réclamé] Votre objet '{objet.nom}' a été retrouvé",
-                message=(
-                    f"Bonjour {declaration.citoyen.username},\n\n"
-                    f"L'objet que vous avez déclaré perdu a été retrouvé et signalé comme tel par {request.user.username}.\n\n"
-                    f"Détails : {objet_url}"
-                ),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[declaration.citoyen.email],
-                fail_silently=True
-            )
-        except (BadHeaderError, ConnectionError, OSError):
-            messages.warning(request, "⚠️ Impossible d'envoyer l'email au déclarant.")
+        envoyer_plus_tard(
+            sujet=f"[Objet Réclamé] Votre objet '{objet.nom}' a été retrouvé",
+            message=(
+                f"Bonjour {declaration.citoyen.username},\n\n"
+                f"L'objet que vous avez déclaré perdu a été retrouvé et signalé comme tel par {request.user.username}.\n\n"
+                f"Détails : {objet_url}"
+            ),
+            destinataires=[declaration.citoyen.email],
+        )
 
     messages.success(request, f"✅ Vous avez signalé que vous avez trouvé l'objet '{objet.nom}'.")
     return redirect("objets_perdus")
@@ -1321,22 +1224,16 @@ def ca_m_appartient(request, declaration_id):
 
     # Envoi d'email
     if declaration.citoyen and declaration.citoyen.email:
-        try:
-            objet_url = request.build_absolute_uri(reverse('objet_detail', args=[declaration.objet.id]))
-            send_mail(
-                subject=f"[Objet Trouvé] Votre objet '{declaration.objet.nom}' a été réclamé !",
-                message=(
-                    f"Bonjour {declaration.citoyen.username},\n\n"
-                    f"L'objet que vous avez déclaré perdu a été réclamé par {request.user.username}.\n\n"
-                    f"Détails : {objet_url}"
-                ),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[declaration.citoyen.email],
-                fail_silently=True
-            )
-        except Exception as e:
-            # Log si tu veux garder une trace
-            print(f"Erreur d'envoi email: {e}")
+        objet_url = request.build_absolute_uri(reverse('objet_detail', args=[declaration.objet.id]))
+        envoyer_plus_tard(
+            sujet=f"[Objet Trouvé] Votre objet '{declaration.objet.nom}' a été réclamé !",
+            message=(
+                f"Bonjour {declaration.citoyen.username},\n\n"
+                f"L'objet que vous avez déclaré perdu a été réclamé par {request.user.username}.\n\n"
+                f"Détails : {objet_url}"
+            ),
+            destinataires=[declaration.citoyen.email],
+        )
 
     messages.success(request, f"✅ Vous avez réclamé l'objet '{declaration.objet.nom}'.")
     return redirect("objets_trouves")
@@ -1349,7 +1246,14 @@ def ca_m_appartient(request, declaration_id):
 @login_required
 def dashboard_citoyen(request):
     user = request.user
+    context = dict(contexte_en_cache(
+        "citoyen", lambda: contexte_dashboard_citoyen(user), utilisateur=user
+    ))
+    context['user'] = user
+    return render(request, "frontend/citoyen/dashboard_citoyen.html", context)
+
 
+def contexte_dashboard_citoyen(user):
     # Comptage des objets perdus et trouvés par l'utilisateur
     nb_objets_perdus = Declaration.objects.filter(
         citoyen=user,
@@ -1367,19 +1271,20 @@ def dashboard_citoyen(request):
         statut=StatutRestitution.EFFECTUEE
     ).count()
 
-    # 5 dernières notifications (toutes les déclarations, sans filtre "lu")
-    notifications = Declaration.objects.filter(
-        citoyen=user
-    ).order_by('-date_declaration')[:5]
+    # 5 dernières notifications (toutes les déclarations, sans filtre "lu"),
+    # évaluées ici pour être mises en cache avec leur objet
+    notifications = list(
+        Declaration.objects.filter(citoyen=user)
+        .select_related('objet')
+        .order_by('-date_declaration')[:5]
+    )
 
-    context = {
-        'user': user,
+    return {
         'nb_objets_perdus': nb_objets_perdus,
         'nb_objets_trouves': nb_objets_trouves,
         'nb_objets_restitues': nb_objets_restitues,
         'notifications': notifications,
     }
-    return render(request, "frontend/citoyen/dashboard_citoyen.html", context)
 
 
 
@@ -1398,8 +1303,7 @@ def mes_objets_trouves(request):
         objet__etat=EtatObjet.TROUVE
     ).order_by('-date_declaration')
 
-    if query:
-        declarations = declarations.filter(objet__nom__icontains=query)
+    declarations = rechercher_declarations(declarations, query)
 
     context = {
         'declarations': declarations,
@@ -1424,8 +1328,7 @@ def mes_objets_perdus(request):
         objet__etat=EtatObjet.PERDU
     ).order_by('-date_declaration')
 
-    if query:
-        declarations = declarations.filter(objet__nom__icontains=query)
+    declarations = rechercher_declarations(declarations, query)
 
     context = {
         'declarations': declarations,
@@ -1513,17 +1416,14 @@ def reclamer_objet(request, restitution_id):
     if restitution.restitue_par and restitution.restitue_par.email:
         destinataires.append(restitution.restitue_par.email)
 
-    if destinataires:
-        send_mail(
-            subject=f"[Objet Réclamé] {restitution.objet.nom}",
-            message=(
-                f"Le citoyen {request.user.username} a réclamé l'objet '{restitution.objet.nom}'.\n"
-                f"Date de restitution: {restitution.date_restitution}"
-            ),
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=destinataires,
-            fail_silently=True
-        )
+    envoyer_plus_tard(
+        sujet=f"[Objet Réclamé] {restitution.objet.nom}",
+        message=(
+            f"Le citoyen {request.user.username} a réclamé l'objet '{restitution.objet.nom}'.\n"
+            f"Date de restitution: {restitution.date_restitution}"
+        ),
+        destinataires=destinataires,
+    )
 
     return redirect("objets_a_reclamer")
 
@@ -1569,3 +1469,37 @@ def supprimer_declaration(request, declaration_id):
         messages.success(request, "✅ Objet supprimé avec succès.")
         return redirect('mes_objets_perdus')
     return render(request, "frontend/citoyen/confirmer_suppression.html", {"declaration": declaration})
+
+
+
+# =============================
+#       FLUX DES MODIFICATIONS (API)
+# =============================
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+from backend.objets.flux import LIMITE, LIMITE_MAX, CurseurExpire, CurseurInvalide, modifications
+
+
+@require_GET
+@gzip_page
+def flux_modifications(request):
+    """Objets, déclarations, restitutions et suppressions depuis ``?curseur=`` (voir backend/objets/flux.py)."""
+    # API : pas de redirection vers la page de connexion
+    if not request.user.is_authenticated:
+        return JsonResponse({'status': 'error', 'message': 'Authentification requise.'}, status=401)
+    try:
+        limite = min(max(int(request.GET.get('limite', LIMITE)), 1), LIMITE_MAX)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Limite invalide.'}, status=400)
+    try:
+        # Restitutions et coordonnées réservées aux agents
+        complet = request.user.role in ('policier', 'admin')
+        donnees = modifications(request.GET.get('curseur') or None, limite, complet=complet)
+    except CurseurExpire:
+        # Suppressions purgées depuis : le client doit tout resynchroniser
+        return JsonResponse({'status': 'error', 'message': 'Curseur expiré, resynchronisation complète requise.'}, status=410)
+    except CurseurInvalide:
+        return JsonResponse({'status': 'error', 'message': 'Curseur invalide.'}, status=400)
+    response = JsonResponse(donnees, json_dumps_params={'separators': (',', ':')})
+    patch_cache_control(response, private=True, no_store=True)
+    return response